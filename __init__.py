@@ -1,6 +1,6 @@
 from .templates import get_prompt_templates, save_prompt_templates
 from .composer import compose_flow
-from .queue import enqueue, dequeue, list_items, init_db
+from .queue_api import enqueue, dequeue, list_items, init_db
 from .security import set_api_key
 
 __all__ = ['get_prompt_templates','save_prompt_templates','compose_flow','enqueue','dequeue','list_items','init_db','set_api_key']
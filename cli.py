@@ -2,11 +2,22 @@
 
 import argparse
 import json
+import sys
+import time
+from collections import Counter
 from pathlib import Path
+from typing import Dict, Iterator, List
 
 from src import DownloadManager, compose_flow
 from src.diag import export_diagnostics_bundle
-from src.queue import list_items
+from src.download.manager import DownloadManifest
+from src.download.manifest import MANIFEST_FORMATS, ManifestError, check_manifest
+from src.download.resolve import resolve_manifest
+from src.flows import CompileOptions, SweepGrid, compose_sweep
+from src.queue import DEFAULT_LANE, enqueue_many, list_items
+from src.worker import CACHE_TYPES, EXECUTION_ORDERS, ItemReport, QueueWorker
+
+MAX_REPORTED_ERRORS = 50
 
 
 def _build_parser() -> argparse.ArgumentParser:
@@ -18,60 +29,193 @@ def _build_parser() -> argparse.ArgumentParser:
     compose.add_argument("--model", "-m", default=None)
     compose.add_argument("--steps", type=int, default=20)
 
+    sweep = sub.add_parser("compose-sweep", help="Compose a parameter sweep as one JSONL bundle")
+    sweep.add_argument("--prompt", "-p", action="append", required=True, help="Repeat for several prompts")
+    sweep.add_argument("--model", "-m", default=None)
+    sweep.add_argument("--seeds", type=_int_list, default=[-1], help="Comma-separated seeds or a range like 0-99")
+    sweep.add_argument("--steps", type=_int_list, default=[20])
+    sweep.add_argument("--samplers", type=_str_list, default=["DDIM"])
+    sweep.add_argument("--loras", type=_str_list, default=[None])
+    sweep.add_argument("--template", default=None, help="Prompt template name to expand each prompt with")
+    sweep.add_argument("--enqueue", action="store_true", help="Also add every flow to the queue")
+    sweep.add_argument("--no-bundle", dest="bundle", action="store_false", help="Skip writing the JSONL bundle")
+    sweep.add_argument("--lane", default=DEFAULT_LANE)
+    sweep.add_argument("--priority", type=int, default=0)
+
+    worker = sub.add_parser("worker", help="Drain the queue through an in-process ComfyUI executor")
+    worker.add_argument("--max-items", type=int, default=None, help="Stop after this many items")
+    worker.add_argument("--idle-timeout", type=float, default=None, help="Exit once the queue is empty this long")
+    worker.add_argument("--lease-seconds", type=float, default=300.0)
+    worker.add_argument("--cache", choices=CACHE_TYPES, default="classic", help="Executor output cache policy")
+    worker.add_argument("--cache-lru", type=int, default=0, help="Entries kept by the LRU cache")
+    worker.add_argument("--cache-lru-gb", type=float, default=0.0, help="Byte budget for the LRU cache, in GiB")
+    worker.add_argument("--cache-disk", type=Path, default=None, help="Local directory for spilled node outputs")
+    worker.add_argument("--cache-disk-gb", type=float, default=10.0, help="Size cap for --cache-disk")
+    worker.add_argument("--parallel", type=int, default=0, metavar="WORKERS", help="Run independent graph branches on this many threads")
+    worker.add_argument("--order", choices=EXECUTION_ORDERS, default="ux", help="Node ordering; critical-path learns node durations across runs")
+    worker.add_argument("--checkpoint", default=None, help="Checkpoint for flows that do not name a model")
+
     queue = sub.add_parser("queue-status", help="Print a summary of the queue state")
     queue.add_argument("--status", choices=["pending", "processing", "failed", "done"], default=None)
 
-    manifest = sub.add_parser("manifest-check", help="Validate a manifest JSON file")
+    enqueue_file = sub.add_parser("queue-enqueue-file", help="Stream a JSONL file into the queue")
+    enqueue_file.add_argument("path", type=Path)
+
+    manifest = sub.add_parser("manifest-check", help="Validate a manifest JSON or JSONL file")
     manifest.add_argument("path", type=Path)
+    manifest.add_argument("--format", choices=MANIFEST_FORMATS, help="Override format detection by file suffix")
+    manifest.add_argument("--resolve", action="store_true", help="Also resolve every URL (cached, revalidated)")
+    manifest.add_argument("--refresh", action="store_true", help="Ignore cached resolutions")
 
     download = sub.add_parser("download-manifest", help="Download all items in a manifest")
     download.add_argument("path", type=Path)
+    download.add_argument("--workers", type=int, default=4)
+    download.add_argument("--dedupe", action="store_true", help="Store files once by SHA-256 and link destinations")
+    download.add_argument("--format", choices=MANIFEST_FORMATS, help="Override format detection by file suffix")
 
     diag = sub.add_parser("diag", help="Generate a diagnostics bundle")
     diag.add_argument("--output", type=Path, default=None)
+    diag.add_argument("--max-section-mb", type=float, default=8.0, help="Cap for each section of the bundle")
 
     return parser
 
 
-def _cmd_compose(args: argparse.Namespace) -> None:
+def _cmd_compose_run(args: argparse.Namespace) -> None:
     path, _ = compose_flow(args.prompt, model_key=args.model, steps=args.steps)
     print("Composed flow at", path)
 
 
-def _cmd_queue(args: argparse.Namespace) -> None:
+def _int_list(value: str) -> List[int]:
+    numbers: List[int] = []
+    for part in value.split(","):
+        start, sep, end = part.strip().partition("-")
+        if sep and start:
+            numbers.extend(range(int(start), int(end) + 1))
+        else:
+            numbers.append(int(part))
+    return numbers
+
+
+def _str_list(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _cmd_compose_sweep(args: argparse.Namespace) -> None:
+    if not args.bundle and not args.enqueue:
+        raise SystemExit("Nothing to do: pass --enqueue or drop --no-bundle")
+    grid = SweepGrid(
+        prompts=args.prompt,
+        seeds=args.seeds,
+        steps=args.steps,
+        samplers=args.samplers,
+        loras=args.loras,
+        model_key=args.model,
+        template=args.template,
+    )
+    result = compose_sweep(grid, bundle=args.bundle, enqueue=args.enqueue, priority=args.priority, lane=args.lane)
+    print(json.dumps(result, indent=2))
+
+
+def _cmd_worker(args: argparse.Namespace) -> None:
+    worker = QueueWorker(
+        lease_seconds=args.lease_seconds,
+        cache_type=args.cache,
+        cache_lru=args.cache_lru,
+        cache_lru_bytes=int(args.cache_lru_gb * 1024**3),
+        cache_disk=args.cache_disk,
+        cache_disk_gb=args.cache_disk_gb,
+        parallel_workers=args.parallel,
+        execution_order=args.order,
+        compile_options=CompileOptions(default_checkpoint=args.checkpoint),
+    )
+
+    def report(item: ItemReport) -> None:
+        print(
+            f"item {item.item_id} {item.status}: validate {item.validate_seconds:.2f}s, "
+            f"execute {item.execute_seconds:.2f}s, total {item.total_seconds:.2f}s, "
+            f"{item.cached_nodes} cached nodes"
+        )
+
+    started = time.perf_counter()
+    try:
+        counts = worker.run(max_items=args.max_items, idle_timeout=args.idle_timeout, on_report=report)
+    finally:
+        worker.close()
+    elapsed = time.perf_counter() - started
+    processed = sum(counts.values())
+    rate = processed / elapsed * 60 if elapsed else 0.0
+    print(f"Processed {processed} items ({counts['done']} done) in {elapsed:.1f}s, {rate:.1f} items/min")
+
+
+def _cmd_queue_status(args: argparse.Namespace) -> None:
     rows = list_items(status=args.status)
     print(json.dumps(rows, indent=2))
 
 
-def _cmd_manifest(args: argparse.Namespace) -> None:
-    data = json.loads(args.path.read_text(encoding="utf-8"))
-    keys = {"url", "destination"}
-    missing = [idx for idx, item in enumerate(data.get("items", [])) if not keys.issubset(item)]
-    if missing:
-        raise SystemExit(f"Manifest validation failed; missing keys in rows: {missing}")
-    print(f"Manifest {args.path} OK ({len(data.get('items', []))} items)")
-
-
-def _cmd_download(args: argparse.Namespace) -> None:
-    manifest_data = json.loads(args.path.read_text(encoding="utf-8"))
-    items = manifest_data.get("items", [])
-    manager = DownloadManager()
+def _iter_jsonl(path: Path) -> Iterator[Dict]:
+    with path.open("r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise SystemExit(f"{path}:{lineno}: invalid JSON ({exc.msg})")
+
+
+def _cmd_queue_enqueue_file(args: argparse.Namespace) -> None:
+    count = enqueue_many(_iter_jsonl(args.path))
+    print(f"Enqueued {count} items from {args.path}")
+
+
+def _cmd_manifest_check(args: argparse.Namespace) -> None:
+    report = check_manifest(args.path, fmt=args.format)
+    if not report.ok:
+        for row, message in report.errors[:MAX_REPORTED_ERRORS]:
+            print(f"{args.path}: row {row}: {message}", file=sys.stderr)
+        if len(report.errors) > MAX_REPORTED_ERRORS:
+            print(f"... {len(report.errors) - MAX_REPORTED_ERRORS} more errors", file=sys.stderr)
+        raise SystemExit(f"Manifest validation failed: {len(report.errors)} errors in {report.rows} rows")
+    print(f"Manifest {args.path} OK ({report.rows} items)")
+    if args.resolve:
+        manifest = DownloadManifest.from_json(args.path, fmt=args.format)
+        results = resolve_manifest(manifest, force=args.refresh)
+        sources = Counter(str(result["cache"]) for result in results.values())
+        print("Resolved", len(results), "URLs:", ", ".join(f"{k}={v}" for k, v in sorted(sources.items())))
+        broken = [url for url, result in results.items() if "error" in result or int(result["status_code"]) >= 400]
+        if broken:
+            raise SystemExit(f"Unreachable URLs: {broken}")
+
+
+def _cmd_download_manifest(args: argparse.Namespace) -> None:
+    manager = DownloadManager(max_workers=args.workers, dedupe=args.dedupe)
     manager.progress_callback = lambda state: print(
         f"downloaded {state['downloaded_bytes']} / {state.get('total_bytes', 'unknown')}"
     )
-    for item in items:
-        manager.add_item(item)
-    manager.run()
+    manager.add_manifest(DownloadManifest.from_json(args.path, fmt=args.format))
+    # Results are only counted, so huge manifests don't keep per-item metadata around.
+    done = failed = 0
+    try:
+        for index, future in enumerate(manager.iter_results()):
+            error = future.exception()
+            if error is None:
+                done += 1
+                continue
+            failed += 1
+            if failed <= MAX_REPORTED_ERRORS:
+                print(f"{args.path}: item {index}: {error}", file=sys.stderr)
+    except ManifestError as exc:
+        raise SystemExit(f"{args.path}: {exc}")
+    if failed > MAX_REPORTED_ERRORS:
+        print(f"... {failed - MAX_REPORTED_ERRORS} more failures", file=sys.stderr)
+    if failed:
+        raise SystemExit(f"Downloaded {done} items, {failed} failed")
+    print(f"Downloaded {done} items from {args.path}")
 
 
 def _cmd_diag(args: argparse.Namespace) -> None:
-    bundle = export_diagnostics_bundle()
-    if args.output:
-        args.output.parent.mkdir(parents=True, exist_ok=True)
-        args.output.write_bytes(bundle.read_bytes())
-        print("Diagnostics bundle written to", args.output)
-    else:
-        print(bundle)
+    bundle = export_diagnostics_bundle(args.output, max_section_bytes=int(args.max_section_mb * 1024**2))
+    print("Diagnostics bundle written to", bundle)
 
 
 def main() -> None:
@@ -101,12 +101,26 @@ parser.add_argument("--preview-method", type=LatentPreviewMethod, default=Latent
 
 parser.add_argument("--preview-size", type=int, default=512, help="Sets the maximum preview size for sampler nodes.")
 
+def parse_size(value):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    text = value.strip().upper().removesuffix("B").removesuffix("I")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
 cache_group = parser.add_mutually_exclusive_group()
 cache_group.add_argument("--cache-classic", action="store_true", help="Use the old style (aggressive) caching.")
 cache_group.add_argument("--cache-lru", type=int, default=0, help="Use LRU caching with a maximum of N node results cached. May use more RAM/VRAM.")
+cache_group.add_argument("--cache-lru-bytes", type=parse_size, default=0, metavar="SIZE", help="Use LRU caching bounded by the measured size of cached node results instead of their number, e.g. 8G or 512M.")
 cache_group.add_argument("--cache-none", action="store_true", help="Reduced RAM/VRAM usage at the expense of executing every node for each run.")
 cache_group.add_argument("--cache-ram", nargs='?', const=4.0, type=float, default=0, help="Use RAM pressure caching with the specified headroom threshold. If available RAM drops below the threhold the cache remove large items to free RAM. Default 4GB")
 
+parser.add_argument("--cache-disk", type=str, default=None, metavar="PATH", help="Spill node outputs evicted from the in-memory cache (tensors and plain values only) to this directory and reuse them across prompts and restarts.")
+parser.add_argument("--cache-disk-size", type=float, default=10.0, metavar="GB", help="Maximum size of the --cache-disk directory; least recently used entries are removed first.")
+
+parser.add_argument("--execution-order", type=str, choices=["ux", "critical-path"], default="ux", help="Order in which ready nodes run. ux (default) runs outputs first so previews appear early; critical-path uses node durations recorded in the user directory to start the longest chains and slow async nodes first.")
+parser.add_argument("--parallel-execution", nargs='?', const=4, type=int, default=0, metavar="WORKERS", help="Run independent branches of a workflow concurrently: nodes that use models run one at a time per device, other nodes on a pool of WORKERS threads. Default 4 when enabled.")
+
 attn_group = parser.add_mutually_exclusive_group()
 attn_group.add_argument("--use-split-cross-attention", action="store_true", help="Use the split cross attention optimization. Ignored when xformers is used.")
 attn_group.add_argument("--use-quad-cross-attention", action="store_true", help="Use the sub-quadratic cross attention optimization . Ignored when xformers is used.")
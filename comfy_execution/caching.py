@@ -1,13 +1,19 @@
 import bisect
 import gc
+import hashlib
+import inspect
 import itertools
+import os
 import psutil
 import time
 import torch
-from typing import Sequence, Mapping, Dict
+import weakref
+from collections import OrderedDict
+from typing import Sequence, Mapping, Dict, NamedTuple
 from comfy_execution.graph import DynamicPrompt
 from abc import ABC, abstractmethod
 
+import folder_paths
 import nodes
 
 from comfy_execution.graph_utils import is_link
@@ -78,11 +84,125 @@ class CacheKeySetID(CacheKeySet):
             self.keys[node_id] = (node_id, node["class_type"])
             self.subcache_keys[node_id] = (node_id, node["class_type"])
 
+SIGNATURE_DIGEST_SIZE = 32
+
+# Digests already computed for a prompt run, shared by every key set built
+# with the same IsChangedCache (the top-level cache and each subcache).
+_SIGNATURE_MEMO = weakref.WeakKeyDictionary()
+
+
+def _encode_constant(obj, out):
+    # Appends a type-tagged, length-prefixed encoding of obj to out. Returns
+    # False if obj can't be encoded, in which case the node is uncacheable.
+    if obj is None:
+        out.append("N")
+    elif isinstance(obj, bool):
+        out.append("T" if obj else "F")
+    elif isinstance(obj, int):
+        out.append(f"i{obj};")
+    elif isinstance(obj, float):
+        if obj != obj:
+            return False
+        out.append(f"f{obj!r};")
+    elif isinstance(obj, str):
+        out.append(f"s{len(obj)}:")
+        out.append(obj)
+    elif isinstance(obj, bytes):
+        out.append(f"b{len(obj)}:{obj.hex()}")
+    elif isinstance(obj, Mapping):
+        out.append(f"{{{len(obj)}:")
+        try:
+            items = sorted(obj.items())
+        except TypeError:
+            return False
+        for key, value in items:
+            if not (_encode_constant(key, out) and _encode_constant(value, out)):
+                return False
+    elif isinstance(obj, Sequence):
+        out.append(f"[{len(obj)}:")
+        for value in obj:
+            if not _encode_constant(value, out):
+                return False
+    else:
+        # TODO - Support other objects like tensors?
+        return False
+    return True
+
+
+_CODE_VERSIONS = {}
+
+
+def _node_code_version(class_def):
+    # Keys outlive the process once spilled to disk, so they carry the
+    # version of the code that produced them: an explicit CACHE_VERSION if
+    # the class has one, else the size and mtime of the file defining it.
+    version = _CODE_VERSIONS.get(class_def)
+    if version is None:
+        version = getattr(class_def, "CACHE_VERSION", None)
+        if version is None:
+            try:
+                stat = os.stat(inspect.getsourcefile(class_def))
+                version = f"{stat.st_mtime_ns}:{stat.st_size}"
+            except (OSError, TypeError):
+                version = ""
+        _CODE_VERSIONS[class_def] = str(version)
+    return _CODE_VERSIONS[class_def]
+
+
+def _model_file_identity(name):
+    # Size and mtime of every model file a filename input can refer to, so a
+    # file replaced under the same name gets a new key.
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in folder_paths.supported_pt_extensions:
+        return None
+    identity = []
+    for folder_name, (_, extensions) in folder_paths.folder_names_and_paths.items():
+        if extension not in extensions:
+            continue
+        path = folder_paths.get_full_path(folder_name, name)
+        if path is not None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            identity.append(f"{folder_name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return identity
+
+
+class UncacheableKey(bytes):
+    """A random key for a node whose output can never be reused (and so is never spilled)."""
+
+
+def _unique_digest():
+    return UncacheableKey(os.urandom(SIGNATURE_DIGEST_SIZE))
+
+
+def is_stable_key(key):
+    # Stable keys are derived only from the prompt, so they are meaningful
+    # across prompts and restarts.
+    return isinstance(key, bytes) and not isinstance(key, UncacheableKey)
+
+
 class CacheKeySetInputSignature(CacheKeySet):
+    """Keys each node by a Merkle-style digest.
+
+    A node's key hashes its class and code version, IS_CHANGED value and
+    constant inputs (plus the size and mtime of any model file they name)
+    together with the keys of the nodes linked into it, so it changes
+    whenever anything upstream changes. Keys are computed once per node in
+    topological order, making setup linear in the size of the graph, and
+    are fixed-size bytes that stay equal across prompts for unchanged
+    subgraphs.
+    """
     def __init__(self, dynprompt, node_ids, is_changed_cache):
         super().__init__(dynprompt, node_ids, is_changed_cache)
         self.dynprompt = dynprompt
         self.is_changed_cache = is_changed_cache
+        self.digests = {}
+        try:
+            self.memo = _SIGNATURE_MEMO.setdefault(is_changed_cache, {})
+        except TypeError:
+            self.memo = {}
 
     def include_node_id_in_input(self) -> bool:
         return False
@@ -97,63 +217,142 @@ class CacheKeySetInputSignature(CacheKeySet):
             self.keys[node_id] = await self.get_node_signature(self.dynprompt, node_id)
             self.subcache_keys[node_id] = (node_id, node["class_type"])
 
+    @staticmethod
+    def get_parent_ids(dynprompt, node_id):
+        if not dynprompt.has_node(node_id):
+            return []
+        inputs = dynprompt.get_node(node_id)["inputs"]
+        return [inputs[key][0] for key in sorted(inputs.keys()) if is_link(inputs[key])]
+
     async def get_node_signature(self, dynprompt, node_id):
-        signature = []
-        ancestors, order_mapping = self.get_ordered_ancestry(dynprompt, node_id)
-        signature.append(await self.get_immediate_node_signature(dynprompt, node_id, order_mapping))
-        for ancestor_id in ancestors:
-            signature.append(await self.get_immediate_node_signature(dynprompt, ancestor_id, order_mapping))
-        return to_hashable(signature)
-
-    async def get_immediate_node_signature(self, dynprompt, node_id, ancestor_order_mapping):
+        # Iterative post-order walk so deep graphs don't hit the recursion
+        # limit; every ancestor is hashed exactly once per key set.
+        digests = self.digests
+        visiting = set()
+        stack = [(node_id, False)]
+        while stack:
+            current, parents_done = stack.pop()
+            if current in digests:
+                continue
+            if parents_done:
+                visiting.discard(current)
+                digests[current] = await self.get_immediate_node_signature(dynprompt, current, digests)
+                continue
+            visiting.add(current)
+            stack.append((current, True))
+            for parent_id in self.get_parent_ids(dynprompt, current):
+                if parent_id not in digests and parent_id not in visiting:
+                    stack.append((parent_id, False))
+        return digests[node_id]
+
+    async def get_immediate_node_signature(self, dynprompt, node_id, parent_digests):
         if not dynprompt.has_node(node_id):
             # This node doesn't exist -- we can't cache it.
-            return [float("NaN")]
+            return _unique_digest()
         node = dynprompt.get_node(node_id)
+        inputs = node["inputs"]
+        links = tuple(
+            # A missing digest means a dependency cycle; never reuse that.
+            parent_digests.get(inputs[key][0]) or _unique_digest()
+            for key in sorted(inputs.keys()) if is_link(inputs[key])
+        )
+        memoized = self.memo.get(node_id)
+        if memoized is not None and memoized[0] is node and memoized[1] == links:
+            return memoized[2]
+        if any(isinstance(link, UncacheableKey) for link in links):
+            digest = _unique_digest()
+            self.memo[node_id] = (node, links, digest)
+            return digest
+
         class_type = node["class_type"]
         class_def = nodes.NODE_CLASS_MAPPINGS[class_type]
-        signature = [class_type, await self.is_changed_cache.get(node_id)]
+        parts = []
+        cacheable = _encode_constant(class_type, parts) and _encode_constant(_node_code_version(class_def), parts)
+        cacheable = cacheable and _encode_constant(await self.is_changed_cache.get(node_id), parts)
         if self.include_node_id_in_input() or (hasattr(class_def, "NOT_IDEMPOTENT") and class_def.NOT_IDEMPOTENT) or include_unique_id_in_input(class_type):
-            signature.append(node_id)
-        inputs = node["inputs"]
+            cacheable = cacheable and _encode_constant(node_id, parts)
+        link_index = 0
         for key in sorted(inputs.keys()):
+            if not cacheable:
+                break
+            _encode_constant(key, parts)
             if is_link(inputs[key]):
-                (ancestor_id, ancestor_socket) = inputs[key]
-                ancestor_index = ancestor_order_mapping[ancestor_id]
-                signature.append((key,("ANCESTOR", ancestor_index, ancestor_socket)))
+                parts.append(f"L{links[link_index].hex()}:{inputs[key][1]};")
+                link_index += 1
             else:
-                signature.append((key, inputs[key]))
-        return signature
-
-    # This function returns a list of all ancestors of the given node. The order of the list is
-    # deterministic based on which specific inputs the ancestor is connected by.
-    def get_ordered_ancestry(self, dynprompt, node_id):
-        ancestors = []
-        order_mapping = {}
-        self.get_ordered_ancestry_internal(dynprompt, node_id, ancestors, order_mapping)
-        return ancestors, order_mapping
-
-    def get_ordered_ancestry_internal(self, dynprompt, node_id, ancestors, order_mapping):
-        if not dynprompt.has_node(node_id):
-            return
-        inputs = dynprompt.get_node(node_id)["inputs"]
-        input_keys = sorted(inputs.keys())
-        for key in input_keys:
-            if is_link(inputs[key]):
-                ancestor_id = inputs[key][0]
-                if ancestor_id not in order_mapping:
-                    ancestors.append(ancestor_id)
-                    order_mapping[ancestor_id] = len(ancestors) - 1
-                    self.get_ordered_ancestry_internal(dynprompt, ancestor_id, ancestors, order_mapping)
+                cacheable = _encode_constant(inputs[key], parts)
+                if cacheable and isinstance(inputs[key], str):
+                    _encode_constant(_model_file_identity(inputs[key]), parts)
+        if cacheable:
+            digest = hashlib.blake2b("".join(parts).encode("utf-8", "surrogatepass"), digest_size=SIGNATURE_DIGEST_SIZE).digest()
+        else:
+            digest = _unique_digest()
+        self.memo[node_id] = (node, links, digest)
+        return digest
+
+class CacheEntrySize(NamedTuple):
+    cpu: int = 0  # bytes of tensors in system memory
+    gpu: int = 0  # bytes of tensors on other devices
+    other: int = 0  # bytes reported by objects with get_ram_usage()
+
+    @property
+    def ram(self):
+        return self.cpu + self.other
+
+    @property
+    def total(self):
+        return self.cpu + self.gpu + self.other
+
+
+def entry_size(value):
+    """Measure the memory held by a cache entry.
+
+    Walks nested lists, tuples and dicts once; tensors are counted by their
+    underlying storage, so views and repeated references aren't counted twice.
+    """
+    cpu = gpu = other = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, torch.Tensor):
+            try:
+                storage = obj.untyped_storage()
+                ident, nbytes = (storage.data_ptr(), obj.device), storage.nbytes()
+            except Exception:
+                ident, nbytes = id(obj), obj.numel() * obj.element_size()
+            if ident in seen:
+                continue
+            seen.add(ident)
+            if obj.device.type == "cpu":
+                cpu += nbytes
+            else:
+                gpu += nbytes
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif hasattr(obj, "get_ram_usage"):
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                other += obj.get_ram_usage()
+    return CacheEntrySize(cpu, gpu, other)
+
 
 class BasicCache:
-    def __init__(self, key_class):
+    def __init__(self, key_class, spill=None):
         self.key_class = key_class
         self.initialized = False
         self.dynprompt: DynamicPrompt
         self.cache_key_set: CacheKeySet
         self.cache = {}
         self.subcaches = {}
+        # Optional second tier (a DiskCache) that receives evicted entries and
+        # is consulted on a miss.
+        self.spill = spill
+        # Footprint of each entry, measured once when it is stored.
+        self.sizes = {}
+        self.total_bytes = 0
 
     async def set_prompt(self, dynprompt, node_ids, is_changed_cache):
         self.dynprompt = dynprompt
@@ -176,7 +375,21 @@ class BasicCache:
             if key not in preserve_keys:
                 to_remove.append(key)
         for key in to_remove:
-            del self.cache[key]
+            self._evict(key)
+
+    def _store(self, key, value):
+        if key in self.cache:
+            self.total_bytes -= self.sizes[key].total
+        size = entry_size(value)
+        self.cache[key] = value
+        self.sizes[key] = size
+        self.total_bytes += size.total
+
+    def _evict(self, key):
+        value = self.cache.pop(key)
+        self.total_bytes -= self.sizes.pop(key).total
+        if self.spill is not None and is_stable_key(key):
+            self.spill.put(key, value)
 
     def _clean_subcaches(self):
         preserve_subcaches = set(self.cache_key_set.get_used_subcache_keys())
@@ -199,7 +412,7 @@ class BasicCache:
     def _set_immediate(self, node_id, value):
         assert self.initialized
         cache_key = self.cache_key_set.get_data_key(node_id)
-        self.cache[cache_key] = value
+        self._store(cache_key, value)
 
     def _get_immediate(self, node_id):
         if not self.initialized:
@@ -207,8 +420,12 @@ class BasicCache:
         cache_key = self.cache_key_set.get_data_key(node_id)
         if cache_key in self.cache:
             return self.cache[cache_key]
-        else:
-            return None
+        if self.spill is not None and is_stable_key(cache_key):
+            value = self.spill.get(cache_key)
+            if value is not None:
+                self._store(cache_key, value)
+            return value
+        return None
 
     async def _ensure_subcache(self, node_id, children_ids):
         subcache_key = self.cache_key_set.get_subcache_key(node_id)
@@ -236,8 +453,8 @@ class BasicCache:
         return result
 
 class HierarchicalCache(BasicCache):
-    def __init__(self, key_class):
-        super().__init__(key_class)
+    def __init__(self, key_class, spill=None):
+        super().__init__(key_class, spill)
 
     def _get_cache_for(self, node_id):
         assert self.dynprompt is not None
@@ -297,13 +514,22 @@ class NullCache:
         return self
 
 class LRUCache(BasicCache):
-    def __init__(self, key_class, max_size=100):
-        super().__init__(key_class)
+    """Keeps results from recent prompts, bounded by entry count and/or bytes.
+
+    ``max_size`` limits the number of entries (``None`` disables the limit).
+    ``max_bytes`` limits their measured footprint: entries are kept in
+    recency order, so each eviction pops the least recently used entry in
+    O(1). Entries used by the current prompt are never evicted.
+    """
+    def __init__(self, key_class, max_size=100, spill=None, max_bytes=None):
+        super().__init__(key_class, spill)
         self.max_size = max_size
+        self.max_bytes = max_bytes
         self.min_generation = 0
         self.generation = 0
         self.used_generation = {}
         self.children = {}
+        self.recency = OrderedDict()
 
     async def set_prompt(self, dynprompt, node_ids, is_changed_cache):
         await super().set_prompt(dynprompt, node_ids, is_changed_cache)
@@ -312,16 +538,34 @@ class LRUCache(BasicCache):
             self._mark_used(node_id)
 
     def clean_unused(self):
-        while len(self.cache) > self.max_size and self.min_generation < self.generation:
+        while self.max_size is not None and len(self.cache) > self.max_size and self.min_generation < self.generation:
             self.min_generation += 1
             to_remove = [key for key in self.cache if self.used_generation[key] < self.min_generation]
             for key in to_remove:
-                del self.cache[key]
-                del self.used_generation[key]
-                if key in self.children:
-                    del self.children[key]
+                self._evict(key)
+        self._enforce_max_bytes()
         self._clean_subcaches()
 
+    def _enforce_max_bytes(self):
+        if self.max_bytes is None:
+            return
+        while self.total_bytes > self.max_bytes and self.recency:
+            key = next(iter(self.recency))
+            if self.used_generation.get(key, 0) >= self.generation:
+                break
+            self._evict(key)
+
+    def _store(self, key, value):
+        super()._store(key, value)
+        self.recency[key] = None
+        self.recency.move_to_end(key)
+
+    def _evict(self, key):
+        super()._evict(key)
+        del self.recency[key]
+        self.used_generation.pop(key, None)
+        self.children.pop(key, None)
+
     def get(self, node_id):
         self._mark_used(node_id)
         return self._get_immediate(node_id)
@@ -330,10 +574,13 @@ class LRUCache(BasicCache):
         cache_key = self.cache_key_set.get_data_key(node_id)
         if cache_key is not None:
             self.used_generation[cache_key] = self.generation
+            if cache_key in self.recency:
+                self.recency.move_to_end(cache_key)
 
     def set(self, node_id, value):
         self._mark_used(node_id)
-        return self._set_immediate(node_id, value)
+        self._set_immediate(node_id, value)
+        self._enforce_max_bytes()
 
     async def ensure_subcache_for(self, node_id, children_ids):
         # Just uses subcaches for tracking 'live' nodes
@@ -366,13 +613,17 @@ RAM_CACHE_OLD_WORKFLOW_OOM_MULTIPLIER = 1.3
 
 class RAMPressureCache(LRUCache):
 
-    def __init__(self, key_class):
-        super().__init__(key_class, 0)
+    def __init__(self, key_class, spill=None):
+        super().__init__(key_class, 0, spill)
         self.timestamps = {}
 
     def clean_unused(self):
         self._clean_subcaches()
 
+    def _evict(self, key):
+        super()._evict(key)
+        self.timestamps.pop(key, None)
+
     def set(self, node_id, value):
         self.timestamps[self.cache_key_set.get_data_key(node_id)] = time.time()
         super().set(node_id, value)
@@ -393,24 +644,13 @@ class RAMPressureCache(LRUCache):
 
         clean_list = []
 
-        for key, (outputs, _), in self.cache.items():
+        for key in self.cache:
             oom_score =  RAM_CACHE_OLD_WORKFLOW_OOM_MULTIPLIER ** (self.generation - self.used_generation[key])
 
-            ram_usage = RAM_CACHE_DEFAULT_RAM_USAGE
-            def scan_list_for_ram_usage(outputs):
-                nonlocal ram_usage
-                if outputs is None:
-                    return
-                for output in outputs:
-                    if isinstance(output, list):
-                        scan_list_for_ram_usage(output)
-                    elif isinstance(output, torch.Tensor) and output.device.type == 'cpu':
-                        #score Tensors at a 50% discount for RAM usage as they are likely to
-                        #be high value intermediates
-                        ram_usage += (output.numel() * output.element_size()) * 0.5
-                    elif hasattr(output, "get_ram_usage"):
-                        ram_usage += output.get_ram_usage()
-            scan_list_for_ram_usage(outputs)
+            #score Tensors at a 50% discount for RAM usage as they are likely to
+            #be high value intermediates
+            size = self.sizes[key]
+            ram_usage = RAM_CACHE_DEFAULT_RAM_USAGE + size.cpu * 0.5 + size.other
 
             oom_score *= ram_usage
             #In the case where we have no information on the node ram usage at all,
@@ -419,5 +659,9 @@ class RAMPressureCache(LRUCache):
 
         while _ram_gb() < ram_headroom * RAM_CACHE_HYSTERESIS and clean_list:
             _, _, key = clean_list.pop()
-            del self.cache[key]
+            self._evict(key)
+            if self.spill is not None:
+                # The spill holds the value until it is written; let it go
+                # before measuring again or we evict more than needed.
+                self.spill.flush()
             gc.collect()
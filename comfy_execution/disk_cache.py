@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+from safetensors import safe_open
+from safetensors.torch import save_file
+
+DISK_CACHE_SUFFIX = ".safetensors"
+STRUCTURE_KEY = "comfy.cache_entry"
+
+
+class NotSerializable(Exception):
+    pass
+
+
+def _flatten(obj, tensors):
+    # Turns a cache entry into JSON, moving tensors into the tensors dict.
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, torch.Tensor):
+        if obj.device.type != "cpu" or obj.is_sparse or obj.requires_grad:
+            raise NotSerializable(f"tensor on {obj.device}")
+        name = f"t{len(tensors)}"
+        tensors[name] = obj.contiguous()
+        return {"__tensor__": name}
+    if isinstance(obj, list):
+        return [_flatten(value, tensors) for value in obj]
+    if type(obj) is tuple:
+        return {"__tuple__": [_flatten(value, tensors) for value in obj]}
+    if type(obj) is dict and all(isinstance(key, str) for key in obj):
+        return {"__dict__": {key: _flatten(value, tensors) for key, value in obj.items()}}
+    raise NotSerializable(type(obj).__name__)
+
+
+def _unflatten(obj, tensors):
+    if isinstance(obj, list):
+        return [_unflatten(value, tensors) for value in obj]
+    if isinstance(obj, dict):
+        if "__tensor__" in obj:
+            return tensors[obj["__tensor__"]]
+        if "__tuple__" in obj:
+            return tuple(_unflatten(value, tensors) for value in obj["__tuple__"])
+        return {key: _unflatten(value, tensors) for key, value in obj["__dict__"].items()}
+    return obj
+
+
+class DiskCache:
+    """Second-tier output cache: entries evicted from memory, kept on local disk.
+
+    Each entry is one safetensors file named after its input-signature
+    digest; tensors are stored as tensors and the rest of the entry as JSON
+    in the file's metadata. Only CPU tensors and plain Python values are
+    spilled; entries holding models or other objects are skipped. Writes run
+    on a background thread, and the directory is kept under ``max_bytes`` by
+    evicting the least recently used files (recency survives restarts
+    through file mtimes).
+    """
+
+    def __init__(self, directory, max_bytes, entry_type=tuple):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entry_type = entry_type
+        self.lock = threading.Lock()
+        self.index = OrderedDict()
+        self.total_bytes = 0
+        self.pending = {}
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-cache")
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    # Left behind by a write that was interrupted.
+                    os.remove(entry.path)
+                elif entry.name.endswith(DISK_CACHE_SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-len(DISK_CACHE_SUFFIX)], stat.st_size))
+        for _, name, size in sorted(entries):
+            self.index[name] = size
+            self.total_bytes += size
+        self._enforce_limit()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + DISK_CACHE_SUFFIX)
+
+    def __contains__(self, key):
+        name = key.hex()
+        with self.lock:
+            return name in self.pending or name in self.index
+
+    def get(self, key):
+        name = key.hex()
+        with self.lock:
+            if name in self.pending:
+                return self.pending[name]
+            if name not in self.index:
+                return None
+            self.index.move_to_end(name)
+        path = self._path(name)
+        try:
+            with safe_open(path, framework="pt", device="cpu") as f:
+                structure = json.loads(f.metadata()[STRUCTURE_KEY])
+                tensors = {tensor_name: f.get_tensor(tensor_name) for tensor_name in f.keys()}
+            os.utime(path)
+        except Exception as e:
+            logging.warning("Dropping unreadable disk cache entry {}: {}".format(name, e))
+            self._remove(name)
+            return None
+        return self.entry_type(*_unflatten(structure, tensors))
+
+    def put(self, key, value):
+        name = key.hex()
+        with self.lock:
+            if name in self.pending or name in self.index:
+                return
+            self.pending[name] = value
+        self.writer.submit(self._write, name, value)
+
+    def _write(self, name, value):
+        try:
+            tensors = {}
+            structure = json.dumps(_flatten(tuple(value), tensors))
+            size = len(structure) + sum(t.numel() * t.element_size() for t in tensors.values())
+            if size > self.max_bytes:
+                return
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            os.close(fd)
+            try:
+                try:
+                    save_file(tensors, tmp, metadata={STRUCTURE_KEY: structure})
+                except RuntimeError:
+                    # Tensors sharing storage have to be stored as copies.
+                    save_file({k: t.clone() for k, t in tensors.items()}, tmp, metadata={STRUCTURE_KEY: structure})
+                os.replace(tmp, self._path(name))
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            with self.lock:
+                size = os.path.getsize(self._path(name))
+                self.index[name] = size
+                self.total_bytes += size
+                self._enforce_limit()
+        except NotSerializable:
+            pass
+        except Exception as e:
+            logging.warning("Failed to write disk cache entry {}: {}".format(name, e))
+        finally:
+            with self.lock:
+                self.pending.pop(name, None)
+
+    def _enforce_limit(self):
+        while self.total_bytes > self.max_bytes and self.index:
+            name, size = self.index.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def _remove(self, name):
+        with self.lock:
+            size = self.index.pop(name, None)
+            if size is not None:
+                self.total_bytes -= size
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def flush(self):
+        """Wait for queued writes to finish."""
+        self.writer.submit(lambda: None).result()
+
+    def close(self):
+        self.writer.shutdown(wait=True)
@@ -191,10 +191,15 @@ class ExecutionList(TopologicalSort):
     ExecutionList implements a topological dissolve of the graph. After a node is staged for execution,
     it can still be returned to the graph after having further dependencies added.
     """
-    def __init__(self, dynprompt, output_cache):
+    def __init__(self, dynprompt, output_cache, timings=None):
         super().__init__(dynprompt)
         self.output_cache = output_cache
         self.staged_node_id = None
+        # With a NodeTimings, nodes are picked by critical path instead of UX heuristics.
+        self.timings = timings
+        self.path_lengths = {}
+        # Nodes handed out by start_node_execution (parallel execution only).
+        self.running_node_ids = set()
         self.execution_cache = {}
         self.execution_cache_listeners = {}
 
@@ -228,6 +233,8 @@ class ExecutionList(TopologicalSort):
     def add_strong_link(self, from_node_id, from_socket, to_node_id):
         super().add_strong_link(from_node_id, from_socket, to_node_id)
         self.cache_link(from_node_id, to_node_id)
+        # New dependencies can lengthen the path behind any upstream node.
+        self.path_lengths.clear()
 
     async def stage_node_execution(self):
         assert self.staged_node_id is None
@@ -259,9 +266,55 @@ class ExecutionList(TopologicalSort):
             }
             return None, error_details, ex
 
-        self.staged_node_id = self.ux_friendly_pick_node(available)
+        self.staged_node_id = self.pick_node(available)
         return self.staged_node_id, None, None
 
+    def pick_node(self, node_list):
+        if self.timings is not None:
+            return max(node_list, key=self.critical_path_priority)
+        return self.ux_friendly_pick_node(node_list)
+
+    def is_async_node(self, node_id):
+        class_type = self.dynprompt.get_node(node_id)["class_type"]
+        class_def = nodes.NODE_CLASS_MAPPINGS[class_type]
+        return inspect.iscoroutinefunction(getattr(class_def, class_def.FUNCTION))
+
+    def critical_path_priority(self, node_id):
+        # Async nodes go first: starting them costs almost nothing, and their
+        # latency then overlaps with everything else. Next come nodes that are
+        # the last thing an async node is waiting for, when that async node
+        # takes longer than they do. Among the rest, the node with the most
+        # estimated work still waiting on it goes first.
+        if self.is_async_node(node_id):
+            return (True, True, self.remaining_path_length(node_id))
+        own = self.timings.estimate(self.dynprompt.get_node(node_id)["class_type"])
+        unlocks_async = any(
+            self.blockCount[blocked] == 1 and self.is_async_node(blocked)
+            and self.timings.estimate(self.dynprompt.get_node(blocked)["class_type"]) > own
+            for blocked in self.blocking[node_id]
+        )
+        return (False, unlocks_async, self.remaining_path_length(node_id))
+
+    def remaining_path_length(self, node_id):
+        """Estimated seconds from starting node_id until every node it blocks has run."""
+        lengths = self.path_lengths
+        stack = [node_id]
+        visiting = set()
+        while len(stack) > 0:
+            current = stack[-1]
+            if current in lengths:
+                stack.pop()
+            elif current not in visiting:
+                visiting.add(current)
+                stack.extend(n for n in self.blocking[current] if n not in lengths and n not in visiting)
+            else:
+                # Dependents are done (a node still missing is part of a cycle and counts as 0).
+                stack.pop()
+                class_type = self.dynprompt.get_node(current)["class_type"]
+                longest = max((lengths.get(n, 0.0) for n in self.blocking[current]), default=0.0)
+                lengths[current] = self.timings.estimate(class_type) + longest
+        return lengths[node_id]
+
     def ux_friendly_pick_node(self, node_list):
         # If an output node is available, do that first.
         # Technically this has no effect on the overall length of execution, but it feels better as a user
@@ -276,13 +329,8 @@ class ExecutionList(TopologicalSort):
 
         # If an available node is async, do that first.
         # This will execute the asynchronous function earlier, reducing the overall time.
-        def is_async(node_id):
-            class_type = self.dynprompt.get_node(node_id)["class_type"]
-            class_def = nodes.NODE_CLASS_MAPPINGS[class_type]
-            return inspect.iscoroutinefunction(getattr(class_def, class_def.FUNCTION))
-
         for node_id in node_list:
-            if is_output(node_id) or is_async(node_id):
+            if is_output(node_id) or self.is_async_node(node_id):
                 return node_id
 
         #This should handle the VAEDecode -> preview case
@@ -307,10 +355,44 @@ class ExecutionList(TopologicalSort):
 
     def complete_node_execution(self):
         node_id = self.staged_node_id
+        self._complete_node(node_id)
+        self.staged_node_id = None
+
+    def _complete_node(self, node_id):
         self.pop_node(node_id)
         self.execution_cache.pop(node_id, None)
         self.execution_cache_listeners.pop(node_id, None)
-        self.staged_node_id = None
+
+    # Parallel execution: any number of nodes may be running at once. Ready
+    # nodes exclude running ones, and a node that comes back PENDING simply
+    # returns to the graph with whatever new dependencies it added.
+
+    def get_ready_nodes(self):
+        ready = super().get_ready_nodes()
+        if self.running_node_ids:
+            ready = [node_id for node_id in ready if node_id not in self.running_node_ids]
+        return ready
+
+    def start_node_execution(self, node_id):
+        assert node_id not in self.running_node_ids
+        self.running_node_ids.add(node_id)
+
+    def finish_node_execution(self, node_id, completed):
+        self.running_node_ids.remove(node_id)
+        if completed:
+            self._complete_node(node_id)
+
+    def pick_ready_nodes(self):
+        """Return every ready node, in the order stage_node_execution would pick them."""
+        available = self.get_ready_nodes()
+        if self.timings is not None:
+            return sorted(available, key=self.critical_path_priority, reverse=True)
+        ordered = []
+        while available:
+            node_id = self.ux_friendly_pick_node(available)
+            available.remove(node_id)
+            ordered.append(node_id)
+        return ordered
 
     def get_nodes_in_cycle(self):
         # We'll dissolve the graph in reverse topological order to leave only the nodes in the cycle.
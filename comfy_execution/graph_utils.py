@@ -1,3 +1,5 @@
+import threading
+
 def is_link(obj):
     if not isinstance(obj, list):
         return False
@@ -9,6 +11,8 @@ def is_link(obj):
         return False
     return True
 
+_thread_prefix = threading.local()
+
 # The GraphBuilder is just a utility class that outputs graphs in the form expected by the ComfyUI back-end
 class GraphBuilder:
     _default_prefix_root = ""
@@ -28,17 +32,25 @@ class GraphBuilder:
         cls._default_prefix_root = prefix_root
         cls._default_prefix_call_index = call_index
         cls._default_prefix_graph_index = graph_index
+        # With parallel execution several nodes run at once on different
+        # threads, so each thread also remembers the prefix of its own node.
+        _thread_prefix.value = [prefix_root, call_index, graph_index]
 
     @classmethod
     def alloc_prefix(cls, root=None, call_index=None, graph_index=None):
+        state = getattr(_thread_prefix, "value", None)
+        if state is None:
+            state = [GraphBuilder._default_prefix_root, GraphBuilder._default_prefix_call_index, GraphBuilder._default_prefix_graph_index]
         if root is None:
-            root = GraphBuilder._default_prefix_root
+            root = state[0]
         if call_index is None:
-            call_index = GraphBuilder._default_prefix_call_index
+            call_index = state[1]
         if graph_index is None:
-            graph_index = GraphBuilder._default_prefix_graph_index
+            graph_index = state[2]
         result = f"{root}.{call_index}.{graph_index}."
         GraphBuilder._default_prefix_graph_index += 1
+        if getattr(_thread_prefix, "value", None) is not None:
+            _thread_prefix.value[2] += 1
         return result
 
     def node(self, class_type, id=None, **kwargs):
@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+
+# Weight of the newest sample in the running average.
+SMOOTHING = 0.3
+
+
+class NodeTimings:
+    """Running average of how long each node class takes to execute.
+
+    Durations are wall-clock seconds from the start of a node's FUNCTION call
+    until its outputs are available, so for async nodes they include the time
+    spent waiting on remote work. With a ``path`` the averages are loaded from
+    and saved to a small JSON file, so estimates carry across restarts.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.durations = {}
+        self.dirty = False
+        if path is not None:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring unreadable node timings file {}: {}".format(self.path, e))
+            return
+        with self.lock:
+            self.durations = {class_type: float(seconds) for class_type, seconds in data.items() if isinstance(seconds, (int, float))}
+
+    def save(self):
+        with self.lock:
+            if self.path is None or not self.dirty:
+                return
+            data = json.dumps(self.durations, indent=1, sort_keys=True)
+            self.dirty = False
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+        except OSError as e:
+            logging.warning("Failed to save node timings to {}: {}".format(self.path, e))
+
+    def record(self, class_type, seconds):
+        with self.lock:
+            previous = self.durations.get(class_type)
+            if previous is None:
+                self.durations[class_type] = seconds
+            else:
+                self.durations[class_type] = previous + SMOOTHING * (seconds - previous)
+            self.dirty = True
+
+    def estimate(self, class_type):
+        """Expected duration of a node class; unseen classes get the average of the known ones."""
+        with self.lock:
+            seconds = self.durations.get(class_type)
+            if seconds is None and len(self.durations) > 0:
+                seconds = sum(self.durations.values()) / len(self.durations)
+        return seconds or 0.0
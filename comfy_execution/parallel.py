@@ -0,0 +1,108 @@
+"""
+Lanes used by PromptExecutor when --parallel-execution is enabled.
+
+Graph bookkeeping always stays on the event loop thread; only the node's
+FUNCTION call is moved:
+
+* "async" nodes (coroutine FUNCTIONs) keep running as tasks on the loop.
+* "gpu" nodes, anything that takes or returns a model (MODEL, CLIP, VAE,
+  ..._MODEL, ...), run one at a time on a dedicated thread per torch device,
+  because model loading and sampling share global memory-management state.
+* "cpu" nodes run on a shared thread pool.
+* "main" nodes run inline on the loop thread, exactly as without parallel
+  execution.
+
+A node class can pick its lane explicitly with an EXECUTION_LANE attribute.
+"""
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+import comfy.model_management
+
+LANES = ("async", "gpu", "cpu", "main")
+
+MODEL_TYPES = frozenset({
+    "MODEL", "CLIP", "VAE", "CONTROL_NET", "CLIP_VISION", "STYLE_MODEL", "GLIGEN", "UPSCALE_MODEL", "PHOTOMAKER", "HOOKS",
+})
+
+
+def _is_model_type(type_name):
+    return isinstance(type_name, str) and (type_name in MODEL_TYPES or type_name.endswith("_MODEL"))
+
+
+def _socket_types(class_def):
+    try:
+        input_types = class_def.INPUT_TYPES()
+    except Exception:
+        return None
+    types = []
+    for category in ("required", "optional"):
+        for spec in input_types.get(category, {}).values():
+            if isinstance(spec, (list, tuple)) and len(spec) > 0:
+                types.append(spec[0])
+    types.extend(getattr(class_def, "RETURN_TYPES", None) or ())
+    return types
+
+
+def _run_in_inference_mode(call):
+    # inference_mode is thread local, so it has to be entered on the worker.
+    with torch.inference_mode():
+        return call()
+
+
+class NodeLanes:
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.cpu_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="comfy-node")
+        self.device_pools = {}
+        self.class_lanes = {}
+
+    def lane_for(self, class_def, function_name):
+        lane = self.class_lanes.get(class_def)
+        if lane is not None:
+            return lane
+        lane = getattr(class_def, "EXECUTION_LANE", None)
+        if lane not in LANES:
+            if lane is not None:
+                logging.warning("Ignoring unknown EXECUTION_LANE {} on {}".format(lane, class_def.__name__))
+            function = getattr(class_def, function_name, None)
+            types = _socket_types(class_def)
+            if asyncio.iscoroutinefunction(function):
+                lane = "async"
+            elif types is None or any(_is_model_type(t) for t in types):
+                lane = "gpu"
+            else:
+                lane = "cpu"
+        self.class_lanes[class_def] = lane
+        return lane
+
+    def _pool_for(self, lane):
+        if lane == "cpu":
+            return self.cpu_pool
+        device = str(comfy.model_management.get_torch_device())
+        pool = self.device_pools.get(device)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"comfy-{device}")
+            self.device_pools[device] = pool
+        return pool
+
+    def runner(self, lane):
+        """Return the run_sync callable for a lane, or None to call the node inline."""
+        if lane not in ("cpu", "gpu"):
+            return None
+        pool = self._pool_for(lane)
+
+        async def run_sync(call):
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(pool, context.run, _run_in_inference_mode, call)
+        return run_sync
+
+    def shutdown(self):
+        self.cpu_pool.shutdown(wait=True)
+        for pool in self.device_pools.values():
+            pool.shutdown(wait=True)
+        self.device_pools = {}
@@ -33,6 +33,7 @@ from comfy_execution.graph_utils import GraphBuilder, is_link
 from comfy_execution.validation import validate_node_input
 from comfy_execution.progress import get_progress_state, reset_progress_state, add_progress_handler, WebUIProgressHandler
 from comfy_execution.utils import CurrentNodeContext
+from comfy_execution.parallel import NodeLanes
 from comfy_api.internal import _ComfyNodeInternal, _NodeOutputInternal, first_real_override, is_class, make_locked_method_func
 from comfy_api.latest import io
 
@@ -102,7 +103,15 @@ class CacheType(Enum):
 
 
 class CacheSet:
-    def __init__(self, cache_type=None, cache_args={}):
+    def __init__(self, cache_type=None, cache_args=None):
+        cache_args = cache_args or {}
+        self.spill = None
+        if cache_args.get("disk") and cache_type != CacheType.NONE:
+            from comfy_execution.disk_cache import DiskCache
+            disk_bytes = int(cache_args.get("disk_gb", 10.0) * (1024 ** 3))
+            self.spill = DiskCache(cache_args["disk"], disk_bytes, entry_type=CacheEntry)
+            logging.info("Spilling evicted node outputs to {}".format(cache_args["disk"]))
+
         if cache_type == CacheType.NONE:
             self.init_null_cache()
             logging.info("Disabling intermediate node cache.")
@@ -112,7 +121,8 @@ class CacheSet:
             logging.info("Using RAM pressure cache.")
         elif cache_type == CacheType.LRU:
             cache_size = cache_args.get("lru", 0)
-            self.init_lru_cache(cache_size)
+            cache_bytes = cache_args.get("lru_bytes", 0)
+            self.init_lru_cache(cache_size, cache_bytes)
             logging.info("Using LRU cache")
         else:
             self.init_classic_cache()
@@ -121,15 +131,17 @@ class CacheSet:
 
     # Performs like the old cache -- dump data ASAP
     def init_classic_cache(self):
-        self.outputs = HierarchicalCache(CacheKeySetInputSignature)
+        self.outputs = HierarchicalCache(CacheKeySetInputSignature, spill=self.spill)
         self.objects = HierarchicalCache(CacheKeySetID)
 
-    def init_lru_cache(self, cache_size):
-        self.outputs = LRUCache(CacheKeySetInputSignature, max_size=cache_size)
+    def init_lru_cache(self, cache_size, cache_bytes=0):
+        # With only a byte budget, the entry count is unbounded.
+        max_size = cache_size if cache_size > 0 or not cache_bytes else None
+        self.outputs = LRUCache(CacheKeySetInputSignature, max_size=max_size, spill=self.spill, max_bytes=cache_bytes or None)
         self.objects = HierarchicalCache(CacheKeySetID)
 
     def init_ram_cache(self, min_headroom):
-        self.outputs = RAMPressureCache(CacheKeySetInputSignature)
+        self.outputs = RAMPressureCache(CacheKeySetInputSignature, spill=self.spill)
         self.objects = HierarchicalCache(CacheKeySetID)
 
     def init_null_cache(self):
@@ -223,7 +235,7 @@ async def resolve_map_node_over_list_results(results):
                 raise exc
         return [x.result() if isinstance(x, asyncio.Task) else x for x in results]
 
-async def _async_map_node_over_list(prompt_id, unique_id, obj, input_data_all, func, allow_interrupt=False, execution_block_cb=None, pre_execute_cb=None, hidden_inputs=None):
+async def _async_map_node_over_list(prompt_id, unique_id, obj, input_data_all, func, allow_interrupt=False, execution_block_cb=None, pre_execute_cb=None, hidden_inputs=None, run_sync=None):
     # check if node wants the lists
     input_is_list = getattr(obj, "INPUT_IS_LIST", False)
 
@@ -251,7 +263,10 @@ async def _async_map_node_over_list(prompt_id, unique_id, obj, input_data_all, f
                 execution_block = execution_block_cb(v) if execution_block_cb else v
                 break
         if execution_block is None:
-            if pre_execute_cb is not None and index is not None:
+            # With run_sync, synchronous functions run on a worker thread and
+            # the callback has to run there too (it sets a thread-local prefix).
+            defer_pre_execute = run_sync is not None
+            if pre_execute_cb is not None and index is not None and not defer_pre_execute:
                 pre_execute_cb(index)
             # V3
             if isinstance(obj, _ComfyNodeInternal) or (is_class(obj) and issubclass(obj, _ComfyNodeInternal)):
@@ -269,6 +284,8 @@ async def _async_map_node_over_list(prompt_id, unique_id, obj, input_data_all, f
             # V1
             else:
                 f = getattr(obj, func)
+            if defer_pre_execute and inspect.iscoroutinefunction(f) and pre_execute_cb is not None and index is not None:
+                pre_execute_cb(index)
             if inspect.iscoroutinefunction(f):
                 async def async_wrapper(f, prompt_id, unique_id, list_index, args):
                     with CurrentNodeContext(prompt_id, unique_id, list_index):
@@ -281,6 +298,13 @@ async def _async_map_node_over_list(prompt_id, unique_id, obj, input_data_all, f
                     results.append(result)
                 else:
                     results.append(task)
+            elif run_sync is not None:
+                def call(f=f, inputs=inputs, index=index):
+                    if pre_execute_cb is not None and index is not None:
+                        pre_execute_cb(index)
+                    with CurrentNodeContext(prompt_id, unique_id, index):
+                        return f(**inputs)
+                results.append(await run_sync(call))
             else:
                 with CurrentNodeContext(prompt_id, unique_id, index):
                     result = f(**inputs)
@@ -320,8 +344,8 @@ def merge_result_data(results, obj):
             output.append([o[i] for o in results])
     return output
 
-async def get_output_data(prompt_id, unique_id, obj, input_data_all, execution_block_cb=None, pre_execute_cb=None, hidden_inputs=None):
-    return_values = await _async_map_node_over_list(prompt_id, unique_id, obj, input_data_all, obj.FUNCTION, allow_interrupt=True, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb, hidden_inputs=hidden_inputs)
+async def get_output_data(prompt_id, unique_id, obj, input_data_all, execution_block_cb=None, pre_execute_cb=None, hidden_inputs=None, run_sync=None):
+    return_values = await _async_map_node_over_list(prompt_id, unique_id, obj, input_data_all, obj.FUNCTION, allow_interrupt=True, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb, hidden_inputs=hidden_inputs, run_sync=run_sync)
     has_pending_task = any(isinstance(r, asyncio.Task) and not r.done() for r in return_values)
     if has_pending_task:
         return return_values, {}, False, has_pending_task
@@ -401,7 +425,7 @@ def format_value(x):
     else:
         return str(x)
 
-async def execute(server, dynprompt, caches, current_item, extra_data, executed, prompt_id, execution_list, pending_subgraph_results, pending_async_nodes, ui_outputs):
+async def execute(server, dynprompt, caches, current_item, extra_data, executed, prompt_id, execution_list, pending_subgraph_results, pending_async_nodes, ui_outputs, lanes=None):
     unique_id = current_item
     real_node_id = dynprompt.get_real_node_id(unique_id)
     display_node_id = dynprompt.get_display_node_id(unique_id)
@@ -462,6 +486,7 @@ async def execute(server, dynprompt, caches, current_item, extra_data, executed,
             get_progress_state().start_progress(unique_id)
             input_data_all, missing_keys, hidden_inputs = get_input_data(inputs, class_def, unique_id, execution_list, dynprompt, extra_data)
             if server.client_id is not None:
+                # With parallel execution this is just the most recently started node.
                 server.last_node_id = display_node_id
                 server.send_sync("executing", { "node": unique_id, "display_node": display_node_id, "prompt_id": prompt_id }, server.client_id)
 
@@ -507,13 +532,33 @@ async def execute(server, dynprompt, caches, current_item, extra_data, executed,
             def pre_execute_cb(call_index):
                 # TODO - How to handle this with async functions without contextvars (which requires Python 3.12)?
                 GraphBuilder.set_default_prefix(unique_id, call_index, 0)
-            output_data, output_ui, has_subgraph, has_pending_tasks = await get_output_data(prompt_id, unique_id, obj, input_data_all, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb, hidden_inputs=hidden_inputs)
+            run_sync = lanes.runner(lanes.lane_for(class_def, class_def.FUNCTION)) if lanes is not None else None
+            timings = execution_list.timings
+            lane_seconds = []
+            if run_sync is not None and timings is not None:
+                # Time the calls on the lane thread itself, so waiting behind
+                # other nodes on the same device doesn't count as run time.
+                lane_run = run_sync
+                async def run_sync(call):
+                    def timed_call():
+                        call_start = time.perf_counter()
+                        try:
+                            return call()
+                        finally:
+                            lane_seconds.append(time.perf_counter() - call_start)
+                    return await lane_run(timed_call)
+            start_time = time.perf_counter()
+            output_data, output_ui, has_subgraph, has_pending_tasks = await get_output_data(prompt_id, unique_id, obj, input_data_all, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb, hidden_inputs=hidden_inputs, run_sync=run_sync)
+            if timings is not None and not has_pending_tasks:
+                timings.record(class_type, sum(lane_seconds) if lane_seconds else time.perf_counter() - start_time)
             if has_pending_tasks:
                 pending_async_nodes[unique_id] = output_data
                 unblock = execution_list.add_external_block(unique_id)
                 async def await_completion():
                     tasks = [x for x in output_data if isinstance(x, asyncio.Task)]
                     await asyncio.gather(*tasks, return_exceptions=True)
+                    if timings is not None:
+                        timings.record(class_type, time.perf_counter() - start_time)
                     unblock()
                 asyncio.create_task(await_completion())
                 return (ExecutionResult.PENDING, None, None)
@@ -612,13 +657,21 @@ async def execute(server, dynprompt, caches, current_item, extra_data, executed,
     return (ExecutionResult.SUCCESS, None, None)
 
 class PromptExecutor:
-    def __init__(self, server, cache_type=False, cache_args=None):
+    def __init__(self, server, cache_type=False, cache_args=None, parallel_workers=0, node_timings=None):
         self.cache_args = cache_args
         self.cache_type = cache_type
         self.server = server
+        # Opt-in: run independent branches concurrently (see comfy_execution.parallel).
+        self.lanes = NodeLanes(parallel_workers) if parallel_workers > 0 else None
+        # Opt-in: a NodeTimings switches node ordering to critical path and records node durations.
+        self.node_timings = node_timings
         self.reset()
 
     def reset(self):
+        previous = getattr(self, "caches", None)
+        if previous is not None and previous.spill is not None:
+            # Let queued spills land before the new tier indexes the directory.
+            previous.spill.close()
         self.caches = CacheSet(cache_type=self.cache_type, cache_args=self.cache_args)
         self.status_messages = []
         self.success = True
@@ -632,6 +685,60 @@ class PromptExecutor:
         if self.server.client_id is not None or broadcast:
             self.server.send_sync(event, data, self.server.client_id)
 
+    async def _execute_parallel(self, prompt_id, dynamic_prompt, extra_data, executed, execution_list, current_outputs, pending_subgraph_results, pending_async_nodes, ui_node_outputs):
+        """Run every ready node at once, each in its lane; returns False if execution failed.
+
+        Scheduling and all graph/cache bookkeeping stay on this event loop;
+        only node functions move to worker threads. After the first failure
+        no new nodes are started, and running ones are allowed to finish.
+
+        Several nodes are "executing" at once: each sends its own "executing"
+        message, and server.last_node_id only names the latest one to start.
+        Progress updates are still attributed correctly, since they take the
+        node id from the per-task CurrentNodeContext.
+        """
+        running = {}
+        failure = None
+        while True:
+            if failure is None:
+                for node_id in execution_list.pick_ready_nodes():
+                    execution_list.start_node_execution(node_id)
+                    task = asyncio.create_task(execute(self.server, dynamic_prompt, self.caches, node_id, extra_data, executed, prompt_id, execution_list, pending_subgraph_results, pending_async_nodes, ui_node_outputs, lanes=self.lanes))
+                    running[task] = node_id
+            if len(running) == 0:
+                if failure is not None or execution_list.is_empty():
+                    break
+                # Nothing can start: wait for an external block (pending async
+                # node) to clear, or report the dependency cycle.
+                node_id, error, ex = await execution_list.stage_node_execution()
+                if error is not None:
+                    failure = (error, ex)
+                    break
+                execution_list.unstage_node_execution()
+                continue
+
+            unblocked = asyncio.create_task(execution_list.unblockedEvent.wait())
+            done, _ = await asyncio.wait([*running, unblocked], return_when=asyncio.FIRST_COMPLETED)
+            if unblocked in done:
+                execution_list.unblockedEvent.clear()
+            else:
+                unblocked.cancel()
+            for task in done:
+                if task is unblocked:
+                    continue
+                node_id = running.pop(task)
+                result, error, ex = task.result()
+                execution_list.finish_node_execution(node_id, result == ExecutionResult.SUCCESS)
+                if result == ExecutionResult.FAILURE and failure is None:
+                    failure = (error, ex)
+            self.caches.outputs.poll(ram_headroom=self.cache_args["ram"])
+
+        if failure is not None:
+            self.success = False
+            self.handle_execution_error(prompt_id, dynamic_prompt.original_prompt, current_outputs, executed, *failure)
+            return False
+        return True
+
     def handle_execution_error(self, prompt_id, prompt, current_outputs, executed, error, ex):
         node_id = error["node_id"]
         class_type = prompt[node_id]["class_type"]
@@ -696,31 +803,35 @@ class PromptExecutor:
             pending_async_nodes = {} # TODO - Unify this with pending_subgraph_results
             ui_node_outputs = {}
             executed = set()
-            execution_list = ExecutionList(dynamic_prompt, self.caches.outputs)
+            execution_list = ExecutionList(dynamic_prompt, self.caches.outputs, timings=self.node_timings)
             current_outputs = self.caches.outputs.all_node_ids()
             for node_id in list(execute_outputs):
                 execution_list.add_node(node_id)
 
-            while not execution_list.is_empty():
-                node_id, error, ex = await execution_list.stage_node_execution()
-                if error is not None:
-                    self.handle_execution_error(prompt_id, dynamic_prompt.original_prompt, current_outputs, executed, error, ex)
-                    break
-
-                assert node_id is not None, "Node ID should not be None at this point"
-                result, error, ex = await execute(self.server, dynamic_prompt, self.caches, node_id, extra_data, executed, prompt_id, execution_list, pending_subgraph_results, pending_async_nodes, ui_node_outputs)
-                self.success = result != ExecutionResult.FAILURE
-                if result == ExecutionResult.FAILURE:
-                    self.handle_execution_error(prompt_id, dynamic_prompt.original_prompt, current_outputs, executed, error, ex)
-                    break
-                elif result == ExecutionResult.PENDING:
-                    execution_list.unstage_node_execution()
-                else: # result == ExecutionResult.SUCCESS:
-                    execution_list.complete_node_execution()
-                self.caches.outputs.poll(ram_headroom=self.cache_args["ram"])
+            if self.lanes is not None:
+                if await self._execute_parallel(prompt_id, dynamic_prompt, extra_data, executed, execution_list, current_outputs, pending_subgraph_results, pending_async_nodes, ui_node_outputs):
+                    self.add_message("execution_success", { "prompt_id": prompt_id }, broadcast=False)
             else:
-                # Only execute when the while-loop ends without break
-                self.add_message("execution_success", { "prompt_id": prompt_id }, broadcast=False)
+                while not execution_list.is_empty():
+                    node_id, error, ex = await execution_list.stage_node_execution()
+                    if error is not None:
+                        self.handle_execution_error(prompt_id, dynamic_prompt.original_prompt, current_outputs, executed, error, ex)
+                        break
+
+                    assert node_id is not None, "Node ID should not be None at this point"
+                    result, error, ex = await execute(self.server, dynamic_prompt, self.caches, node_id, extra_data, executed, prompt_id, execution_list, pending_subgraph_results, pending_async_nodes, ui_node_outputs)
+                    self.success = result != ExecutionResult.FAILURE
+                    if result == ExecutionResult.FAILURE:
+                        self.handle_execution_error(prompt_id, dynamic_prompt.original_prompt, current_outputs, executed, error, ex)
+                        break
+                    elif result == ExecutionResult.PENDING:
+                        execution_list.unstage_node_execution()
+                    else: # result == ExecutionResult.SUCCESS:
+                        execution_list.complete_node_execution()
+                    self.caches.outputs.poll(ram_headroom=self.cache_args["ram"])
+                else:
+                    # Only execute when the while-loop ends without break
+                    self.add_message("execution_success", { "prompt_id": prompt_id }, broadcast=False)
 
             ui_outputs = {}
             meta_outputs = {}
@@ -732,6 +843,8 @@ class PromptExecutor:
                 "meta": meta_outputs,
             }
             self.server.last_node_id = None
+            if self.node_timings is not None:
+                self.node_timings.save()
             if comfy.model_management.DISABLE_SMART_MEMORY:
                 comfy.model_management.unload_all_models()
 
@@ -13,6 +13,7 @@ import logging
 import sys
 from comfy_execution.progress import get_progress_state
 from comfy_execution.utils import get_executing_context
+from comfy_execution.node_timings import NodeTimings
 from comfy_api import feature_flags
 
 if __name__ == "__main__":
@@ -170,14 +171,18 @@ def cuda_malloc_warning():
 def prompt_worker(q, server_instance):
     current_time: float = 0.0
     cache_type = execution.CacheType.CLASSIC
-    if args.cache_lru > 0:
+    if args.cache_lru > 0 or args.cache_lru_bytes > 0:
         cache_type = execution.CacheType.LRU
     elif args.cache_ram > 0:
         cache_type = execution.CacheType.RAM_PRESSURE
     elif args.cache_none:
         cache_type = execution.CacheType.NONE
 
-    e = execution.PromptExecutor(server_instance, cache_type=cache_type, cache_args={ "lru" : args.cache_lru, "ram" : args.cache_ram } )
+    node_timings = None
+    if args.execution_order == "critical-path":
+        node_timings = NodeTimings(os.path.join(folder_paths.get_user_directory(), "node_timings.json"))
+
+    e = execution.PromptExecutor(server_instance, cache_type=cache_type, cache_args={ "lru" : args.cache_lru, "lru_bytes" : args.cache_lru_bytes, "ram" : args.cache_ram, "disk" : args.cache_disk, "disk_gb" : args.cache_disk_size }, parallel_workers=args.parallel_execution, node_timings=node_timings)
     last_gc_collect = 0
     need_gc = False
     gc_collect_interval = 10.0
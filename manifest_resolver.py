@@ -4,9 +4,17 @@ This is a lightweight, testable implementation using requests. In production, ex
 import requests
 from urllib.parse import urljoin
 
-def preview_url(url, headers=None, timeout=15):
-    """Perform a HEAD request (fallback to GET) following redirects and return dict with final_url, headers, content_length."""
+def preview_url(url, headers=None, timeout=15, cache=None):
+    """Perform a HEAD request (fallback to GET) following redirects and return dict with final_url, headers, content_length.
+
+    Pass a ``src.download.resolve.ResolutionCache`` as ``cache`` to reuse and conditionally revalidate earlier results.
+    """
     headers = headers or {}
+    if cache is not None:
+        res = cache.resolve(url, headers)
+        if 'final_url' not in res:
+            return {'error': res.get('error')}
+        return {'final_url': res['final_url'], 'headers': res['headers'], 'status_code': res['status_code'], 'cache': res['cache']}
     try:
         r = requests.head(url, allow_redirects=True, headers=headers, timeout=timeout)
         if r.status_code >= 400 or 'content-length' not in r.headers:
@@ -0,0 +1,63 @@
+"""Compatibility wrappers for the queue API.
+
+Kept out of a top-level ``queue`` module so the standard library ``queue``
+(used by ``concurrent.futures`` and ``logging.handlers``) is never shadowed.
+"""
+
+from src.queue.api import (
+    DEFAULT_LANE,
+    QueueStore,
+    LeaseHeartbeat,
+    get_store,
+    default_worker_id,
+    heartbeat,
+    iter_items,
+    wait_for_item,
+    reclaim_expired,
+    dequeue,
+    dequeue_batch,
+    enqueue,
+    enqueue_many,
+    init_db,
+    is_paused,
+    list_items,
+    mark_done,
+    mark_failed,
+    mark_many,
+    purge_completed,
+    apply_retention,
+    compact,
+    queue_counts,
+    retry_item,
+    set_paused,
+    set_lane_weight,
+)
+
+__all__ = [
+    "DEFAULT_LANE",
+    "QueueStore",
+    "LeaseHeartbeat",
+    "get_store",
+    "default_worker_id",
+    "heartbeat",
+    "iter_items",
+    "wait_for_item",
+    "reclaim_expired",
+    "enqueue",
+    "enqueue_many",
+    "dequeue",
+    "dequeue_batch",
+    "init_db",
+    "list_items",
+    "mark_done",
+    "mark_failed",
+    "mark_many",
+    "retry_item",
+    "purge_completed",
+    "apply_retention",
+    "compact",
+    "queue_counts",
+    "set_paused",
+    "set_lane_weight",
+    "is_paused",
+]
@@ -26,7 +26,7 @@ CORE_PATHS: Tuple[str, ...] = (
     "composer.py",
     "downloader.py",
     "manifest_resolver.py",
-    "queue.py",
+    "queue_api.py",
     "templates.py",
     "security.py",
     "__init__.py",
@@ -0,0 +1,165 @@
+"""
+Reproducible comparison of node ordering modes.
+
+Runs the real ExecutionList scheduling logic against a fixed benchmark graph
+whose nodes "execute" for known simulated durations, so ux and critical-path
+ordering can be compared without models or a GPU:
+
+    python scripts/schedule_benchmark.py
+    python scripts/schedule_benchmark.py --parallel 4 --estimate-error 0.3
+
+Synchronous nodes hold their lane for their duration (one "main" lane as in
+the default executor, or a per-device "gpu" lane plus a "cpu" pool with
+--parallel), async nodes overlap with everything else.
+"""
+import argparse
+import heapq
+import random
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import nodes
+from comfy_execution.caching import NullCache
+from comfy_execution.graph import DynamicPrompt, ExecutionList
+from comfy_execution.node_timings import NodeTimings
+
+# class_type: (seconds, lane, is_output)
+BENCHMARK_NODES = {
+    "BenchCheckpointLoader": (2.0, "gpu", False),
+    "BenchTextEncode": (0.3, "gpu", False),
+    "BenchEmptyLatent": (0.05, "cpu", False),
+    "BenchSampler": (6.0, "gpu", False),
+    "BenchVAEDecode": (0.8, "gpu", False),
+    "BenchSaveImage": (0.2, "cpu", True),
+    "BenchLoadText": (0.05, "cpu", False),
+    "BenchCaptionImage": (1.5, "gpu", False),
+    "BenchPromptRewriteAPI": (4.0, "async", False),
+    "BenchImageGenAPI": (9.0, "async", False),
+}
+
+
+def benchmark_prompt():
+    """A local txt2img pass, a second pass on an API-rewritten prompt, and a remote image API call."""
+    def node(class_type, **inputs):
+        return {"class_type": class_type, "inputs": inputs}
+
+    return {
+        "ckpt": node("BenchCheckpointLoader"),
+        "pos": node("BenchTextEncode", clip=["ckpt", 0]),
+        "neg": node("BenchTextEncode", clip=["ckpt", 0]),
+        "latent": node("BenchEmptyLatent"),
+        "sample": node("BenchSampler", model=["ckpt", 0], positive=["pos", 0], negative=["neg", 0], latent=["latent", 0]),
+        "decode": node("BenchVAEDecode", samples=["sample", 0], vae=["ckpt", 0]),
+        "save": node("BenchSaveImage", images=["decode", 0]),
+        "text": node("BenchLoadText"),
+        "rewrite": node("BenchPromptRewriteAPI", text=["text", 0]),
+        "pos2": node("BenchTextEncode", clip=["ckpt", 0], text=["rewrite", 0]),
+        "sample2": node("BenchSampler", model=["ckpt", 0], positive=["pos2", 0], negative=["neg", 0], latent=["latent", 0]),
+        "decode2": node("BenchVAEDecode", samples=["sample2", 0], vae=["ckpt", 0]),
+        "save2": node("BenchSaveImage", images=["decode2", 0]),
+        "caption": node("BenchCaptionImage", image=["decode", 0]),
+        "remote": node("BenchImageGenAPI", text=["caption", 0]),
+        "save3": node("BenchSaveImage", images=["remote", 0]),
+    }
+
+
+def _make_class(class_type, lane, is_output):
+    def INPUT_TYPES(cls):
+        return {"required": {}}
+
+    def run(self, **kwargs):
+        return (None,)
+
+    async def run_async(self, **kwargs):
+        return (None,)
+
+    return type(class_type, (), {
+        "INPUT_TYPES": classmethod(INPUT_TYPES),
+        "RETURN_TYPES": ("*",),
+        "FUNCTION": "run",
+        "OUTPUT_NODE": is_output,
+        "run": run_async if lane == "async" else run,
+    })
+
+
+@contextmanager
+def benchmark_nodes():
+    """Temporarily register the Bench* node classes."""
+    added = [class_type for class_type in BENCHMARK_NODES if class_type not in nodes.NODE_CLASS_MAPPINGS]
+    for class_type in added:
+        _, lane, is_output = BENCHMARK_NODES[class_type]
+        nodes.NODE_CLASS_MAPPINGS[class_type] = _make_class(class_type, lane, is_output)
+    try:
+        yield
+    finally:
+        for class_type in added:
+            del nodes.NODE_CLASS_MAPPINGS[class_type]
+
+
+def simulate(prompt, order="ux", parallel_workers=0, estimates=None):
+    """Return (makespan, start order) of running prompt with the given ordering mode.
+
+    estimates maps class_type to the duration the scheduler believes in
+    (defaults to the true durations); only used for critical-path.
+    """
+    timings = None
+    if order == "critical-path":
+        timings = NodeTimings()
+        for class_type, (seconds, _, _) in BENCHMARK_NODES.items():
+            timings.record(class_type, (estimates or {}).get(class_type, seconds))
+    execution_list = ExecutionList(DynamicPrompt(prompt), NullCache(), timings=timings)
+    for node_id, node in prompt.items():
+        if BENCHMARK_NODES[node["class_type"]][2]:
+            execution_list.add_node(node_id)
+
+    if parallel_workers > 0:
+        free = {"gpu": 1, "cpu": parallel_workers}
+    else:
+        free = {"main": 1}
+    now = 0.0
+    running = []
+    started = []
+    while not execution_list.is_empty():
+        for node_id in execution_list.pick_ready_nodes():
+            seconds, lane, _ = BENCHMARK_NODES[prompt[node_id]["class_type"]]
+            if lane != "async":
+                lane = lane if parallel_workers > 0 else "main"
+                if free[lane] == 0:
+                    continue
+                free[lane] -= 1
+            execution_list.start_node_execution(node_id)
+            started.append(node_id)
+            heapq.heappush(running, (now + seconds, len(started), node_id, lane))
+        if len(running) == 0:
+            raise RuntimeError("Benchmark graph has a dependency cycle")
+        now, _, node_id, lane = heapq.heappop(running)
+        if lane != "async":
+            free[lane] += 1
+        execution_list.finish_node_execution(node_id, True)
+    return now, started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parallel", type=int, default=0, metavar="WORKERS", help="Simulate --parallel-execution with this many cpu workers.")
+    parser.add_argument("--estimate-error", type=float, default=0.0, help="Perturb critical-path estimates by up to this fraction.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    estimates = {class_type: seconds * (1 + rng.uniform(-args.estimate_error, args.estimate_error))
+                 for class_type, (seconds, _, _) in BENCHMARK_NODES.items()}
+    prompt = benchmark_prompt()
+    with benchmark_nodes():
+        for order in ("ux", "critical-path"):
+            makespan, started = simulate(prompt, order, args.parallel, estimates)
+            print(f"{order:>13}: {makespan:6.2f}s  {' '.join(started)}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ from .templates.api import get_prompt_templates, save_prompt_templates
 from .security.api import set_api_key
 from .download.manager import DownloadManager
 from .diag import export_diagnostics_bundle
-from .maintenance import prune_artifacts, rotate_manifest_backups, validate_env_vars
+from .maintenance import prune_artifacts, restore_manifest_backup, rotate_manifest_backups, validate_env_vars
 
 composer = composer_module
 queue = queue_module
@@ -36,5 +36,6 @@ __all__ = [
     "downloader",
     "prune_artifacts",
     "rotate_manifest_backups",
+    "restore_manifest_backup",
     "validate_env_vars",
 ]
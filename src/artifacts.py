@@ -0,0 +1,260 @@
+"""Indexed catalog of generated artifacts for fast pruning and quotas."""
+
+from __future__ import annotations
+
+import os
+import posixpath
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import PlaygroundConfig
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS artifacts (
+        path TEXT PRIMARY KEY,
+        dir TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        accessed_at REAL,
+        prompt_id TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dirs (
+        path TEXT PRIMARY KEY,
+        parent TEXT,
+        mtime_ns INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_artifacts_dir ON artifacts (dir)",
+    "CREATE INDEX IF NOT EXISTS idx_artifacts_mtime ON artifacts (mtime)",
+    "CREATE INDEX IF NOT EXISTS idx_artifacts_lru ON artifacts (COALESCE(accessed_at, mtime))",
+    "CREATE INDEX IF NOT EXISTS idx_artifacts_prompt ON artifacts (prompt_id)",
+    "CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs (parent)",
+)
+
+# Sort keys for quota eviction; each is backed by an index above.
+EVICTION_POLICIES = {"oldest": "mtime", "lru": "COALESCE(accessed_at, mtime)"}
+DEFAULT_WORKERS = 8
+
+ScanResult = Tuple[str, int, List[Tuple[str, int, float]], List[str]]
+
+
+def _parent(relative: str) -> str:
+    return posixpath.dirname(relative)
+
+
+class ArtifactCatalog:
+    """SQLite index of every file under ``artifacts_dir`` (path, size, mtime, prompt id).
+
+    Writers register outputs with :meth:`record` as they create them, so
+    pruning is an indexed range query instead of a walk over Drive.
+    :meth:`sync` reconciles the index with files written by other tools: a
+    directory's mtime only changes when entries are added or removed, so
+    it re-lists just the directories that changed, on a thread pool.
+    In-place rewrites of existing files need ``record`` or a ``full`` sync.
+    """
+
+    def __init__(self, root: Path, index_path: Path, *, workers: int = DEFAULT_WORKERS) -> None:
+        self.root = Path(root)
+        self.index_path = Path(index_path)
+        self.workers = max(1, workers)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    @classmethod
+    def for_config(cls, config: PlaygroundConfig | None = None, **kwargs) -> "ArtifactCatalog":
+        cfg = config or PlaygroundConfig.load()
+        return cls(cfg.artifacts_dir, cfg.queue_db_path.parent / "artifacts.sqlite3", **kwargs)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.index_path), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.OperationalError:  # pragma: no cover - depends on the filesystem
+                pass
+            self._local.conn = conn
+        return conn
+
+    def _relative(self, path: Path) -> Optional[str]:
+        path = Path(path)
+        if not path.is_absolute():
+            return path.as_posix()
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+
+    def _absolute(self, relative: str) -> Path:
+        return self.root / relative if relative else self.root
+
+    # -- writes -------------------------------------------------------------
+
+    def record(self, path: Path, *, prompt_id: Optional[str] = None) -> bool:
+        """Index one file under the artifacts root; returns False for files outside it."""
+        return self.record_many([path], prompt_id=prompt_id) == 1
+
+    def record_many(self, paths: Iterable[Path], *, prompt_id: Optional[str] = None) -> int:
+        rows = []
+        for path in paths:
+            relative = self._relative(path)
+            if relative is None:
+                continue
+            stat = self._absolute(relative).stat()
+            rows.append((relative, _parent(relative), stat.st_size, stat.st_mtime, prompt_id))
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO artifacts (path, dir, size, mtime, prompt_id) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size=excluded.size, mtime=excluded.mtime, "
+                "prompt_id=COALESCE(excluded.prompt_id, artifacts.prompt_id)",
+                rows,
+            )
+        return len(rows)
+
+    def touch(self, paths: Iterable[Path]) -> None:
+        """Mark artifacts as used now, for the ``lru`` eviction policy."""
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany(
+                "UPDATE artifacts SET accessed_at=? WHERE path=?",
+                [(now, relative) for relative in map(self._relative, paths) if relative is not None],
+            )
+
+    # -- reconciliation -----------------------------------------------------
+
+    def _dir_mtime(self, relative: str) -> Optional[int]:
+        try:
+            return self._absolute(relative).stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def _scan_dir(self, relative: str) -> ScanResult:
+        files: List[Tuple[str, int, float]] = []
+        subdirs: List[str] = []
+        directory = self._absolute(relative)
+        mtime_ns = directory.stat().st_mtime_ns
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                child = f"{relative}/{entry.name}" if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(child)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append((child, stat.st_size, stat.st_mtime))
+        return relative, mtime_ns, files, subdirs
+
+    def sync(self, *, full: bool = False) -> Dict[str, int]:
+        """Bring the index in line with disk; returns counts of indexed, removed and listed entries."""
+        conn = self._connection()
+        known = dict(conn.execute("SELECT path, mtime_ns FROM dirs"))
+        summary = {"indexed": 0, "removed": 0, "listed_dirs": 0}
+        seen: set = set()
+        level = [""] if self.root.is_dir() else []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="artifact-scan") as pool:
+            while level:
+                mtimes = dict(zip(level, pool.map(self._dir_mtime, level)))
+                present = {d: m for d, m in mtimes.items() if m is not None}
+                seen.update(present)
+                changed = [d for d, m in present.items() if full or known.get(d) != m]
+                unchanged = [d for d, m in present.items() if not (full or known.get(d) != m)]
+                next_level: List[str] = []
+                for relative, mtime_ns, files, subdirs in pool.map(self._scan_dir, changed):
+                    summary["listed_dirs"] += 1
+                    indexed, removed = self._reconcile(conn, relative, mtime_ns, files)
+                    summary["indexed"] += indexed
+                    summary["removed"] += removed
+                    next_level.extend(subdirs)
+                for relative in unchanged:
+                    next_level.extend(row[0] for row in conn.execute("SELECT path FROM dirs WHERE parent=?", (relative,)))
+                level = next_level
+        with conn:
+            for relative in set(known) - seen:
+                summary["removed"] += conn.execute("DELETE FROM artifacts WHERE dir=?", (relative,)).rowcount
+                conn.execute("DELETE FROM dirs WHERE path=?", (relative,))
+        return summary
+
+    def _reconcile(
+        self, conn: sqlite3.Connection, relative: str, mtime_ns: int, files: List[Tuple[str, int, float]]
+    ) -> Tuple[int, int]:
+        listed = {path for path, _, _ in files}
+        with conn:
+            indexed = {row[0]: (row[1], row[2]) for row in conn.execute(
+                "SELECT path, size, mtime FROM artifacts WHERE dir=?", (relative,)
+            )}
+            stale = [(path,) for path in indexed if path not in listed]
+            conn.executemany("DELETE FROM artifacts WHERE path=?", stale)
+            fresh = [(path, relative, size, mtime) for path, size, mtime in files if indexed.get(path) != (size, mtime)]
+            conn.executemany(
+                "INSERT INTO artifacts (path, dir, size, mtime) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size=excluded.size, mtime=excluded.mtime",
+                fresh,
+            )
+            conn.execute(
+                "INSERT INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET mtime_ns=excluded.mtime_ns",
+                (relative, _parent(relative) if relative else None, mtime_ns),
+            )
+        return len(fresh), len(stale)
+
+    # -- queries ------------------------------------------------------------
+
+    def stats(self) -> Dict[str, int]:
+        count, size = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        return {"files": count, "bytes": size}
+
+    def for_prompt(self, prompt_id: str) -> List[str]:
+        rows = self._connection().execute("SELECT path FROM artifacts WHERE prompt_id=? ORDER BY path", (prompt_id,))
+        return [row[0] for row in rows]
+
+    def older_than(self, cutoff: float) -> List[Tuple[str, int]]:
+        """Return ``(path, size)`` for artifacts modified before ``cutoff`` (epoch seconds)."""
+        return self._connection().execute(
+            "SELECT path, size FROM artifacts WHERE mtime < ? ORDER BY mtime", (cutoff,)
+        ).fetchall()
+
+    def over_quota(self, max_bytes: int, *, policy: str = "oldest") -> Iterator[Tuple[str, int]]:
+        """Yield the artifacts to evict, in ``policy`` order, until the rest fit in ``max_bytes``."""
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy!r}; expected one of {sorted(EVICTION_POLICIES)}")
+        excess = self.stats()["bytes"] - max_bytes
+        if excess <= 0:
+            return
+        cursor = self._connection().execute(
+            f"SELECT path, size FROM artifacts ORDER BY {EVICTION_POLICIES[policy]}, path"
+        )
+        for path, size in cursor:
+            if excess <= 0:
+                break
+            excess -= size
+            yield path, size
+
+    # -- deletion -----------------------------------------------------------
+
+    def _unlink(self, relative: str) -> bool:
+        try:
+            self._absolute(relative).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        return True
+
+    def delete(self, entries: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+        """Delete artifacts in parallel and drop them from the index; returns files and bytes freed."""
+        entries = list(entries)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="artifact-delete") as pool:
+            outcomes = list(pool.map(self._unlink, (path for path, _ in entries)))
+        deleted = [(path, size) for (path, size), ok in zip(entries, outcomes) if ok]
+        with self._connection() as conn:
+            conn.executemany("DELETE FROM artifacts WHERE path=?", ((path,) for path, _ in deleted))
+        return {"files": len(deleted), "bytes": sum(size for _, size in deleted)}
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass, field
+import threading
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Set, Tuple
 
 try:
     import yaml  # type: ignore
@@ -11,6 +12,31 @@ except ImportError:  # pragma: no cover - optional dependency in notebooks
     yaml = None
 
 DEFAULT_CONFIG_NAME = "config.yaml"
+PERSISTED_FIELDS = (
+    "drive_root",
+    "tunnel_preference",
+    "env_vars",
+    "queue_keep_last",
+    "queue_retention_hours",
+    "queue_archive_format",
+    "artifacts_quota_gb",
+)
+
+# Process-wide cache of loaded configs keyed by where they were looked up,
+# each stored with the (mtime, inode, size) of its YAML file at load time.
+_ConfigKey = Tuple[str, str]
+_Signature = Optional[Tuple[int, int, int]]
+_CONFIG_CACHE: Dict[_ConfigKey, Tuple[Path, _Signature, "PlaygroundConfig"]] = {}
+_ENSURED_DIRS: Set[Path] = set()
+_CACHE_LOCK = threading.Lock()
+
+
+def _signature(path: Path) -> _Signature:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
 
 
 @dataclass
@@ -27,6 +53,10 @@ class PlaygroundConfig:
     queue_db_path: Path = field(init=False)
     tunnel_preference: str = "cloudflared"
     env_vars: Dict[str, str] = field(default_factory=dict)
+    queue_keep_last: Optional[int] = None
+    queue_retention_hours: Optional[float] = None
+    queue_archive_format: str = "jsonl"
+    artifacts_quota_gb: Optional[float] = None
 
     def __post_init__(self) -> None:
         self.drive_root = Path(self.drive_root).expanduser()
@@ -42,7 +72,8 @@ class PlaygroundConfig:
     def yaml_path(self) -> Path:
         return self.config_dir / DEFAULT_CONFIG_NAME
 
-    def ensure_directories(self) -> None:
+    def ensure_directories(self, *, force: bool = False) -> None:
+        """Create the Drive folder layout; each folder is only created once per process."""
         for folder in (
             self.drive_root,
             self.models_dir,
@@ -53,31 +84,67 @@ class PlaygroundConfig:
             self.manifests_dir,
             self.queue_db_path.parent,
         ):
-            folder.mkdir(parents=True, exist_ok=True)
+            if force or folder not in _ENSURED_DIRS:
+                folder.mkdir(parents=True, exist_ok=True)
+                _ENSURED_DIRS.add(folder)
 
     def save(self) -> None:
         if yaml is None:
             raise RuntimeError("PyYAML is required to persist configuration")
         self.ensure_directories()
-        data = {
-            "drive_root": str(self.drive_root),
-            "tunnel_preference": self.tunnel_preference,
-            "env_vars": self.env_vars,
-        }
+        data = {name: getattr(self, name) for name in PERSISTED_FIELDS}
+        data["drive_root"] = str(self.drive_root)
         with self.yaml_path.open("w", encoding="utf-8") as fh:
             yaml.safe_dump(data, fh, sort_keys=True)
+        with _CACHE_LOCK:
+            _CONFIG_CACHE.clear()
 
     @classmethod
     def load(cls, path: Path | None = None) -> "PlaygroundConfig":
-        candidate = Path(path) if path else Path(os.environ.get("PLAYGROUND_CONFIG", ""))
-        if candidate and candidate.exists():
-            return cls.from_yaml(candidate)
-        fallback = cls().yaml_path
-        if fallback.exists():
-            return cls.from_yaml(fallback)
-        instance = cls()
-        instance.ensure_directories()
-        return instance
+        """Return the active configuration, cached for the life of the process.
+
+        The cached instance is reused until its YAML file changes (by mtime,
+        inode or size), appears or disappears, so repeated calls cost a single
+        ``stat``. Every call returns its own copy, so callers may modify the
+        result without affecting the cache or each other.
+        """
+        env_path = os.environ.get("PLAYGROUND_CONFIG")
+        candidate = Path(path) if path else Path(env_path) if env_path else None
+        key = (str(candidate or ""), os.environ.get("DRIVE_ROOT", ""))
+        with _CACHE_LOCK:
+            cached = _CONFIG_CACHE.get(key)
+        if cached is not None:
+            source, signature, config = cached
+            fresh = _signature(source) == signature
+            if fresh and candidate is not None and candidate != source:
+                # Loaded from the fallback because ``candidate`` was missing.
+                fresh = not candidate.is_file()
+            if fresh:
+                return config._copy()
+        if candidate is not None and candidate.is_file():
+            source = candidate
+        else:
+            source = cls().yaml_path
+        signature = _signature(source)
+        if signature is not None:
+            config = cls.from_yaml(source)
+        else:
+            config = cls()
+            config.ensure_directories()
+        with _CACHE_LOCK:
+            _CONFIG_CACHE[key] = (source, signature, config)
+        return config._copy()
+
+    def _copy(self) -> "PlaygroundConfig":
+        return replace(self, env_vars=dict(self.env_vars))
+
+    @classmethod
+    def reload(cls, path: Path | None = None) -> "PlaygroundConfig":
+        """Drop every cached config (and the created-folder memo) and load afresh."""
+        with _CACHE_LOCK:
+            _CONFIG_CACHE.clear()
+            _ENSURED_DIRS.clear()
+        return cls.load(path)
 
     @classmethod
     def from_yaml(cls, path: Path) -> "PlaygroundConfig":
@@ -85,7 +152,7 @@ class PlaygroundConfig:
             raise RuntimeError("PyYAML is required to read configuration")
         with path.open("r", encoding="utf-8") as fh:
             data: Dict[str, Any] = yaml.safe_load(fh) or {}
-        cfg = cls(**{k: v for k, v in data.items() if k in {"drive_root", "tunnel_preference", "env_vars"}})
+        cfg = cls(**{k: v for k, v in data.items() if k in PERSISTED_FIELDS})
         cfg.ensure_directories()
         return cfg
 
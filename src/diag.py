@@ -1,27 +1,180 @@
 from __future__ import annotations
 
 import json
-import shutil
+import os
+import platform
+import sys
 import tempfile
+import time
+import zipfile
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Iterable, Optional
 
 from .config import PlaygroundConfig
-from .queue import list_items
+from .queue import list_items, queue_counts
 from .templates import get_prompt_templates
 
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil ships with ComfyUI but is optional here
+    psutil = None
 
-def export_diagnostics_bundle(*, config: PlaygroundConfig | None = None) -> Path:
+QUEUE_PAGE_SIZE = 500
+MAX_SECTION_BYTES = 8 * 1024**2
+
+
+class _SectionWriter:
+    """Writes JSON lines into one zip member until ``limit`` bytes have been written."""
+
+    def __init__(self, archive: zipfile.ZipFile, name: str, limit: int) -> None:
+        self.name = name
+        self.limit = limit
+        self.rows = 0
+        self.bytes = 0
+        self.truncated = False
+        self._fh = archive.open(name, "w", force_zip64=True)
+
+    def write(self, row: Any) -> bool:
+        """Append ``row``; returns False (and writes nothing) once the cap is reached."""
+        if self.truncated:
+            return False
+        data = (json.dumps(row, default=str, separators=(",", ":")) + "\n").encode("utf-8")
+        if self.bytes + len(data) > self.limit:
+            self.truncated = True
+            return False
+        self._fh.write(data)
+        self.rows += 1
+        self.bytes += len(data)
+        return True
+
+    def write_all(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            if not self.write(row):
+                break
+
+    def close(self) -> Dict[str, Any]:
+        self._fh.close()
+        return {"file": self.name, "rows": self.rows, "bytes": self.bytes, "truncated": self.truncated}
+
+
+def _iter_queue(config: PlaygroundConfig, page_size: int) -> Iterable[Dict]:
+    after_id = None
+    while True:
+        page = list_items(limit=page_size, after_id=after_id, config=config)
+        yield from page
+        if len(page) < page_size:
+            return
+        after_id = page[-1]["id"]
+
+
+def _model_stats() -> Dict[str, Any]:
+    try:
+        import comfy.model_management as mm
+    except Exception as exc:  # torch missing or no usable device
+        return {"available": False, "error": f"{type(exc).__name__}: {exc}"}
+    device = mm.get_torch_device()
+    total, torch_total = mm.get_total_memory(device, torch_total_too=True)
+    free, torch_free = mm.get_free_memory(device, torch_free_too=True)
+    models = []
+    for loaded in list(mm.current_loaded_models):
+        model = loaded.model
+        models.append({
+            "model": type(model.model).__name__ if model is not None else None,
+            "device": str(loaded.device),
+            "loaded_bytes": loaded.model_loaded_memory() if model is not None else 0,
+            "total_bytes": loaded.model_memory() if model is not None else 0,
+            "currently_used": loaded.currently_used,
+        })
+    return {
+        "available": True,
+        "device": mm.get_torch_device_name(device),
+        "vram_state": mm.vram_state.name,
+        "total_memory": total,
+        "free_memory": free,
+        "torch_total_memory": torch_total,
+        "torch_free_memory": torch_free,
+        "loaded_models": models,
+    }
+
+
+def _cache_stats(executor: Any) -> Dict[str, Any]:
+    def size(cache: Any) -> Dict[str, Any]:
+        subcaches = getattr(cache, "subcaches", {})
+        return {
+            "type": type(cache).__name__,
+            "entries": len(getattr(cache, "cache", {})),
+            "bytes": getattr(cache, "total_bytes", None),
+            "subcaches": len(subcaches),
+            "subcache_entries": sum(len(getattr(sub, "cache", {})) for sub in subcaches.values()),
+        }
+
+    caches = executor.caches
+    return {"outputs": size(caches.outputs), "objects": size(caches.objects)}
+
+
+def system_stats(config: PlaygroundConfig, executor: Any = None) -> Dict[str, Any]:
+    """Host, ComfyUI memory/model and playground state sizes; never raises for missing pieces."""
+    stats: Dict[str, Any] = {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "pid": os.getpid(),
+        "models": _model_stats(),
+    }
+    if psutil is not None:
+        memory = psutil.virtual_memory()
+        stats["host_memory"] = {"total": memory.total, "available": memory.available}
+        stats["process_rss"] = psutil.Process().memory_info().rss
+    if executor is not None:
+        stats["executor_caches"] = _cache_stats(executor)
+    state_dir = config.queue_db_path.parent
+    if state_dir.is_dir():
+        stats["state_files"] = {entry.name: entry.stat().st_size for entry in state_dir.iterdir() if entry.is_file()}
+    return stats
+
+
+def export_diagnostics_bundle(
+    path: Optional[Path] = None,
+    *,
+    config: PlaygroundConfig | None = None,
+    executor: Any = None,
+    max_section_bytes: int = MAX_SECTION_BYTES,
+    page_size: int = QUEUE_PAGE_SIZE,
+) -> Path:
+    """Stream a diagnostics zip to ``path`` (a temp-dir file by default) and return it.
+
+    The queue is paged by id and written as JSON lines, so memory stays flat
+    however long it is; each section stops at ``max_section_bytes`` and
+    ``summary.json`` records which ones were truncated. Pass the running
+    ``executor`` to include its cache sizes.
+    """
     cfg = config or PlaygroundConfig.load()
     cfg.ensure_directories()
-    bundle_dir = Path(tempfile.mkdtemp(prefix="comfy_diag_"))
-    info: Dict[str, object] = {
-        "drive_root": str(cfg.drive_root),
-        "queue": list_items(config=cfg),
-        "templates": get_prompt_templates(config=cfg),
-    }
-    bundle_info = bundle_dir / "diagnostics.json"
-    bundle_info.write_text(json.dumps(info, indent=2), encoding="utf-8")
-    archive = shutil.make_archive(str(bundle_dir), "zip", bundle_dir)
-    shutil.rmtree(bundle_dir, ignore_errors=True)
-    return Path(archive)
+    if path is None:
+        path = Path(tempfile.gettempdir()) / f"comfy_diag_{time.strftime('%Y%m%d%H%M%S')}.zip"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as fh, zipfile.ZipFile(fh, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            sections = []
+            writer = _SectionWriter(archive, "system.jsonl", max_section_bytes)
+            writer.write(system_stats(cfg, executor))
+            sections.append(writer.close())
+            writer = _SectionWriter(archive, "templates.jsonl", max_section_bytes)
+            writer.write_all(get_prompt_templates(config=cfg))
+            sections.append(writer.close())
+            writer = _SectionWriter(archive, "queue.jsonl", max_section_bytes)
+            writer.write_all(_iter_queue(cfg, page_size))
+            sections.append(writer.close())
+            summary = {
+                "drive_root": str(cfg.drive_root),
+                "created_at": time.time(),
+                "queue_counts": queue_counts(config=cfg),
+                "sections": sections,
+            }
+            archive.writestr("summary.json", json.dumps(summary, indent=2))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path
@@ -1,11 +1,24 @@
 """Download helpers for ComfyUI assets."""
 
-from .manager import DownloadManager
-from .stream import compute_sha256, normalize_server_hash, preview_url, stream_file
+from .async_manager import AsyncDownloadManager, forward_to_server
+from .cas import BlobStore
+from .resolve import ResolutionCache, resolve_manifest
+from .manager import DownloadManager, DownloadManifest
+from .manifest import ManifestError, check_manifest
+from .stream import StreamDigest, compute_sha256, normalize_server_hash, preview_url, stream_file
 
 __all__ = [
 	"DownloadManager",
+	"DownloadManifest",
+	"ManifestError",
+	"check_manifest",
+	"BlobStore",
+	"ResolutionCache",
+	"resolve_manifest",
+	"AsyncDownloadManager",
+	"forward_to_server",
 	"stream_file",
+	"StreamDigest",
 	"compute_sha256",
 	"preview_url",
 	"normalize_server_hash",
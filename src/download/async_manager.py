@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+from ..config import PlaygroundConfig
+from .manager import DownloadItem
+from .stream import CHUNK_SIZE, StreamDigest, normalize_server_hash
+
+try:
+    import aiohttp  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency outside the server runtime
+    aiohttp = None
+
+ProgressEvent = Dict[str, Any]
+
+TASK_STATES = ("queued", "running", "paused", "done", "failed", "cancelled")
+
+
+@dataclass
+class DownloadTask:
+    id: int
+    item: DownloadItem
+    state: str = "queued"
+    downloaded_bytes: int = 0
+    total_bytes: int = -1
+    result: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+    _runner: Optional[asyncio.Task] = field(default=None, repr=False)
+    _parked: bool = field(default=False, repr=False)
+
+    def snapshot(self) -> ProgressEvent:
+        return {
+            "id": self.id,
+            "url": self.item.url,
+            "destination": self.item.destination,
+            "state": self.state,
+            "downloaded_bytes": self.downloaded_bytes,
+            "total_bytes": self.total_bytes,
+            "progress": self.downloaded_bytes / self.total_bytes if self.total_bytes > 0 else -1,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class _Paused(Exception):
+    pass
+
+
+class AsyncDownloadManager:
+    """asyncio-native download queue meant to run inside the ComfyUI event loop.
+
+    Memory stays bounded however many items are queued: at most
+    ``max_pending`` tasks wait in the queue (``add_item`` awaits when it is
+    full), ``max_concurrency`` downloads run at once, and each holds a single
+    chunk in flight. All file access (stat, open, writes, hashing) runs in
+    the default executor so the loop never blocks on Drive I/O.
+
+    ``tasks`` only holds queued, running and paused tasks: a task is dropped
+    once its final event (carrying ``state``, ``result`` and ``error``) has
+    been published, so a long-lived manager does not grow with every item.
+
+    Pausing a task drops its connection and parks it without holding a worker;
+    the pause is noticed before the next chunk is read, so a read already
+    waiting on a stalled server finishes (or times out) first. Resuming puts
+    the task back in the queue, and it continues from its ``.part`` file with
+    a Range request. ``join`` waits for parked tasks too, until they are
+    resumed or cancelled. Progress events go to ``subscribe()`` iterators and
+    ``progress_callback``.
+    """
+
+    def __init__(
+        self,
+        config: PlaygroundConfig | None = None,
+        *,
+        max_concurrency: int = 4,
+        per_host_limit: int = 4,
+        max_pending: int = 1024,
+        chunk_size: int = CHUNK_SIZE,
+        timeout: float = 60.0,
+        progress_callback: Optional[Callable[[ProgressEvent], Any]] = None,
+        session: Optional["aiohttp.ClientSession"] = None,
+    ) -> None:
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for AsyncDownloadManager")
+        self.config = config or PlaygroundConfig.load()
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+        self.tasks: Dict[int, DownloadTask] = {}
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._ids = itertools.count(1)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._session = session
+        self._owns_session = session is None
+        self._workers: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> "AsyncDownloadManager":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_read=self.timeout))
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def add_item(self, item: DownloadItem | Dict[str, str]) -> int:
+        """Queue ``item`` and return its task id; waits while the queue is full."""
+        if isinstance(item, dict):
+            payload = {k: item.get(k) for k in ["url", "destination", "sha256", "headers"] if k in item}
+            item = DownloadItem(**payload)
+        task = DownloadTask(next(self._ids), item)
+        self.tasks[task.id] = task
+        await self._queue.put(task)
+        self._publish(task)
+        return task.id
+
+    async def join(self) -> None:
+        """Wait until every queued task has finished, failed or been cancelled."""
+        await self._queue.join()
+
+    def pause(self, task_id: int) -> None:
+        task = self.tasks.get(task_id)
+        if task is not None and task.state in ("queued", "running"):
+            task.state = "paused"
+            self._publish(task)
+
+    def resume(self, task_id: int) -> None:
+        task = self.tasks.get(task_id)
+        if task is None or task.state != "paused":
+            return
+        task.state = "queued"
+        if task._parked:
+            task._parked = False
+            self._requeue(task)
+        self._publish(task)
+
+    def cancel(self, task_id: int) -> None:
+        task = self.tasks.get(task_id)
+        if task is None or task.state in ("done", "failed", "cancelled"):
+            return
+        task.state = "cancelled"
+        if task._runner is not None:
+            task._runner.cancel()
+        self._publish(task)
+        if task._parked:
+            task._parked = False
+            self.tasks.pop(task.id, None)
+            self._queue.task_done()
+
+    def _requeue(self, task: DownloadTask) -> None:
+        # The parked entry was never marked done, which keeps ``join`` waiting;
+        # swap it for a fresh queue entry.
+        if self._queue.full():
+            asyncio.get_running_loop().create_task(self._queue.put(task))
+        else:
+            self._queue.put_nowait(task)
+        self._queue.task_done()
+
+    async def subscribe(self, max_buffered: int = 256) -> AsyncIterator[ProgressEvent]:
+        """Yield progress events; slow consumers lose the oldest events rather than stall downloads."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+
+    def _publish(self, task: DownloadTask) -> None:
+        event = task.snapshot()
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+        if self.progress_callback is not None:
+            self.progress_callback(event)
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _worker(self) -> None:
+        while True:
+            task: DownloadTask = await self._queue.get()
+            if task.state == "cancelled":
+                self.tasks.pop(task.id, None)
+                self._queue.task_done()
+                continue
+            if task.state == "paused":
+                task._parked = True
+                continue
+            task.state = "running"
+            self._publish(task)
+            task._runner = asyncio.create_task(self._download(task))
+            try:
+                task.result = await task._runner
+                task.state = "done"
+            except _Paused:
+                task._parked = True
+                continue
+            except asyncio.CancelledError:
+                if task.state != "cancelled":
+                    self._queue.task_done()
+                    raise
+            except Exception as exc:
+                task.state = "failed"
+                task.error = str(exc)
+            finally:
+                task._runner = None
+            self._publish(task)
+            self.tasks.pop(task.id, None)
+            self._queue.task_done()
+
+    async def _download(self, task: DownloadTask) -> Dict[str, str]:
+        loop = asyncio.get_running_loop()
+        item = task.item
+        dest = self.config.drive_root / item.destination
+        temp_path = dest.with_suffix(dest.suffix + ".part")
+        resume_pos = await loop.run_in_executor(None, _prepare_part, temp_path)
+        digest = StreamDigest()
+        if resume_pos:
+            # Seed the digest with the bytes an earlier attempt already saved.
+            await loop.run_in_executor(None, _hash_range, digest, temp_path, 0, resume_pos)
+        response_headers = await self._stream(task, temp_path, resume_pos, digest)
+        sha256 = digest.sha256.hexdigest()
+        if item.sha256 and sha256 != item.sha256.lower():
+            await loop.run_in_executor(None, lambda: temp_path.unlink(missing_ok=True))
+            raise ValueError(f"SHA256 mismatch: expected {item.sha256}, got {sha256}")
+        await loop.run_in_executor(None, shutil.move, str(temp_path), str(dest))
+        return {"path": str(dest), "sha256": sha256, "server_hash": normalize_server_hash(response_headers)}
+
+    async def _stream(self, task: DownloadTask, temp_path: Path, resume_pos: int, digest: StreamDigest) -> Dict[str, str]:
+        loop = asyncio.get_running_loop()
+        headers = dict(task.item.headers or {})
+        if resume_pos:
+            headers["Range"] = f"bytes={resume_pos}-"
+        async with self._host_limit(task.item.url):
+            async with self._session.get(task.item.url, headers=headers) as response:
+                response.raise_for_status()
+                if resume_pos and response.status != 206:
+                    resume_pos = 0
+                    digest.reset()
+                length = response.headers.get("content-length", "")
+                task.total_bytes = int(length) + resume_pos if length.isdigit() else -1
+                task.downloaded_bytes = resume_pos
+                fh = await loop.run_in_executor(None, temp_path.open, "ab" if resume_pos else "wb")
+                try:
+                    chunks = response.content.iter_chunked(self.chunk_size).__aiter__()
+                    while True:
+                        if task.state == "paused":
+                            raise _Paused()
+                        try:
+                            chunk = await chunks.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        await loop.run_in_executor(None, _write_chunk, fh, digest, chunk)
+                        task.downloaded_bytes += len(chunk)
+                        self._publish(task)
+                finally:
+                    await loop.run_in_executor(None, fh.close)
+                return dict(response.headers)
+
+
+def _prepare_part(temp_path: Path) -> int:
+    """Create the destination folder and return how much of ``temp_path`` already exists."""
+    temp_path.parent.mkdir(parents=True, exist_ok=True)
+    return temp_path.stat().st_size if temp_path.exists() else 0
+
+
+def _write_chunk(fh, digest: StreamDigest, chunk: bytes) -> None:
+    fh.write(chunk)
+    digest.update(chunk)
+
+
+def _hash_range(digest: StreamDigest, path: Path, start: int, end: int) -> None:
+    with path.open("rb") as fh:
+        digest.update_from_file(fh, start, end)
+
+
+def forward_to_server(server: Any, event: str = "playground.download") -> Callable[[ProgressEvent], None]:
+    """Build a ``progress_callback`` that relays events over ComfyUI's websocket.
+
+    ``server`` is the running ``PromptServer``; its ``send_sync`` is safe to
+    call from the event loop and from worker threads alike.
+    """
+
+    def forward(payload: ProgressEvent) -> None:
+        server.send_sync(event, payload)
+
+    return forward
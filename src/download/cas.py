@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..config import PlaygroundConfig
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS blobs (
+        sha256 TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS urls (
+        url TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS links (
+        destination TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL,
+        mode TEXT NOT NULL
+    )
+    """,
+)
+
+LINK_MODES = ("hardlink", "symlink", "copy")
+
+
+class BlobStore:
+    """Content-addressed model storage keyed by SHA-256.
+
+    Every distinct file is stored once under ``root/<aa>/<sha256>``; manifest
+    destinations are materialised from it as hardlinks, falling back to
+    symlinks and finally copies on filesystems (such as Drive) that lack them.
+    A small SQLite index remembers which hash each URL resolved to, so a repeat
+    manifest run can skip the network entirely.
+    """
+
+    def __init__(self, root: Path, index_path: Path) -> None:
+        self.root = Path(root)
+        self.index_path = Path(index_path)
+        self.incoming_dir = self.root / "incoming"
+        self.incoming_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    @classmethod
+    def for_config(cls, config: PlaygroundConfig) -> "BlobStore":
+        return cls(config.models_dir / ".blobs", config.queue_db_path.parent / "blobs.sqlite3")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.index_path), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.OperationalError:  # pragma: no cover - depends on the filesystem
+                pass
+            self._local.conn = conn
+        return conn
+
+    def blob_path(self, sha256: str) -> Path:
+        sha256 = sha256.lower()
+        return self.root / sha256[:2] / sha256
+
+    def has(self, sha256: Optional[str]) -> bool:
+        return bool(sha256) and self.blob_path(sha256).is_file()
+
+    def lookup_url(self, url: str) -> Optional[str]:
+        row = self._connection().execute("SELECT sha256 FROM urls WHERE url=?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def remember_url(self, url: str, sha256: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO urls (url, sha256, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET sha256=excluded.sha256, updated_at=excluded.updated_at",
+                (url, sha256.lower(), time.time()),
+            )
+
+    def incoming_path(self, url: str) -> Path:
+        """Stable staging path for ``url`` so interrupted downloads can resume."""
+        return self.incoming_dir / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def ingest(self, path: Path, sha256: str) -> Path:
+        """Move a verified download into the store; duplicates of existing blobs are dropped."""
+        target = self.blob_path(sha256)
+        if target.is_file():
+            Path(path).unlink(missing_ok=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, size, created_at) VALUES (?, ?, ?)",
+                (sha256.lower(), target.stat().st_size, time.time()),
+            )
+        return target
+
+    def is_materialized(self, dest: Path, sha256: str) -> bool:
+        row = self._connection().execute(
+            "SELECT sha256, mode FROM links WHERE destination=?", (str(dest),)
+        ).fetchone()
+        if not row or row[0] != sha256.lower() or not dest.exists():
+            return False
+        blob = self.blob_path(sha256)
+        if row[1] == "hardlink":
+            return os.path.samefile(dest, blob)
+        if row[1] == "symlink":
+            return dest.is_symlink() and Path(os.readlink(dest)) == blob
+        return dest.stat().st_size == blob.stat().st_size
+
+    def materialize(self, sha256: str, dest: Path) -> str:
+        """Expose blob ``sha256`` at ``dest`` and return the link mode used."""
+        blob = self.blob_path(sha256)
+        if self.is_materialized(dest, sha256):
+            row = self._connection().execute("SELECT mode FROM links WHERE destination=?", (str(dest),)).fetchone()
+            return row[0]
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        staging = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.link")
+        staging.unlink(missing_ok=True)
+        mode = "copy"
+        try:
+            os.link(blob, staging)
+            mode = "hardlink"
+        except OSError:
+            try:
+                os.symlink(blob, staging)
+                mode = "symlink"
+            except OSError:
+                shutil.copyfile(blob, staging)
+        os.replace(staging, dest)
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO links (destination, sha256, mode) VALUES (?, ?, ?) "
+                "ON CONFLICT(destination) DO UPDATE SET sha256=excluded.sha256, mode=excluded.mode",
+                (str(dest), sha256.lower(), mode),
+            )
+        return mode
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connection()
+        blobs, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        links = conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+        return {"blobs": blobs, "bytes": size, "links": links}
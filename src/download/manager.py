@@ -1,14 +1,22 @@
 from __future__ import annotations
 
-import json
+import itertools
 import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from pathlib import Path
-from queue import Queue
-from typing import Callable, Dict, Iterable, Optional
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set
+from urllib.parse import urlsplit
 
 from ..config import PlaygroundConfig
-from .stream import ProgressCallback, compute_sha256, preview_url, stream_file
+from .cas import BlobStore
+from .manifest import iter_entries
+from .resolve import ResolutionCache, resolve_manifest
+from .stream import MIN_SEGMENT_SIZE, ProgressCallback, compute_sha256, preview_url, stream_file
+
+# Locks serialising downloads of the same hash or URL when deduplicating.
+KEY_LOCK_STRIPES = 64
 
 
 @dataclass
@@ -19,46 +27,245 @@ class DownloadItem:
     headers: Optional[Dict[str, str]] = None
 
 
+class _ManifestFile:
+    """Re-iterable view of a manifest file; every pass streams it from disk again."""
+
+    def __init__(self, path: Path, fmt: Optional[str] = None) -> None:
+        self.path = Path(path)
+        self.fmt = fmt
+
+    def __iter__(self) -> Iterator[DownloadItem]:
+        for entry in iter_entries(self.path, fmt=self.fmt):
+            yield DownloadItem(**entry)
+
+
 @dataclass
 class DownloadManifest:
     items: Iterable[DownloadItem]
 
     @classmethod
-    def from_json(cls, path: Path) -> "DownloadManifest":
-        with path.open("r", encoding="utf-8") as fh:
-            payload = json.load(fh)
-        entries = [DownloadItem(**item) for item in payload.get("items", [])]
-        return cls(entries)
+    def from_json(cls, path: Path, *, fmt: Optional[str] = None) -> "DownloadManifest":
+        """Open a JSON (``{"items": [...]}`` or a bare array) or JSONL manifest lazily.
+
+        Rows are parsed and validated as they are consumed, so a manifest of
+        any length is never held in memory; an invalid row raises
+        :class:`~src.download.manifest.ManifestError` naming its row number.
+        """
+        return cls(_ManifestFile(path, fmt))
+
+
+class _ProgressAggregator:
+    """Fold per-item progress from worker threads into one manager-wide report.
+
+    The user callback is invoked under a lock, so it never runs concurrently
+    and does not need to be thread-safe.
+    """
+
+    def __init__(self, callback: Optional[ProgressCallback], items_total: int = -1) -> None:
+        self.callback = callback
+        self.items_total = items_total
+        self.items_completed = 0
+        # Only in-flight items are tracked individually; finished ones are
+        # folded into the ``_done_*`` sums so memory does not grow per item.
+        self._downloaded: Dict[int, int] = {}
+        self._totals: Dict[int, int] = {}
+        self._done_bytes = 0
+        self._done_total = 0
+        self._lock = threading.Lock()
+
+    def item_callback(self, index: int, item: DownloadItem) -> Optional[ProgressCallback]:
+        if self.callback is None:
+            return None
+
+        def report(state: Dict[str, float]) -> None:
+            with self._lock:
+                self._downloaded[index] = int(state["downloaded_bytes"])
+                if state.get("total_bytes", -1) > 0:
+                    self._totals[index] = int(state["total_bytes"])
+                self._emit(item, state)
+
+        return report
+
+    def item_finished(self, index: int, item: DownloadItem) -> None:
+        with self._lock:
+            self.items_completed += 1
+            self._done_bytes += self._downloaded.pop(index, 0)
+            self._done_total += self._totals.pop(index, 0)
+            if self.callback is not None:
+                self._emit(item, None)
+
+    def _emit(self, item: DownloadItem, state: Optional[Dict[str, float]]) -> None:
+        downloaded = self._done_bytes + sum(self._downloaded.values())
+        known_total = self._done_total + sum(self._totals.values())
+        payload: Dict[str, object] = {
+            "downloaded_bytes": downloaded,
+            "total_bytes": known_total or -1,
+            "progress": downloaded / known_total if known_total else -1,
+            "items_completed": self.items_completed,
+            "items_total": self.items_total,
+            "url": item.url,
+            "destination": item.destination,
+        }
+        if state is not None:
+            payload["item_downloaded_bytes"] = state["downloaded_bytes"]
+            payload["item_total_bytes"] = state.get("total_bytes", -1)
+        self.callback(payload)
 
 
 @dataclass
 class DownloadManager:
+    """Download queued manifest items with a bounded worker pool.
+
+    Up to ``max_workers`` items download at once; files of at least
+    ``2 * min_segment_size`` bytes from servers that accept byte ranges are
+    further split into ``segments_per_file`` parallel Range requests. No more
+    than ``per_host_limit`` connections are opened to any one host.
+    ``progress_callback`` receives aggregated progress across all items.
+
+    Manifests added with :meth:`add_manifest` are consumed lazily while
+    downloading, and only a small window of items is in flight at a time, so
+    memory stays flat for manifests with hundreds of thousands of rows.
+
+    With ``dedupe`` enabled, files live once in a content-addressed
+    :class:`BlobStore` and destinations are linked to them; items whose hash is
+    known (from the manifest or an earlier run of the same URL) and already
+    stored are materialised without touching the network.
+    """
+
     config: PlaygroundConfig = field(default_factory=PlaygroundConfig.load)
     progress_callback: Optional[ProgressCallback] = None
-    _queue: Queue = field(default_factory=Queue, init=False)
+    max_workers: int = 4
+    segments_per_file: int = 4
+    per_host_limit: int = 4
+    min_segment_size: int = MIN_SEGMENT_SIZE
+    fast_hash: Optional[str] = None
+    dedupe: bool = False
+    _pending: Deque[DownloadItem] = field(default_factory=deque, init=False)
+    _sources: Deque[Iterable[DownloadItem]] = field(default_factory=deque, init=False)
+    _host_limits: Dict[str, threading.BoundedSemaphore] = field(default_factory=dict, init=False)
+    _host_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    _key_locks: List[threading.Lock] = field(
+        default_factory=lambda: [threading.Lock() for _ in range(KEY_LOCK_STRIPES)], init=False
+    )
+    _blobs: Optional[BlobStore] = field(default=None, init=False)
+
+    @property
+    def blobs(self) -> BlobStore:
+        if self._blobs is None:
+            self._blobs = BlobStore.for_config(self.config)
+        return self._blobs
 
     def add_item(self, item: DownloadItem | Dict[str, str]) -> None:
         if isinstance(item, dict):
             payload = {k: item.get(k) for k in ["url", "destination", "sha256", "headers"] if k in item}
             item = DownloadItem(**payload)
-        self._queue.put(item)
+        self._pending.append(item)
 
     def add_manifest(self, manifest: DownloadManifest) -> None:
-        for item in manifest.items:
-            self.add_item(item)
-
-    def run(self) -> None:
-        while not self._queue.empty():
-            item: DownloadItem = self._queue.get()
-            dest = self.config.drive_root / item.destination
-            stream_file(
-                item.url,
-                dest,
-                headers=item.headers,
-                expected_sha256=item.sha256,
-                progress_cb=self.progress_callback,
-            )
-            self._queue.task_done()
+        self._sources.append(manifest.items)
+
+    def _drain(self) -> Iterator[DownloadItem]:
+        while self._pending or self._sources:
+            if self._pending:
+                yield self._pending.popleft()
+            else:
+                yield from self._sources.popleft()
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            limiter = self._host_limits.get(host)
+            if limiter is None:
+                limiter = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_limits[host] = limiter
+            return limiter
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        # A fixed set of striped locks keeps memory flat on huge manifests;
+        # unrelated keys sharing a stripe only ever wait for each other.
+        return self._key_locks[hash(key) % KEY_LOCK_STRIPES]
+
+    def _download(self, index: int, item: DownloadItem, progress: _ProgressAggregator) -> Dict[str, str]:
+        dest = self.config.drive_root / item.destination
+        if not self.dedupe:
+            result = self._fetch(index, item, dest, progress)
+            progress.item_finished(index, item)
+            return result
+        store = self.blobs
+        known = item.sha256 or store.lookup_url(item.url)
+        # Items sharing a hash (or URL) run one at a time, so a duplicate waits
+        # for the first download and is then served from the store.
+        with self._key_lock((known or item.url).lower()):
+            known = item.sha256 or store.lookup_url(item.url)
+            if known and store.has(known):
+                result = {"path": str(dest), "sha256": known.lower(), "server_hash": None, "source": "cache"}
+            else:
+                staging = store.incoming_path(item.url)
+                result = self._fetch(index, item, staging, progress)
+                store.ingest(staging, result["sha256"])
+                store.remember_url(item.url, result["sha256"])
+                result.update({"path": str(dest), "source": "network"})
+            result["link"] = store.materialize(result["sha256"], dest)
+        progress.item_finished(index, item)
+        return result
+
+    def _fetch(self, index: int, item: DownloadItem, dest: Path, progress: _ProgressAggregator) -> Dict[str, str]:
+        return stream_file(
+            item.url,
+            dest,
+            headers=item.headers,
+            expected_sha256=item.sha256,
+            progress_cb=progress.item_callback(index, item),
+            segments=self.segments_per_file,
+            min_segment_size=self.min_segment_size,
+            limiter=self._host_limit(item.url),
+            fast_hash=self.fast_hash,
+        )
+
+    def iter_results(self) -> Iterator[Future]:
+        """Download everything queued so far, yielding each item's future in queue order.
+
+        Items are pulled from the queue and any lazy manifests only as worker
+        slots free up, keeping at most ``2 * max_workers`` unfinished at once.
+        A slow item does not hold back submissions: later items keep running
+        and their finished futures are buffered until it is their turn.
+        """
+        items_total = -1 if self._sources else len(self._pending)
+        progress = _ProgressAggregator(self.progress_callback, items_total)
+        window = 2 * max(1, self.max_workers)
+        in_order: Deque[Future] = deque()
+        running: Set[Future] = set()
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix="download") as pool:
+            for index, item in enumerate(self._drain()):
+                future = pool.submit(self._download, index, item, progress)
+                in_order.append(future)
+                running = {f for f in running if not f.done()}
+                running.add(future)
+                if len(running) >= window:
+                    running = wait(running, return_when=FIRST_COMPLETED).not_done
+                while in_order and in_order[0].done():
+                    yield in_order.popleft()
+            while in_order:
+                wait([in_order[0]])
+                yield in_order.popleft()
+
+    def run(self) -> List[Dict[str, str]]:
+        """Download everything queued so far and return per-item metadata in queue order.
+
+        All items are attempted; if any failed, the first error is raised once
+        the rest have finished.
+        """
+        results: List[Dict[str, str]] = []
+        first_error: Optional[BaseException] = None
+        for future in self.iter_results():
+            error = future.exception()
+            if error is None:
+                results.append(future.result())
+            elif first_error is None:
+                first_error = error
+        if first_error is not None:
+            raise first_error
+        return results
 
     def run_async(self) -> threading.Thread:
         thread = threading.Thread(target=self.run, daemon=True)
@@ -68,5 +275,11 @@ class DownloadManager:
     def preview(self, url: str) -> Dict[str, str]:
         return preview_url(url)
 
+    def resolve_pending(self, *, max_workers: int = 8, force: bool = False) -> Dict[str, Dict[str, object]]:
+        """Resolve every queued URL concurrently through the persistent resolution cache."""
+        cache = ResolutionCache.for_config(self.config)
+        manifest = DownloadManifest(itertools.chain(self._pending, *self._sources))
+        return resolve_manifest(manifest, cache=cache, max_workers=max_workers, force=force)
+
     def verify(self, path: Path) -> Dict[str, str]:
         return {"path": str(path), "sha256": compute_sha256(path)}
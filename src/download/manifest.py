@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+MANIFEST_FORMATS = ("json", "jsonl")
+READ_CHUNK = 64 * 1024
+REQUIRED_KEYS = ("url", "destination")
+OPTIONAL_KEYS = ("sha256", "headers")
+
+_SHA256 = re.compile(r"^[0-9a-fA-F]{64}$")
+
+RowError = Tuple[int, str]
+
+
+class ManifestError(ValueError):
+    """Raised for malformed manifests; ``errors`` lists ``(row, message)`` pairs."""
+
+    def __init__(self, errors: List[RowError]) -> None:
+        self.errors = errors
+        preview = "; ".join(f"row {row}: {message}" for row, message in errors[:5])
+        more = f" (+{len(errors) - 5} more)" if len(errors) > 5 else ""
+        super().__init__(f"Invalid manifest: {preview}{more}")
+
+
+@dataclass
+class ManifestReport:
+    rows: int = 0
+    errors: List[RowError] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def validate_row(row: object) -> List[str]:
+    """Return the problems with one manifest row; an empty list means it is usable."""
+    if not isinstance(row, dict):
+        return [f"expected an object, got {type(row).__name__}"]
+    problems = [f"missing {key!r}" for key in REQUIRED_KEYS if not row.get(key)]
+    for key in REQUIRED_KEYS:
+        if key in row and not isinstance(row[key], str):
+            problems.append(f"{key!r} must be a string")
+    destination = row.get("destination")
+    if isinstance(destination, str) and destination:
+        parts = PurePosixPath(destination.replace("\\", "/"))
+        if parts.is_absolute() or ".." in parts.parts:
+            problems.append("'destination' must stay inside the drive root")
+    sha256 = row.get("sha256")
+    if sha256 is not None and not (isinstance(sha256, str) and _SHA256.match(sha256)):
+        problems.append("'sha256' must be 64 hex characters")
+    headers = row.get("headers")
+    if headers is not None and not (
+        isinstance(headers, dict) and all(isinstance(k, str) and isinstance(v, str) for k, v in headers.items())
+    ):
+        problems.append("'headers' must map strings to strings")
+    unknown = sorted(set(row) - set(REQUIRED_KEYS) - set(OPTIONAL_KEYS))
+    if unknown:
+        problems.append(f"unknown keys {unknown}")
+    return problems
+
+
+class _JsonStream:
+    """Pull JSON values one at a time out of a large document.
+
+    Only the ``items`` array (or a top-level array) is walked element by
+    element; any other top-level value is decoded whole and discarded.
+    """
+
+    def __init__(self, fh: IO[str], chunk_size: int = READ_CHUNK) -> None:
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fh.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self) -> object:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number cut off at the end of the buffer still decodes; make
+            # sure the value is terminated before trusting it.
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self) -> Iterator[object]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+    def items(self) -> Iterator[object]:
+        if self.peek() == "[":
+            yield from self.array()
+            return
+        self.expect("{")
+        if self.peek() == "}":
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if key == "items":
+                yield from self.array()
+            else:
+                self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def manifest_format(path: Path) -> str:
+    return "jsonl" if Path(path).suffix.lower() in (".jsonl", ".ndjson") else "json"
+
+
+def iter_rows(path: Path, *, fmt: Optional[str] = None) -> Iterator[Tuple[int, object, Optional[str]]]:
+    """Yield ``(row, value, parse_error)`` for every manifest entry without loading the file.
+
+    Rows are 1-based: line numbers for JSONL, element positions for JSON. A
+    syntax error inside a JSON array ends the stream since it cannot be
+    resynchronised; a bad JSONL line is reported and skipped.
+    """
+    fmt = fmt or manifest_format(path)
+    if fmt not in MANIFEST_FORMATS:
+        raise ValueError(f"Unknown manifest format {fmt!r}; expected one of {MANIFEST_FORMATS}")
+    with Path(path).open("r", encoding="utf-8") as fh:
+        if fmt == "jsonl":
+            for lineno, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield lineno, json.loads(line), None
+                except json.JSONDecodeError as exc:
+                    yield lineno, None, f"invalid JSON ({exc.msg})"
+            return
+        row = 0
+        try:
+            for row, value in enumerate(_JsonStream(fh).items(), 1):
+                yield row, value, None
+        except json.JSONDecodeError as exc:
+            yield row + 1, None, f"invalid JSON ({exc.msg})"
+
+
+def iter_entries(path: Path, *, fmt: Optional[str] = None, errors: Optional[List[RowError]] = None) -> Iterator[Dict]:
+    """Yield validated manifest rows lazily.
+
+    Invalid rows raise :class:`ManifestError` as soon as they are reached,
+    unless an ``errors`` list is given, in which case they are appended to it
+    and skipped.
+    """
+    for row, value, parse_error in iter_rows(path, fmt=fmt):
+        problems = [parse_error] if parse_error else validate_row(value)
+        if not problems:
+            yield value
+            continue
+        found = [(row, problem) for problem in problems]
+        if errors is None:
+            raise ManifestError(found)
+        errors.extend(found)
+
+
+def check_manifest(path: Path, *, fmt: Optional[str] = None) -> ManifestReport:
+    """Validate every row in one streaming pass and collect all errors."""
+    report = ManifestReport()
+    for row, value, parse_error in iter_rows(path, fmt=fmt):
+        report.rows += 1
+        problems = [parse_error] if parse_error else validate_row(value)
+        report.errors.extend((row, problem) for problem in problems)
+    return report
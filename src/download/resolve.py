@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+import requests
+
+from ..config import PlaygroundConfig
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .manager import DownloadManifest
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resolutions (
+    url TEXT PRIMARY KEY,
+    final_url TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    size INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    headers_json TEXT NOT NULL,
+    checked_at REAL NOT NULL
+)
+"""
+
+_COLUMNS = "url, final_url, status_code, size, etag, last_modified, content_type, headers_json, checked_at"
+
+
+def _row_to_result(row: tuple, source: str) -> Dict[str, object]:
+    return {
+        "url": row[0],
+        "final_url": row[1],
+        "status_code": row[2],
+        "size": row[3],
+        "etag": row[4],
+        "last_modified": row[5],
+        "content_type": row[6],
+        "headers": json.loads(row[7]),
+        "checked_at": row[8],
+        "cache": source,
+    }
+
+
+def head_with_fallback(
+    url: str,
+    headers: Dict[str, str],
+    timeout: float,
+    response: Optional[requests.Response] = None,
+) -> requests.Response:
+    """HEAD ``url`` (or reuse ``response``, a HEAD already made) and return headers worth keeping."""
+    if response is None:
+        response = requests.head(url, allow_redirects=True, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return response
+    if response.status_code >= 400 or "content-length" not in response.headers:
+        # Some CDNs reject HEAD or omit the length; a streamed GET reads headers only.
+        with requests.get(url, allow_redirects=True, headers=headers, stream=True, timeout=timeout) as fallback:
+            return fallback
+    return response
+
+
+class ResolutionCache:
+    """Persistent memory of what each URL resolved to on its last check.
+
+    Fresh entries (younger than ``ttl``) are answered from SQLite without any
+    request. Stale entries that carry an ETag or Last-Modified are revalidated
+    with a conditional HEAD against the stored final URL; a ``304`` only bumps
+    ``checked_at``. Everything else is resolved from scratch and stored.
+    """
+
+    def __init__(self, path: Path, *, ttl: float = DEFAULT_TTL_SECONDS, timeout: float = 15) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(SCHEMA)
+
+    @classmethod
+    def for_config(cls, config: PlaygroundConfig, **kwargs) -> "ResolutionCache":
+        return cls(config.queue_db_path.parent / "resolutions.sqlite3", **kwargs)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.OperationalError:  # pragma: no cover - depends on the filesystem
+                pass
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[Dict[str, object]]:
+        row = self._connection().execute(f"SELECT {_COLUMNS} FROM resolutions WHERE url=?", (url,)).fetchone()
+        return _row_to_result(row, "hit") if row else None
+
+    def _store(self, url: str, response: requests.Response) -> Dict[str, object]:
+        length = response.headers.get("content-length", "")
+        row = (
+            url,
+            response.url,
+            response.status_code,
+            int(length) if length.isdigit() else None,
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+            response.headers.get("content-type"),
+            json.dumps(dict(response.headers)),
+            time.time(),
+        )
+        with self._connection() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO resolutions ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+        return _row_to_result(row, "miss")
+
+    def _touch(self, url: str) -> None:
+        with self._connection() as conn:
+            conn.execute("UPDATE resolutions SET checked_at=? WHERE url=?", (time.time(), url))
+
+    def resolve(self, url: str, headers: Optional[Dict[str, str]] = None, *, force: bool = False) -> Dict[str, object]:
+        """Return the resolution of ``url``; ``cache`` reports hit/revalidated/miss/error."""
+        headers = dict(headers or {})
+        cached = None if force else self.get(url)
+        try:
+            if cached is not None:
+                if time.time() - float(cached["checked_at"]) < self.ttl:
+                    return cached
+                validators = {}
+                if cached["etag"]:
+                    validators["If-None-Match"] = str(cached["etag"])
+                if cached["last_modified"]:
+                    validators["If-Modified-Since"] = str(cached["last_modified"])
+                if validators and int(cached["status_code"]) < 400:
+                    response = requests.head(
+                        str(cached["final_url"]),
+                        allow_redirects=True,
+                        headers={**headers, **validators},
+                        timeout=self.timeout,
+                    )
+                    if response.status_code == 304:
+                        self._touch(url)
+                        return {**cached, "checked_at": time.time(), "cache": "revalidated"}
+                    # Changed: the conditional HEAD already carries the new headers.
+                    return self._store(url, head_with_fallback(url, headers, self.timeout, response))
+            return self._store(url, head_with_fallback(url, headers, self.timeout))
+        except requests.RequestException as exc:
+            if cached is not None:
+                # Serve the stale answer rather than fail a whole manifest check.
+                return {**cached, "cache": "stale", "error": str(exc)}
+            return {"url": url, "status_code": "error", "error": str(exc), "cache": "error"}
+
+    def resolve_many(
+        self,
+        urls: Iterable[str],
+        *,
+        headers: Optional[Dict[str, Dict[str, str]]] = None,
+        max_workers: int = 8,
+        force: bool = False,
+    ) -> Dict[str, Dict[str, object]]:
+        """Resolve distinct ``urls`` concurrently; ``headers`` maps a URL to its request headers."""
+        unique = list(dict.fromkeys(urls))
+        headers = headers or {}
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique))), thread_name_prefix="resolve") as pool:
+            results = pool.map(lambda url: self.resolve(url, headers.get(url), force=force), unique)
+            return dict(zip(unique, results))
+
+
+def resolve_manifest(
+    manifest: "DownloadManifest",
+    *,
+    cache: Optional[ResolutionCache] = None,
+    config: PlaygroundConfig | None = None,
+    max_workers: int = 8,
+    force: bool = False,
+) -> Dict[str, Dict[str, object]]:
+    """Resolve every URL in ``manifest`` at once, reusing cached answers where still valid."""
+    cache = cache or ResolutionCache.for_config(config or PlaygroundConfig.load())
+    headers: Dict[str, Dict[str, str]] = {}
+    urls = []
+    for item in manifest.items:
+        urls.append(item.url)
+        if item.headers:
+            headers[item.url] = item.headers
+    return cache.resolve_many(urls, headers=headers, max_workers=max_workers, force=force)
@@ -1,17 +1,40 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import os
 import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional
 
 import requests
 
+try:
+    import blake3 as _blake3  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    _blake3 = None
+
+try:
+    import xxhash as _xxhash  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    _xxhash = None
+
+from .resolve import ResolutionCache, head_with_fallback
+
 CHUNK_SIZE = 1024 * 1024
+# Files smaller than this are never split; each segment is at least this big.
+MIN_SEGMENT_SIZE = 32 * 1024 * 1024
+# Segment progress is persisted every this many bytes so resumes lose little work.
+STATE_FLUSH_BYTES = 64 * CHUNK_SIZE
 ProgressCallback = Callable[[Dict[str, float]], None]
 
 
+FAST_HASHES = ("blake3", "xxh3", "blake2b")
+
+
 def compute_sha256(path: Path) -> str:
     h = hashlib.sha256()
     with path.open("rb") as fh:
@@ -20,12 +43,74 @@ def compute_sha256(path: Path) -> str:
     return h.hexdigest()
 
 
-def preview_url(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 15) -> Dict[str, str]:
+def _fast_hasher(name: str):
+    if name == "blake3":
+        if _blake3 is None:
+            raise RuntimeError("The blake3 package is required for blake3 digests")
+        return _blake3.blake3()
+    if name == "xxh3":
+        if _xxhash is None:
+            raise RuntimeError("The xxhash package is required for xxh3 digests")
+        return _xxhash.xxh3_128()
+    if name == "blake2b":
+        return hashlib.blake2b()
+    raise ValueError(f"Unknown fast hash {name!r}; expected one of {FAST_HASHES}")
+
+
+class StreamDigest:
+    """SHA-256 (plus an optional fast dedup digest) fed chunk by chunk as bytes arrive."""
+
+    def __init__(self, fast_hash: Optional[str] = None) -> None:
+        self.fast_hash = fast_hash
+        self.reset()
+
+    def reset(self) -> None:
+        self.sha256 = hashlib.sha256()
+        self.fast = _fast_hasher(self.fast_hash) if self.fast_hash else None
+
+    def update(self, chunk: bytes) -> None:
+        self.sha256.update(chunk)
+        if self.fast is not None:
+            self.fast.update(chunk)
+
+    def update_from_file(self, fh, start: int, end: int) -> None:
+        """Hash bytes ``[start, end)`` of an open binary file."""
+        fh.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError(f"Unexpected end of file while hashing {getattr(fh, 'name', fh)}")
+            self.update(chunk)
+            remaining -= len(chunk)
+
+    def fast_digest(self) -> Optional[str]:
+        if self.fast is None:
+            return None
+        return f"{self.fast_hash}:{self.fast.hexdigest()}"
+
+
+def preview_url(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 15,
+    *,
+    cache: Optional[ResolutionCache] = None,
+) -> Dict[str, str]:
     headers = headers or {}
+    if cache is not None:
+        resolved = cache.resolve(url, headers)
+        if "error" in resolved and "final_url" not in resolved:
+            return {"status_code": "error", "error": str(resolved["error"])}
+        return {
+            "status_code": str(resolved["status_code"]),
+            "final_url": str(resolved["final_url"]),
+            "content_length": str(resolved["size"]) if resolved["size"] is not None else "unknown",
+            "content_type": str(resolved["content_type"] or "unknown"),
+            "cache": str(resolved["cache"]),
+        }
     try:
-        response = requests.head(url, allow_redirects=True, headers=headers, timeout=timeout)
-        if response.status_code >= 400 or "content-length" not in response.headers:
-            response = requests.get(url, allow_redirects=True, headers=headers, stream=True, timeout=timeout)
+        response = head_with_fallback(url, headers, timeout)
         return {
             "status_code": str(response.status_code),
             "final_url": response.url,
@@ -51,6 +136,179 @@ def normalize_server_hash(headers: Dict[str, str]) -> Optional[str]:
     return headers.get("content-md5")
 
 
+def probe_ranges(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 15) -> Dict[str, object]:
+    """HEAD ``url`` and report its final URL, size and whether byte ranges are served."""
+    response = requests.head(url, allow_redirects=True, headers=headers or {}, timeout=timeout)
+    length = response.headers.get("content-length", "")
+    return {
+        "final_url": response.url,
+        "size": int(length) if response.status_code < 400 and length.isdigit() else None,
+        "ranges": response.headers.get("accept-ranges", "").lower() == "bytes",
+        "headers": dict(response.headers),
+    }
+
+
+def _plan_segments(total: int, segments: int) -> List[List[int]]:
+    """Split ``total`` bytes into ``[start, end_inclusive, downloaded]`` triples."""
+    size = -(-total // segments)
+    return [[start, min(start + size, total) - 1, 0] for start in range(0, total, size)]
+
+
+class _RangeIgnored(Exception):
+    """A Range GET came back as a full ``200`` response."""
+
+
+def _load_segment_plan(state_path: Path, total: int) -> Optional[List[List[int]]]:
+    """Return the saved segment plan if the sidecar is intact and matches ``total``."""
+    try:
+        saved = json.loads(state_path.read_text(encoding="utf-8"))
+        if saved["size"] != total:
+            return None
+        plan = [[int(start), int(end), int(done)] for start, end, done in saved["segments"]]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    position = 0
+    for start, end, done in plan:
+        if start != position or end < start or not 0 <= done <= end - start + 1:
+            return None
+        position = end + 1
+    return plan if position == total else None
+
+
+def _download_segmented(
+    url: str,
+    temp_path: Path,
+    total: int,
+    segments: int,
+    *,
+    headers: Dict[str, str],
+    timeout: int,
+    progress_cb: Optional[ProgressCallback],
+    limiter: Optional[threading.Semaphore],
+    digest: StreamDigest,
+) -> None:
+    """Fetch ``url`` as parallel Range requests written in place into ``temp_path``.
+
+    The ``.part`` file is preallocated to ``total`` bytes and every segment
+    writes at its own offset. Per-segment progress is kept in a ``.json``
+    sidecar so an interrupted download resumes each segment where it stopped.
+
+    Segments finish out of order, so ``digest`` is fed by the calling thread
+    following the written prefix of each segment in file order while the
+    downloads continue. The bytes it reads were just written and are normally
+    still in the page cache, so no second pass over the file is needed.
+    """
+    state_path = temp_path.with_suffix(temp_path.suffix + ".json")
+    plan: Optional[List[List[int]]] = None
+    if state_path.exists() and temp_path.exists() and temp_path.stat().st_size == total:
+        plan = _load_segment_plan(state_path, total)
+    if plan is None:
+        plan = _plan_segments(total, segments)
+        with temp_path.open("wb") as fh:
+            fh.truncate(total)
+    lock = threading.Condition()
+    failed = threading.Event()
+    downloaded = [sum(seg[2] for seg in plan)]
+
+    def save_state() -> None:
+        # Segment threads save concurrently; the lock serialises the writes
+        # and the rename keeps a crash from leaving a torn sidecar.
+        with lock:
+            tmp = state_path.with_name(state_path.name + ".tmp")
+            tmp.write_text(json.dumps({"size": total, "segments": plan}), encoding="utf-8")
+            os.replace(tmp, state_path)
+
+    def fetch(segment: List[int]) -> None:
+        # Servers may cap a 206 reply or close early (RFC 7233 allows it),
+        # so keep asking for the rest until the segment is complete.
+        while segment[0] + segment[2] <= segment[1] and not failed.is_set():
+            received = fetch_range(segment)
+            if received == 0 and not failed.is_set():
+                raise IOError(f"Range request for {url} returned no data at byte {segment[0] + segment[2]}")
+
+    def fetch_range(segment: List[int]) -> int:
+        start, end, done = segment
+        request_headers = dict(headers)
+        request_headers["Range"] = f"bytes={start + done}-{end}"
+        received = unflushed = 0
+        with limiter or nullcontext():
+            with requests.get(url, stream=True, headers=request_headers, timeout=timeout) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise _RangeIgnored(url)
+                with temp_path.open("r+b") as fh:
+                    fh.seek(start + done)
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if failed.is_set():
+                            # Another segment failed; stop instead of finishing this one.
+                            return received
+                        chunk = chunk[:end + 1 - (start + done + received)]
+                        if not chunk:
+                            continue
+                        fh.write(chunk)
+                        # The hashing thread reads through its own handle.
+                        fh.flush()
+                        received += len(chunk)
+                        unflushed += len(chunk)
+                        with lock:
+                            segment[2] += len(chunk)
+                            downloaded[0] += len(chunk)
+                            current = downloaded[0]
+                            lock.notify_all()
+                        if unflushed >= STATE_FLUSH_BYTES:
+                            save_state()
+                            unflushed = 0
+                        if progress_cb:
+                            progress_cb({
+                                "downloaded_bytes": current,
+                                "total_bytes": total,
+                                "progress": current / total,
+                            })
+        return received
+
+    def guarded_fetch(segment: List[int]) -> None:
+        try:
+            fetch(segment)
+        except BaseException:
+            failed.set()
+            raise
+        finally:
+            # Wake the hashing thread so it notices a finished segment.
+            with lock:
+                lock.notify_all()
+
+    def follow_hash(futures: List[Future]) -> None:
+        # Unbuffered, so read-ahead never caches bytes a segment has not written yet.
+        with temp_path.open("rb", buffering=0) as fh:
+            for segment, future in zip(plan, futures):
+                position, end = segment[0], segment[1] + 1
+                while position < end:
+                    with lock:
+                        while segment[0] + segment[2] <= position and not failed.is_set() and not future.done():
+                            lock.wait(1.0)
+                        available = segment[0] + segment[2]
+                    if failed.is_set():
+                        return
+                    if available <= position:
+                        # The segment's fetch ended without writing these bytes.
+                        future.result()
+                        raise IOError(f"Segment {segment[0]}-{segment[1]} of {url} ended at byte {available}")
+                    digest.update_from_file(fh, position, available)
+                    position = available
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix="segment") as pool:
+            futures = [pool.submit(guarded_fetch, segment) for segment in plan]
+            follow_hash(futures)
+            for future in futures:
+                future.result()
+    except BaseException:
+        failed.set()
+        save_state()
+        raise
+    state_path.unlink(missing_ok=True)
+
+
 def stream_file(
     url: str,
     dest: Path,
@@ -59,17 +317,69 @@ def stream_file(
     timeout: int = 60,
     expected_sha256: Optional[str] = None,
     progress_cb: Optional[ProgressCallback] = None,
+    segments: int = 1,
+    min_segment_size: int = MIN_SEGMENT_SIZE,
+    limiter: Optional[threading.Semaphore] = None,
+    fast_hash: Optional[str] = None,
 ) -> Dict[str, str]:
+    """Download ``url`` to ``dest`` through a ``.part`` file and verify it.
+
+    With ``segments > 1`` and a server that advertises byte ranges, large
+    files are fetched as parallel Range requests; otherwise a single stream
+    is used and resumed from an existing ``.part`` file. ``limiter`` is held
+    around every HTTP connection so callers can cap per-host concurrency.
+
+    The SHA-256 (and the ``fast_hash`` digest, if requested) is computed while
+    the bytes stream in, so the file is never re-read after download. A
+    mismatch with ``expected_sha256`` is detected before ``dest`` is touched.
+    """
     dest.parent.mkdir(parents=True, exist_ok=True)
     temp_path = dest.with_suffix(dest.suffix + ".part")
-    resume_pos = temp_path.stat().st_size if temp_path.exists() else 0
     request_headers = headers.copy() if headers else {}
+    digest = StreamDigest(fast_hash)
+    if segments > 1:
+        with limiter or nullcontext():
+            probe = probe_ranges(url, request_headers, timeout=timeout)
+        size = probe["size"]
+        if probe["ranges"] and size and size >= 2 * min_segment_size:
+            count = max(1, min(segments, size // min_segment_size))
+            try:
+                _download_segmented(
+                    str(probe["final_url"]),
+                    temp_path,
+                    int(size),
+                    int(count),
+                    headers=request_headers,
+                    timeout=timeout,
+                    progress_cb=progress_cb,
+                    limiter=limiter,
+                    digest=digest,
+                )
+                return _finalize(temp_path, dest, digest, expected_sha256, probe["headers"])
+            except _RangeIgnored:
+                # Advertised ranges but sent the whole file: fall back to one
+                # stream (the sidecar left behind makes it start from zero).
+                digest.reset()
+    state_path = temp_path.with_suffix(temp_path.suffix + ".json")
+    if state_path.exists():
+        # A preallocated segmented ``.part`` cannot be resumed sequentially.
+        temp_path.unlink(missing_ok=True)
+        state_path.unlink()
+    resume_pos = temp_path.stat().st_size if temp_path.exists() else 0
     if resume_pos:
         request_headers["Range"] = f"bytes={resume_pos}-"
-    with requests.get(url, stream=True, headers=request_headers, timeout=timeout) as response:
+    with limiter or nullcontext(), requests.get(url, stream=True, headers=request_headers, timeout=timeout) as response:
         response.raise_for_status()
         total = response.headers.get("content-length")
         total_bytes = int(total) + resume_pos if total and total.isdigit() else None
+        if resume_pos and response.status_code != 206:
+            # The server ignored the Range header and is sending the whole file.
+            resume_pos = 0
+            total_bytes = int(total) if total and total.isdigit() else None
+        if resume_pos:
+            # Seed the hash with the bytes a previous attempt already saved.
+            with temp_path.open("rb") as existing:
+                digest.update_from_file(existing, 0, resume_pos)
         mode = "ab" if resume_pos else "wb"
         downloaded = resume_pos
         with temp_path.open(mode) as fh:
@@ -77,6 +387,7 @@ def stream_file(
                 if not chunk:
                     continue
                 fh.write(chunk)
+                digest.update(chunk)
                 downloaded += len(chunk)
                 if progress_cb:
                     progress_cb({
@@ -84,14 +395,26 @@ def stream_file(
                         "total_bytes": total_bytes or -1,
                         "progress": downloaded / total_bytes if total_bytes else -1,
                     })
-    shutil.move(str(temp_path), str(dest))
-    sha256 = compute_sha256(dest)
-    if expected_sha256 and sha256 != expected_sha256:
-        dest.unlink(missing_ok=True)
+    return _finalize(temp_path, dest, digest, expected_sha256, response.headers)
+
+
+def _finalize(
+    temp_path: Path,
+    dest: Path,
+    digest: StreamDigest,
+    expected_sha256: Optional[str],
+    response_headers: Dict[str, str],
+) -> Dict[str, str]:
+    sha256 = digest.sha256.hexdigest()
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        temp_path.unlink(missing_ok=True)
         raise ValueError(f"SHA256 mismatch: expected {expected_sha256}, got {sha256}")
+    shutil.move(str(temp_path), str(dest))
     metadata = {
         "path": str(dest),
         "sha256": sha256,
-           "server_hash": normalize_server_hash(response.headers),
+        "server_hash": normalize_server_hash(response_headers),
     }
+    if digest.fast is not None:
+        metadata["fast_digest"] = digest.fast_digest()
     return metadata
@@ -1,6 +1,24 @@
 """Flow composition helpers."""
 
-from .composer import compose_flow, load_flow_from_drive
+from .compiler import CompileOptions, FlowCompileError, compile_flow, compile_flows
+from .composer import build_flow, compose_flow, load_flow_from_drive, new_flow_id
 from .regression import assert_required_nodes, load_and_validate
+from .sweep import SweepGrid, compose_sweep, enqueue_flows, read_bundle, write_bundle
 
-__all__ = ["compose_flow", "load_flow_from_drive", "assert_required_nodes", "load_and_validate"]
+__all__ = [
+    "CompileOptions",
+    "FlowCompileError",
+    "compile_flow",
+    "compile_flows",
+    "build_flow",
+    "compose_flow",
+    "load_flow_from_drive",
+    "new_flow_id",
+    "assert_required_nodes",
+    "load_and_validate",
+    "SweepGrid",
+    "compose_sweep",
+    "enqueue_flows",
+    "read_bundle",
+    "write_bundle",
+]
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ApiPrompt = Dict[str, Dict[str, Any]]
+Link = List[Any]
+
+# Friendly sampler labels (A1111/Diffusers style) mapped to KSampler names.
+SAMPLER_ALIASES = {
+    "ddim": "ddim",
+    "euler": "euler",
+    "euler a": "euler_ancestral",
+    "euler_a": "euler_ancestral",
+    "heun": "heun",
+    "lms": "lms",
+    "dpm2": "dpm_2",
+    "dpm2 a": "dpm_2_ancestral",
+    "dpm++ 2m": "dpmpp_2m",
+    "dpm++ 2m sde": "dpmpp_2m_sde",
+    "dpm++ sde": "dpmpp_sde",
+    "dpm++ 2s a": "dpmpp_2s_ancestral",
+    "unipc": "uni_pc",
+    "lcm": "lcm",
+}
+
+MODEL_EXTENSIONS = (".safetensors", ".ckpt", ".pt", ".pth", ".bin", ".gguf")
+MAX_SEED = 0xFFFFFFFFFFFFFFFF
+
+
+class FlowCompileError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompileOptions:
+    """Defaults for everything the playground flow schema does not carry."""
+
+    checkpoints: Dict[str, str] = field(default_factory=dict)
+    default_checkpoint: Optional[str] = None
+    negative_prompt: str = ""
+    width: int = 512
+    height: int = 512
+    batch_size: int = 1
+    cfg: float = 7.0
+    scheduler: str = "normal"
+    denoise: float = 1.0
+    lora_strength: float = 1.0
+    filename_prefix: str = "playground"
+
+
+def sampler_name(label: str) -> str:
+    key = label.strip().lower()
+    return SAMPLER_ALIASES.get(key, key.replace(" ", "_"))
+
+
+def _model_file(name: str) -> str:
+    return name if name.lower().endswith(MODEL_EXTENSIONS) else f"{name}.safetensors"
+
+
+def _parse_loras(value: Any, default_strength: float) -> Tuple[Tuple[str, float, float], ...]:
+    """Normalise ``lora`` params: a name, ``"name:0.8"``, a dict, or a list of those."""
+    if not value:
+        return ()
+    entries = value if isinstance(value, (list, tuple)) else [value]
+    loras = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            strength = float(entry.get("strength", default_strength))
+            loras.append((
+                _model_file(entry["name"]),
+                float(entry.get("strength_model", strength)),
+                float(entry.get("strength_clip", strength)),
+            ))
+            continue
+        text = str(entry)
+        name, sep, strength = text.rpartition(":")
+        if not sep:
+            name, strength = text, ""
+        try:
+            weight = float(strength) if strength else default_strength
+        except ValueError:
+            name, weight = text, default_strength
+        loras.append((_model_file(name), weight, weight))
+    return tuple(loras)
+
+
+@functools.lru_cache(maxsize=256)
+def _loader_subgraph(
+    checkpoint: str, loras: Tuple[Tuple[str, float, float], ...]
+) -> Tuple[str, Tuple[str, int], Tuple[str, int], Tuple[str, int]]:
+    """Build (and memoize) the checkpoint + LoRA chain shared by every flow using it.
+
+    Node ids are fixed by position in the chain, so two prompts that load the
+    same model and LoRAs contain byte-identical upstream nodes and the
+    executor's cache skips reloading them. The nodes are returned as JSON so
+    every caller decodes a private copy.
+    """
+    nodes: ApiPrompt = {"ckpt": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": checkpoint}}}
+    model = ("ckpt", 0)
+    clip = ("ckpt", 1)
+    for index, (name, strength_model, strength_clip) in enumerate(loras, 1):
+        node_id = f"lora_{index}"
+        nodes[node_id] = {
+            "class_type": "LoraLoader",
+            "inputs": {
+                "model": model,
+                "clip": clip,
+                "lora_name": name,
+                "strength_model": strength_model,
+                "strength_clip": strength_clip,
+            },
+        }
+        model, clip = (node_id, 0), (node_id, 1)
+    return json.dumps(nodes, sort_keys=True), model, clip, ("ckpt", 2)
+
+
+def _resolve_seed(seed: Any, flow_id: str) -> int:
+    seed = int(seed) if seed is not None else -1
+    if seed >= 0:
+        return seed & MAX_SEED
+    # ``-1`` means "any seed"; derive it from the flow id so recompiling the
+    # same flow is reproducible and stays cacheable.
+    return int(hashlib.sha256(flow_id.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def _generation_node(flow: Dict[str, Any]) -> Dict[str, Any]:
+    nodes = flow.get("nodes") or []
+    for node in nodes:
+        if node.get("type") == "StableDiffusion":
+            return node
+    raise FlowCompileError("Flow has no StableDiffusion node to compile")
+
+
+def compile_flow(flow: Dict[str, Any], options: Optional[CompileOptions] = None) -> ApiPrompt:
+    """Translate a playground flow into a ComfyUI API-format prompt.
+
+    The result can be posted to ``/prompt`` or handed straight to
+    ``PromptExecutor.execute``.
+    """
+    options = options or CompileOptions()
+    meta = flow.get("meta", {})
+    params = _generation_node(flow).get("params", {})
+    flow_id = str(meta.get("id") or json.dumps(params, sort_keys=True))
+
+    model_key = params.get("model") or meta.get("model") or options.default_checkpoint
+    if not model_key:
+        raise FlowCompileError(f"Flow {flow_id} does not name a model and no default checkpoint is set")
+    checkpoint = _model_file(options.checkpoints.get(model_key, model_key))
+    loras = _parse_loras(params.get("lora"), options.lora_strength)
+
+    loader_json, *links = _loader_subgraph(checkpoint, loras)
+    model, clip, vae = (list(link) for link in links)
+    prompt: ApiPrompt = json.loads(loader_json)
+    prompt["positive"] = {"class_type": "CLIPTextEncode", "inputs": {"text": params.get("prompt", ""), "clip": clip}}
+    prompt["negative"] = {
+        "class_type": "CLIPTextEncode",
+        "inputs": {"text": params.get("negative_prompt", options.negative_prompt), "clip": clip},
+    }
+    prompt["latent"] = {
+        "class_type": "EmptyLatentImage",
+        "inputs": {
+            "width": int(params.get("width", options.width)),
+            "height": int(params.get("height", options.height)),
+            "batch_size": int(params.get("batch_size", options.batch_size)),
+        },
+    }
+    prompt["sampler"] = {
+        "class_type": "KSampler",
+        "inputs": {
+            "model": model,
+            "seed": _resolve_seed(params.get("seed"), flow_id),
+            "steps": int(params.get("steps", 20)),
+            "cfg": float(params.get("cfg", options.cfg)),
+            "sampler_name": sampler_name(str(params.get("sampler") or "euler")),
+            "scheduler": params.get("scheduler", options.scheduler),
+            "positive": ["positive", 0],
+            "negative": ["negative", 0],
+            "latent_image": ["latent", 0],
+            "denoise": float(params.get("denoise", options.denoise)),
+        },
+    }
+    prompt["decode"] = {"class_type": "VAEDecode", "inputs": {"samples": ["sampler", 0], "vae": vae}}
+    image: Link = ["decode", 0]
+    upscaler = params.get("upscaler")
+    if upscaler:
+        prompt["upscale_loader"] = {"class_type": "UpscaleModelLoader", "inputs": {"model_name": _model_file(upscaler)}}
+        prompt["upscale"] = {
+            "class_type": "ImageUpscaleWithModel",
+            "inputs": {"upscale_model": ["upscale_loader", 0], "image": image},
+        }
+        image = ["upscale", 0]
+    prefix = f"{options.filename_prefix}/{meta['sweep']['id']}" if meta.get("sweep") else options.filename_prefix
+    prompt["save"] = {"class_type": "SaveImage", "inputs": {"images": image, "filename_prefix": prefix}}
+    return prompt
+
+
+def compile_flows(flows: Iterable[Dict[str, Any]], options: Optional[CompileOptions] = None) -> Iterator[ApiPrompt]:
+    for flow in flows:
+        yield compile_flow(flow, options)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import time
+import uuid
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -14,7 +15,12 @@ def _ensure_flow_dir(config: PlaygroundConfig) -> Path:
     return flow_dir
 
 
-def compose_flow(
+def new_flow_id() -> str:
+    """Sortable, collision-free flow id: creation second plus a random suffix."""
+    return f"{int(time.time())}_{uuid.uuid4().hex[:12]}"
+
+
+def build_flow(
     prompt: str,
     *,
     model_key: Optional[str] = None,
@@ -24,16 +30,15 @@ def compose_flow(
     lora: Optional[str] = None,
     upscaler: Optional[str] = None,
     fmt: str = "comfyui",
-    config: Optional[PlaygroundConfig] = None,
-) -> tuple[str, Dict[str, Any]]:
-    """Compose a minimal ComfyUI flow JSON and persist it to Drive."""
-    cfg = config or PlaygroundConfig.load()
-    flow_dir = _ensure_flow_dir(cfg)
-    timestamp = int(time.time())
-    flow = {
+    flow_id: Optional[str] = None,
+    created_at: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Build a minimal ComfyUI flow dict without touching Drive."""
+    return {
         "meta": {
+            "id": flow_id or new_flow_id(),
             "prompt": prompt,
-            "created_at": timestamp,
+            "created_at": int(time.time()) if created_at is None else created_at,
             "format": fmt,
             "model": model_key,
         },
@@ -53,7 +58,34 @@ def compose_flow(
             }
         ],
     }
-    path = flow_dir / f"flow_{timestamp}.json"
+
+
+def compose_flow(
+    prompt: str,
+    *,
+    model_key: Optional[str] = None,
+    sampler: str = "DDIM",
+    steps: int = 20,
+    seed: int = -1,
+    lora: Optional[str] = None,
+    upscaler: Optional[str] = None,
+    fmt: str = "comfyui",
+    config: Optional[PlaygroundConfig] = None,
+) -> tuple[str, Dict[str, Any]]:
+    """Compose a minimal ComfyUI flow JSON and persist it to Drive."""
+    cfg = config or PlaygroundConfig.load()
+    flow_dir = _ensure_flow_dir(cfg)
+    flow = build_flow(
+        prompt,
+        model_key=model_key,
+        sampler=sampler,
+        steps=steps,
+        seed=seed,
+        lora=lora,
+        upscaler=upscaler,
+        fmt=fmt,
+    )
+    path = flow_dir / f"flow_{flow['meta']['id']}.json"
     with path.open("w", encoding="utf-8") as fh:
         json.dump(flow, fh, indent=2)
     return str(path), flow
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..config import PlaygroundConfig
+from ..queue.api import DEFAULT_LANE, get_store
+from ..templates.store import TemplateStore
+from .composer import _ensure_flow_dir, build_flow
+
+BUNDLE_CHUNK_SIZE = 500
+
+# Axes vary slowest-to-fastest in this order, so consecutive flows share a
+# prompt and model state and differ mostly by seed.
+SWEEP_AXES = ("prompts", "loras", "samplers", "steps", "seeds")
+
+
+@dataclass
+class SweepGrid:
+    """Cartesian grid of generation parameters; iterating it is lazy."""
+
+    prompts: Sequence[str]
+    seeds: Sequence[int] = (-1,)
+    steps: Sequence[int] = (20,)
+    samplers: Sequence[str] = ("DDIM",)
+    loras: Sequence[Optional[str]] = (None,)
+    model_key: Optional[str] = None
+    upscaler: Optional[str] = None
+    fmt: str = "comfyui"
+    template: Optional[str] = None
+    sweep_id: str = field(default_factory=lambda: f"{int(time.time())}_{uuid.uuid4().hex[:8]}")
+
+    def __post_init__(self) -> None:
+        if isinstance(self.prompts, str):
+            self.prompts = [self.prompts]
+        for axis in SWEEP_AXES:
+            if not getattr(self, axis):
+                raise ValueError(f"Sweep axis {axis!r} is empty")
+
+    def __len__(self) -> int:
+        total = 1
+        for axis in SWEEP_AXES:
+            total *= len(getattr(self, axis))
+        return total
+
+    def _prompts(self, config: Optional[PlaygroundConfig]) -> Sequence[str]:
+        if self.template is None:
+            return self.prompts
+        # One compiled render for every prompt rather than one format per flow.
+        return TemplateStore.for_config(config).render(self.template, list(self.prompts))
+
+    def flows(self, config: Optional[PlaygroundConfig] = None) -> Iterator[Dict[str, Any]]:
+        """Yield one flow per grid point, each with id ``<sweep_id>_<index>``."""
+        created_at = int(time.time())
+        combos = itertools.product(self._prompts(config), self.loras, self.samplers, self.steps, self.seeds)
+        for index, (prompt, lora, sampler, steps, seed) in enumerate(combos):
+            flow = build_flow(
+                prompt,
+                model_key=self.model_key,
+                sampler=sampler,
+                steps=steps,
+                seed=seed,
+                lora=lora,
+                upscaler=self.upscaler,
+                fmt=self.fmt,
+                flow_id=f"{self.sweep_id}_{index:06d}",
+                created_at=created_at,
+            )
+            flow["meta"]["sweep"] = {"id": self.sweep_id, "index": index, "size": len(self)}
+            yield flow
+
+
+def write_bundle(
+    flows: Iterable[Dict[str, Any]],
+    *,
+    path: Optional[Path] = None,
+    chunk_size: int = BUNDLE_CHUNK_SIZE,
+    config: Optional[PlaygroundConfig] = None,
+) -> Tuple[Path, int]:
+    """Write ``flows`` as one JSONL bundle, ``chunk_size`` lines per write call.
+
+    The bundle is staged next to its destination and moved into place once
+    complete, so readers never see a partial file. Returns the path and the
+    number of flows written.
+    """
+    if path is None:
+        path = _ensure_flow_dir(config or PlaygroundConfig.load()) / f"sweep_{uuid.uuid4().hex[:12]}.jsonl"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            chunk: List[str] = []
+            for flow in flows:
+                chunk.append(json.dumps(flow, separators=(",", ":")))
+                if len(chunk) >= chunk_size:
+                    fh.write("\n".join(chunk) + "\n")
+                    count += len(chunk)
+                    chunk.clear()
+            if chunk:
+                fh.write("\n".join(chunk) + "\n")
+                count += len(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path, count
+
+
+def read_bundle(path: Path) -> Iterator[Dict[str, Any]]:
+    with Path(path).open("r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def enqueue_flows(
+    flows: Iterable[Dict[str, Any]],
+    *,
+    priority: int = 0,
+    lane: str = DEFAULT_LANE,
+    config: Optional[PlaygroundConfig] = None,
+) -> int:
+    """Add every flow to the playground queue in a single transaction."""
+    return get_store(config).enqueue_many(flows, priority=priority, lane=lane)
+
+
+def compose_sweep(
+    grid: SweepGrid,
+    *,
+    bundle: bool = True,
+    enqueue: bool = False,
+    priority: int = 0,
+    lane: str = DEFAULT_LANE,
+    config: Optional[PlaygroundConfig] = None,
+) -> Dict[str, Any]:
+    """Materialise ``grid`` as a bundle on Drive and/or straight into the queue.
+
+    When both are requested, the flows are enqueued from the finished bundle
+    so the queue and the file always hold the same ids.
+    """
+    cfg = config or PlaygroundConfig.load()
+    result: Dict[str, Any] = {"sweep_id": grid.sweep_id, "size": len(grid)}
+    if bundle:
+        path = _ensure_flow_dir(cfg) / f"sweep_{grid.sweep_id}.jsonl"
+        path, written = write_bundle(grid.flows(cfg), path=path)
+        result.update(bundle=str(path), written=written)
+    if enqueue:
+        source = read_bundle(Path(result["bundle"])) if bundle else grid.flows(cfg)
+        result["enqueued"] = enqueue_flows(source, priority=priority, lane=lane, config=cfg)
+    return result
@@ -1,44 +1,144 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
 import os
-import shutil
-from datetime import datetime, timedelta
+import tempfile
+import time
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Any, Dict, Iterable, List, Optional
 
+from .artifacts import DEFAULT_WORKERS, ArtifactCatalog
 from .config import PlaygroundConfig
 
 # Rare comment: include OS environment so validation mirrors runtime behaviour.
 
+BACKUP_INDEX = "index.json"
+MANIFEST_PATTERNS = ("*.json", "*.jsonl", "*.ndjson")
 
-def prune_artifacts(*, older_than_hours: int = 24, config: PlaygroundConfig | None = None) -> int:
+
+def prune_artifacts(
+    *,
+    older_than_hours: Optional[float] = 24,
+    max_gb: Optional[float] = None,
+    policy: str = "oldest",
+    full_sync: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    config: PlaygroundConfig | None = None,
+) -> int:
+    """Delete expired artifacts, then evict by ``policy`` until the rest fit in ``max_gb``.
+
+    Candidates come from the artifact catalog (refreshed incrementally first),
+    and deletions run on ``workers`` threads. ``max_gb`` defaults to the
+    configured ``artifacts_quota_gb``. Returns the number of files removed.
+    """
     cfg = config or PlaygroundConfig.load()
-    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    catalog = ArtifactCatalog.for_config(cfg, workers=workers)
+    catalog.sync(full=full_sync)
     removed = 0
-    for path in cfg.artifacts_dir.glob("**/*"):
-        if path.is_file() and datetime.utcfromtimestamp(path.stat().st_mtime) < cutoff:
-            path.unlink()
-            removed += 1
+    if older_than_hours is not None:
+        expired = catalog.older_than(time.time() - older_than_hours * 3600)
+        removed += catalog.delete(expired)["files"]
+    quota = max_gb if max_gb is not None else cfg.artifacts_quota_gb
+    if quota is not None:
+        removed += catalog.delete(catalog.over_quota(int(quota * 1024**3), policy=policy))["files"]
     return removed
 
 
+def _atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _load_backup_index(backup_dir: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with (backup_dir / BACKUP_INDEX).open("r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _backup_object(backup_dir: Path, digest: str) -> Path:
+    return backup_dir / "objects" / digest[:2] / f"{digest}.gz"
+
+
 def rotate_manifest_backups(max_backups: int = 5, *, config: PlaygroundConfig | None = None) -> Dict[str, int]:
+    """Back up manifests that changed since the last call, keeping ``max_backups`` versions each.
+
+    Backups are gzip objects named by the sha256 of the manifest, so identical
+    versions (of the same or different manifests) are stored once. The
+    ``index.json`` next to them lists every manifest's versions and the stat
+    signature it was last seen with; a manifest whose signature is unchanged
+    is not even read, and only changed manifests are rotated. Objects are
+    compressed without a timestamp, so the same content always produces the
+    same bytes and syncs to Drive as an unchanged file.
+    """
     cfg = config or PlaygroundConfig.load()
-    summary: Dict[str, int] = {"rotated": 0}
-    for manifest in cfg.manifests_dir.glob("*.json"):
-        backup_dir = manifest.parent / "backups"
-        backup_dir.mkdir(exist_ok=True)
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        target = backup_dir / f"{manifest.stem}_{timestamp}.json"
-        shutil.copy2(manifest, target)
+    backup_dir = cfg.manifests_dir / "backups"
+    index = _load_backup_index(backup_dir)
+    summary: Dict[str, int] = {"rotated": 0, "unchanged": 0, "pruned": 0}
+    released: List[str] = []
+    dirty = False
+    manifests = [path for pattern in MANIFEST_PATTERNS for path in cfg.manifests_dir.glob(pattern)]
+    for manifest in manifests:
+        stat = manifest.stat()
+        signature = [stat.st_mtime_ns, stat.st_size]
+        entry = index.setdefault(manifest.name, {"signature": None, "versions": []})
+        if entry["signature"] == signature:
+            summary["unchanged"] += 1
+            continue
+        data = manifest.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        entry["signature"] = signature
+        dirty = True
+        versions = entry["versions"]
+        if versions and versions[-1]["sha256"] == digest:
+            summary["unchanged"] += 1
+            continue
+        target = _backup_object(backup_dir, digest)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(target, gzip.compress(data, mtime=0))
+        versions.append({"sha256": digest, "size": len(data), "created_at": time.time()})
         summary["rotated"] += 1
-        backups = sorted(backup_dir.glob(f"{manifest.stem}_*.json"))
-        for stale in backups[:-max_backups]:
-            stale.unlink()
+        if len(versions) > max_backups:
+            released.extend(version["sha256"] for version in versions[:-max_backups])
+            del versions[:-max_backups]
+    if dirty:
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(backup_dir / BACKUP_INDEX, json.dumps(index, indent=2).encode("utf-8"))
+    if released:
+        referenced = {version["sha256"] for entry in index.values() for version in entry["versions"]}
+        for digest in set(released) - referenced:
+            _backup_object(backup_dir, digest).unlink(missing_ok=True)
+            summary["pruned"] += 1
     return summary
 
 
+def restore_manifest_backup(
+    name: str, *, version: int = -1, destination: Optional[Path] = None, config: PlaygroundConfig | None = None
+) -> Path:
+    """Write backup ``version`` of manifest ``name`` (newest by default) to ``destination`` or back in place."""
+    cfg = config or PlaygroundConfig.load()
+    backup_dir = cfg.manifests_dir / "backups"
+    versions = _load_backup_index(backup_dir).get(name, {}).get("versions", [])
+    try:
+        digest = versions[version]["sha256"]
+    except IndexError:
+        raise KeyError(f"No backup {version} for manifest {name!r}") from None
+    target = Path(destination) if destination else cfg.manifests_dir / name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(target, gzip.decompress(_backup_object(backup_dir, digest).read_bytes()))
+    return target
+
+
 def validate_env_vars(required: Iterable[str], *, config: PlaygroundConfig | None = None) -> Dict[str, bool]:
     cfg = config or PlaygroundConfig.load()
     merged: Dict[str, str] = {}
@@ -1,28 +1,63 @@
 """Queue helpers for ComfyUI job orchestration."""
 
+from .notify import QueueNotifier
 from .api import (
+    DEFAULT_LANE,
+    QueueStore,
+    LeaseHeartbeat,
+    get_store,
+    default_worker_id,
+    heartbeat,
+    iter_items,
+    wait_for_item,
+    reclaim_expired,
+    close_stores,
     enqueue,
+    enqueue_many,
     dequeue,
+    dequeue_batch,
     list_items,
     init_db,
     mark_done,
     mark_failed,
+    mark_many,
     retry_item,
     purge_completed,
+    apply_retention,
+    compact,
+    queue_counts,
     set_paused,
+    set_lane_weight,
     is_paused,
 )
 
 __all__ = [
+    "QueueNotifier",
+    "DEFAULT_LANE",
+    "QueueStore",
+    "LeaseHeartbeat",
+    "get_store",
+    "default_worker_id",
+    "heartbeat",
+    "iter_items",
+    "wait_for_item",
+    "reclaim_expired",
+    "close_stores",
     "enqueue",
+    "enqueue_many",
     "dequeue",
+    "dequeue_batch",
     "list_items",
     "init_db",
     "mark_done",
     "mark_failed",
+    "mark_many",
     "retry_item",
     "purge_completed",
+    "apply_retention",
+    "compact",
+    "queue_counts",
     "set_paused",
+    "set_lane_weight",
     "is_paused",
 ]
-}
\ No newline at end of file
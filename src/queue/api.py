@@ -1,166 +1,825 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import os
+import socket
 import sqlite3
 import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
 
 from ..config import PlaygroundConfig
+from .archive import write_archive
+from .notify import DEFAULT_POLL_INTERVAL, QueueNotifier
 
-_DB_LOCK = threading.Lock()
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_json TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        created_at REAL DEFAULT (strftime('%s','now')),
+        updated_at REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS metadata (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS lanes (
+        lane TEXT PRIMARY KEY,
+        weight REAL NOT NULL DEFAULT 1.0,
+        pass REAL NOT NULL DEFAULT 0.0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_queue_status_id ON queue (status, id)",
+)
 
+# Columns added after the original schema; applied with ALTER TABLE on old databases.
+MIGRATIONS = (
+    ("worker_id", "TEXT"),
+    ("lease_expires_at", "REAL"),
+    ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+    ("priority", "INTEGER NOT NULL DEFAULT 0"),
+    ("lane", "TEXT NOT NULL DEFAULT 'default'"),
+    ("result_json", "TEXT"),
+)
 
-def _db_path(config: PlaygroundConfig) -> Path:
-    config.ensure_directories()
-    path = config.queue_db_path
-    path.parent.mkdir(parents=True, exist_ok=True)
-    return path
+POST_MIGRATION_SCHEMA = (
+    "CREATE INDEX IF NOT EXISTS idx_queue_status_lease ON queue (status, lease_expires_at)",
+    "CREATE INDEX IF NOT EXISTS idx_queue_lane_pick ON queue (status, lane, priority DESC, id)",
+    "CREATE INDEX IF NOT EXISTS idx_queue_touched ON queue (COALESCE(updated_at, created_at))",
+    # Rows that predate lanes were migrated into the default lane.
+    "INSERT OR IGNORE INTO lanes (lane) VALUES ('default')",
+)
 
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_LANE = "default"
+ARCHIVE_BATCH_SIZE = 1000
 
-def _connect(config: PlaygroundConfig) -> sqlite3.Connection:
-    return sqlite3.connect(str(_db_path(config)))
+PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
 
+_ITEM_COLUMNS = (
+    "id, item_json, status, created_at, updated_at, worker_id, lease_expires_at, attempts, priority, lane, result_json"
+)
 
-def init_db(config: PlaygroundConfig | None = None) -> None:
-    cfg = config or PlaygroundConfig.load()
-    with _connect(cfg) as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS queue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_json TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'pending',
-                created_at REAL DEFAULT (strftime('%s','now')),
-                updated_at REAL
-            )
-            """
-        )
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS metadata (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            )
-            """
-        )
-        conn.commit()
 
+def _row_to_dict(row: tuple) -> Dict:
+    return {
+        "id": row[0],
+        "item": json.loads(row[1]),
+        "status": row[2],
+        "created_at": row[3],
+        "updated_at": row[4],
+        "worker_id": row[5],
+        "lease_expires_at": row[6],
+        "attempts": row[7],
+        "priority": row[8],
+        "lane": row[9],
+        "result": json.loads(row[10]) if row[10] else None,
+    }
 
-def _execute(query: str, params: tuple = (), *, config: PlaygroundConfig | None = None) -> None:
-    cfg = config or PlaygroundConfig.load()
-    with _DB_LOCK:
-        with _connect(cfg) as conn:
-            conn.execute(query, params)
-            conn.commit()
 
+def default_worker_id() -> str:
+    """Identify the calling thread across hosts, processes and kernels."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
 
-def enqueue(item: Dict, *, config: PlaygroundConfig | None = None) -> int:
-    cfg = config or PlaygroundConfig.load()
-    init_db(cfg)
-    with _DB_LOCK:
-        with _connect(cfg) as conn:
+
+class QueueStore:
+    """SQLite-backed queue holding one persistent connection per thread.
+
+    The schema is created once per store and the database runs in WAL mode so
+    readers never block the writer. Drive/FUSE mounts that cannot provide the
+    shared-memory file WAL needs fall back to SQLite's default journal.
+
+    Items are handed out under a lease: ``claim`` records the worker id and an
+    expiry inside a ``BEGIN IMMEDIATE`` transaction, so concurrent processes
+    cannot claim the same row. Workers renew with ``heartbeat``; rows whose
+    lease lapses (a crashed worker) go back to ``pending`` on the next claim,
+    or to ``failed`` once ``max_attempts`` claims have been used up.
+
+    Every item belongs to a lane and carries a priority. Claims share capacity
+    between lanes with pending work by stride scheduling (a weighted fair
+    queue): each lane keeps a virtual ``pass`` that advances by ``1 / weight``
+    per claimed item, and the active lane with the smallest pass is served
+    next. Inside a lane, higher priority wins and ties are FIFO. Lane state
+    lives in the ``lanes`` table so all processes share one schedule.
+
+    Idle consumers block in :meth:`wait_for_item` (or iterate
+    :meth:`iter_items`) instead of polling; every write that can make an item
+    claimable wakes them through the store's :class:`QueueNotifier`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        timeout: float = 30.0,
+        journal_mode: str = "WAL",
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: Optional[int] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        self.path = Path(path)
+        self.timeout = timeout
+        self.journal_mode = journal_mode
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.notifier = QueueNotifier(self.path, poll_interval=poll_interval)
+        self._init_schema()
+
+    def _open(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly by ``transaction``.
+        conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        # Only takes effect on a brand-new file; ``compact`` converts old ones.
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        try:
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        except sqlite3.OperationalError:  # pragma: no cover - depends on the filesystem
+            pass
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _init_schema(self) -> None:
+        with self.transaction("IMMEDIATE") as tx:
+            for statement in SCHEMA:
+                tx.execute(statement)
+            existing = {row[1] for row in tx.execute("PRAGMA table_info(queue)")}
+            for column, ddl in MIGRATIONS:
+                if column not in existing:
+                    tx.execute(f"ALTER TABLE queue ADD COLUMN {column} {ddl}")
+            for statement in POST_MIGRATION_SCHEMA:
+                tx.execute(statement)
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        if self._pid != os.getpid():
+            # Connections must not be shared across fork(); start a fresh pool.
+            self._local = threading.local()
+            with self._lock:
+                self._connections = []
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, mode: str = "DEFERRED") -> Iterator[sqlite3.Connection]:
+        conn = self.connection()
+        if conn.in_transaction:
+            # Nested use joins the outer transaction.
+            yield conn
+            return
+        conn.execute(f"BEGIN {mode}")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            # COMMIT itself can fail (SQLITE_BUSY, deferred constraints) and
+            # leave the transaction open; never hand the connection back so.
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:  # pragma: no cover - closed from another thread
+                pass
+        self._local = threading.local()
+        self.notifier.close()
+
+    def enqueue(self, item: Dict, *, priority: int = 0, lane: str = DEFAULT_LANE) -> int:
+        with self.transaction("IMMEDIATE") as conn:
+            conn.execute("INSERT OR IGNORE INTO lanes (lane) VALUES (?)", (lane,))
             cursor = conn.execute(
-                "INSERT INTO queue (item_json, status) VALUES (?, ?)",
-                (json.dumps(item), "pending"),
+                "INSERT INTO queue (item_json, status, priority, lane) VALUES (?, 'pending', ?, ?)",
+                (json.dumps(item), priority, lane),
             )
-            conn.commit()
-            return int(cursor.lastrowid)
+        self.notifier.notify()
+        return int(cursor.lastrowid)
 
+    def enqueue_many(self, items: Iterable[Dict], *, priority: int = 0, lane: str = DEFAULT_LANE) -> int:
+        """Insert ``items`` in a single transaction and return how many were added.
 
-def dequeue(*, config: PlaygroundConfig | None = None) -> Optional[Dict]:
-    cfg = config or PlaygroundConfig.load()
-    init_db(cfg)
-    with _DB_LOCK:
-        with _connect(cfg) as conn:
-            paused = _is_paused(conn)
-            if paused:
-                return None
+        ``items`` is consumed lazily, so generators stream straight into SQLite.
+        An exception raised while iterating rolls back the whole batch.
+        """
+        with self.transaction("IMMEDIATE") as conn:
+            conn.execute("INSERT OR IGNORE INTO lanes (lane) VALUES (?)", (lane,))
+            cursor = conn.executemany(
+                "INSERT INTO queue (item_json, status, priority, lane) VALUES (?, 'pending', ?, ?)",
+                ((json.dumps(item), priority, lane) for item in items),
+            )
+            count = max(cursor.rowcount, 0)
+        if count:
+            self.notifier.notify()
+        return count
+
+    def set_lane_weight(self, lane: str, weight: float) -> None:
+        """Give ``lane`` a share of claims proportional to ``weight``."""
+        if weight <= 0:
+            raise ValueError("Lane weight must be positive")
+        with self.transaction("IMMEDIATE") as conn:
+            conn.execute(
+                "INSERT INTO lanes (lane, weight) VALUES (?, ?) ON CONFLICT(lane) DO UPDATE SET weight=excluded.weight",
+                (lane, weight),
+            )
+
+    def lane_weights(self) -> Dict[str, float]:
+        rows = self.connection().execute("SELECT lane, weight FROM lanes ORDER BY lane").fetchall()
+        return {lane: weight for lane, weight in rows}
+
+    def _pick_next(self, conn: sqlite3.Connection) -> Optional[tuple]:
+        # Lanes are few, so ordering them in Python is cheap; each probe below
+        # is a single seek on idx_queue_lane_pick.
+        vtime = float(_get_meta(conn, "lane_vtime") or 0.0)
+        lanes = conn.execute("SELECT lane, weight, pass FROM lanes").fetchall()
+        for lane, weight, lane_pass in sorted(lanes, key=lambda row: (max(row[2], vtime), row[0])):
             row = conn.execute(
-                "SELECT id, item_json FROM queue WHERE status='pending' ORDER BY id LIMIT 1"
+                "SELECT id, item_json FROM queue WHERE status='pending' AND lane=? "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (lane,),
             ).fetchone()
-            if not row:
+            if row is None:
+                continue
+            # A lane returning from idle starts at the current virtual time
+            # instead of spending credit it banked while it had no work.
+            start = max(lane_pass, vtime)
+            conn.execute("UPDATE lanes SET pass=? WHERE lane=?", (start + 1.0 / weight, lane))
+            _set_meta(conn, "lane_vtime", str(start))
+            return row
+        return None
+
+    def _reclaim_expired(self, conn: sqlite3.Connection, now: float) -> int:
+        reclaimed = 0
+        if self.max_attempts is not None:
+            reclaimed += conn.execute(
+                "UPDATE queue SET status='failed', worker_id=NULL, lease_expires_at=NULL, updated_at=? "
+                "WHERE status='processing' AND lease_expires_at < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            ).rowcount
+        reclaimed += conn.execute(
+            "UPDATE queue SET status='pending', worker_id=NULL, lease_expires_at=NULL, updated_at=? "
+            "WHERE status='processing' AND lease_expires_at < ?",
+            (now, now),
+        ).rowcount
+        return reclaimed
+
+    def reclaim_expired(self) -> int:
+        """Return rows whose lease lapsed to the queue; returns the number touched."""
+        with self.transaction("IMMEDIATE") as conn:
+            reclaimed = self._reclaim_expired(conn, time.time())
+        if reclaimed:
+            self.notifier.notify()
+        return reclaimed
+
+    def claim_batch(
+        self,
+        limit: int,
+        worker_id: Optional[str] = None,
+        *,
+        lease_seconds: Optional[float] = None,
+    ) -> List[Dict]:
+        """Lease up to ``limit`` pending items to ``worker_id`` in one transaction."""
+        worker = worker_id or default_worker_id()
+        lease = self.lease_seconds if lease_seconds is None else lease_seconds
+        with self.transaction("IMMEDIATE") as conn:
+            if limit <= 0 or _is_paused(conn):
+                return []
+            now = time.time()
+            self._reclaim_expired(conn, now)
+            expires = now + lease
+            rows = []
+            while len(rows) < limit:
+                row = self._pick_next(conn)
+                if row is None:
+                    break
+                conn.execute(
+                    "UPDATE queue SET status='processing', worker_id=?, lease_expires_at=?, "
+                    "attempts=attempts+1, updated_at=? WHERE id=?",
+                    (worker, expires, now, row[0]),
+                )
+                rows.append(row)
+        return [
+            {"id": row[0], "item": json.loads(row[1]), "worker_id": worker, "lease_expires_at": expires}
+            for row in rows
+        ]
+
+    def claim(self, worker_id: Optional[str] = None, *, lease_seconds: Optional[float] = None) -> Optional[Dict]:
+        rows = self.claim_batch(1, worker_id, lease_seconds=lease_seconds)
+        return rows[0] if rows else None
+
+    def dequeue(self) -> Optional[Dict]:
+        return self.claim()
+
+    def wait_for_item(
+        self,
+        timeout: Optional[float] = None,
+        worker_id: Optional[str] = None,
+        *,
+        lease_seconds: Optional[float] = None,
+    ) -> Optional[Dict]:
+        """Claim the next item, blocking up to ``timeout`` seconds (forever if ``None``)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.notifier.ensure_listener()
+        while True:
+            # Read the generation before claiming so a notify that lands
+            # between the empty claim and the wait is not lost.
+            generation = self.notifier.generation
+            item = self.claim(worker_id, lease_seconds=lease_seconds)
+            if item is not None:
+                return item
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
                 return None
-            conn.execute(
-                "UPDATE queue SET status='processing', updated_at=strftime('%s','now') WHERE id=?",
-                (row[0],),
+            self.notifier.wait(generation, remaining)
+
+    async def iter_items(
+        self,
+        worker_id: Optional[str] = None,
+        *,
+        lease_seconds: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> AsyncIterator[Dict]:
+        """Yield claimed items as they arrive; stop after ``idle_timeout`` seconds without work."""
+        worker = worker_id or default_worker_id()
+        loop = asyncio.get_running_loop()
+        idle_since = time.monotonic()
+        while True:
+            # Wait in bounded slices so cancelling the consumer never leaves
+            # an executor thread blocked for long.
+            slice_timeout = self.notifier.poll_interval
+            if idle_timeout is not None:
+                slice_timeout = min(slice_timeout, max(idle_since + idle_timeout - time.monotonic(), 0.0))
+            item = await loop.run_in_executor(
+                None,
+                lambda: self.wait_for_item(slice_timeout, worker, lease_seconds=lease_seconds),
             )
-            conn.commit()
-            return {"id": row[0], "item": json.loads(row[1])}
+            if item is not None:
+                yield item
+                idle_since = time.monotonic()
+            elif idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                return
 
+    def heartbeat(self, item_id: int, worker_id: str, *, lease_seconds: Optional[float] = None) -> bool:
+        """Extend the lease on ``item_id``; ``False`` means the worker lost it."""
+        lease = self.lease_seconds if lease_seconds is None else lease_seconds
+        now = time.time()
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE queue SET lease_expires_at=?, updated_at=? "
+                "WHERE id=? AND worker_id=? AND status='processing'",
+                (now + lease, now, item_id, worker_id),
+            )
+            return cursor.rowcount == 1
 
-def mark_done(item_id: int, *, config: PlaygroundConfig | None = None) -> None:
-    _execute(
-        "UPDATE queue SET status='done', updated_at=strftime('%s','now') WHERE id=?",
-        (item_id,),
-        config=config,
-    )
+    def set_status(
+        self,
+        item_id: int,
+        status: str,
+        *,
+        worker_id: Optional[str] = None,
+        result: Optional[Dict] = None,
+    ) -> bool:
+        """Move ``item_id`` to ``status`` and drop its lease.
+
+        When ``worker_id`` is given the update only applies while that worker
+        still holds the lease, so a reclaimed item is not finished twice.
+        ``result`` (outputs, errors, timings) is stored alongside the item.
+        """
+        query = "UPDATE queue SET status=?, worker_id=NULL, lease_expires_at=NULL, updated_at=?"
+        params: tuple = (status, time.time())
+        if result is not None:
+            query += ", result_json=?"
+            params += (json.dumps(result),)
+        query += " WHERE id=?"
+        params += (item_id,)
+        if worker_id is not None:
+            query += " AND worker_id=? AND status='processing'"
+            params += (worker_id,)
+        with self.transaction() as conn:
+            updated = conn.execute(query, params).rowcount == 1
+        if updated and status == "pending":
+            self.notifier.notify()
+        return updated
+
+    def set_status_many(self, item_ids: Iterable[int], status: str, *, worker_id: Optional[str] = None) -> int:
+        """Bulk variant of :meth:`set_status`; returns the number of rows updated."""
+        query = "UPDATE queue SET status=?, worker_id=NULL, lease_expires_at=NULL, updated_at=? WHERE id=?"
+        now = time.time()
+        if worker_id is None:
+            params = ((status, now, item_id) for item_id in item_ids)
+        else:
+            query += " AND worker_id=? AND status='processing'"
+            params = ((status, now, item_id, worker_id) for item_id in item_ids)
+        with self.transaction("IMMEDIATE") as conn:
+            updated = max(conn.executemany(query, params).rowcount, 0)
+        if updated and status == "pending":
+            self.notifier.notify()
+        return updated
+
+    def _retention_filter(
+        self,
+        conn: sqlite3.Connection,
+        keep_last: Optional[int],
+        older_than_hours: Optional[float],
+    ) -> Optional[tuple]:
+        clauses = ["status IN ('done','failed')"]
+        params: tuple = ()
+        if keep_last is not None:
+            boundary = conn.execute(
+                "SELECT id FROM queue WHERE status IN ('done','failed') ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (keep_last,),
+            ).fetchone()
+            if boundary is None:
+                return None
+            clauses.append("id <= ?")
+            params += (boundary[0],)
+        if older_than_hours is not None:
+            clauses.append("COALESCE(updated_at, created_at) < ?")
+            params += (time.time() - older_than_hours * 3600,)
+        return " AND ".join(clauses), params
+
+    def purge_completed(
+        self,
+        *,
+        keep_last: Optional[int] = None,
+        older_than_hours: Optional[float] = None,
+        archive_dir: Optional[Path] = None,
+        fmt: str = "jsonl",
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+    ) -> int:
+        """Delete finished rows outside the retention window; returns the number removed.
+
+        A row is kept while it is among the newest ``keep_last`` finished rows
+        or younger than ``older_than_hours``; with neither set every finished
+        row goes. Rows are removed in batches of ``batch_size``, one
+        transaction each. With ``archive_dir`` every batch is written there
+        (see :func:`write_archive`) before it is deleted, so a failed archive
+        write keeps that batch and everything after it in the queue; batches
+        already archived stay deleted.
+        """
+        with self.transaction() as conn:
+            retention = self._retention_filter(conn, keep_last, older_than_hours)
+        if retention is None:
+            return 0
+        where, params = retention
+        removed = 0
+        last_id = 0
+        while True:
+            with self.transaction("IMMEDIATE") as conn:
+                rows = conn.execute(
+                    f"SELECT {_ITEM_COLUMNS} FROM queue WHERE {where} AND id > ? ORDER BY id LIMIT ?",
+                    params + (last_id, batch_size),
+                ).fetchall()
+                if not rows:
+                    break
+                if archive_dir is not None:
+                    write_archive([_row_to_dict(row) for row in rows], Path(archive_dir), fmt=fmt)
+                conn.executemany("DELETE FROM queue WHERE id=?", [(row[0],) for row in rows])
+            removed += len(rows)
+            last_id = rows[-1][0]
+        return removed
+
+    def compact(self, pages: Optional[int] = None) -> None:
+        """Return free pages to the filesystem.
+
+        Databases created before incremental auto-vacuum was enabled are
+        converted with one full ``VACUUM``; after that only ``pages`` free
+        pages (all of them when ``None``) are released per call.
+        """
+        conn = self.connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            return
+        if pages is None:
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+        else:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+
+    def list_items(
+        self,
+        *,
+        status: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        since: Optional[float] = None,
+        after_id: Optional[int] = None,
+    ) -> List[Dict]:
+        """Return rows in id order, optionally one page at a time.
+
+        ``since`` keeps rows created or updated at or after that Unix time, so
+        dashboards can fetch only what changed since their last refresh.
+        ``after_id`` pages by primary key, which stays cheap deep into large
+        queues where ``offset`` has to skip every earlier row.
+        """
+        clauses = []
+        params: tuple = ()
+        if after_id is not None:
+            clauses.append("id > ?")
+            params += (after_id,)
+        if status:
+            clauses.append("status=?")
+            params += (status,)
+        if since is not None:
+            clauses.append("COALESCE(updated_at, created_at) >= ?")
+            params += (since,)
+        query = f"SELECT {_ITEM_COLUMNS} FROM queue"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id LIMIT ? OFFSET ?"
+        params += (-1 if limit is None else limit, offset)
+        rows = self.connection().execute(query, params).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.connection().execute("SELECT status, COUNT(*) FROM queue GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def set_paused(self, paused: bool) -> None:
+        with self.transaction() as conn:
+            _set_meta(conn, "paused", "true" if paused else "false")
+        if not paused:
+            self.notifier.notify()
+
+    def is_paused(self) -> bool:
+        return _is_paused(self.connection())
+
+
+class LeaseHeartbeat:
+    """Renew a claimed item's lease from a daemon thread while work runs.
 
+    ``lost`` is set when a renewal fails, i.e. the lease expired and the item
+    was reclaimed; long-running workers should check it before writing results.
+    """
 
-def mark_failed(item_id: int, *, config: PlaygroundConfig | None = None) -> None:
-    _execute(
-        "UPDATE queue SET status='failed', updated_at=strftime('%s','now') WHERE id=?",
-        (item_id,),
-        config=config,
+    def __init__(self, store: QueueStore, item_id: int, worker_id: str, *, interval: Optional[float] = None) -> None:
+        self.store = store
+        self.item_id = item_id
+        self.worker_id = worker_id
+        self.interval = interval if interval is not None else store.lease_seconds / 3
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self.store.heartbeat(self.item_id, self.worker_id):
+                self.lost.set()
+                return
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+_STORES: Dict[str, QueueStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(config: PlaygroundConfig | None = None) -> QueueStore:
+    """Return the shared :class:`QueueStore` for ``config.queue_db_path``."""
+    cfg = config or PlaygroundConfig.load()
+    key = str(cfg.queue_db_path)
+    store = _STORES.get(key)
+    if store is None:
+        with _STORES_LOCK:
+            store = _STORES.get(key)
+            if store is None:
+                cfg.ensure_directories()
+                store = QueueStore(cfg.queue_db_path)
+                _STORES[key] = store
+    return store
+
+
+def close_stores() -> None:
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+        _STORES.clear()
+    for store in stores:
+        store.close()
+
+
+def init_db(config: PlaygroundConfig | None = None) -> None:
+    get_store(config)
+
+
+def enqueue(
+    item: Dict,
+    *,
+    priority: int = 0,
+    lane: str = DEFAULT_LANE,
+    config: PlaygroundConfig | None = None,
+) -> int:
+    return get_store(config).enqueue(item, priority=priority, lane=lane)
+
+
+def enqueue_many(
+    items: Iterable[Dict],
+    *,
+    priority: int = 0,
+    lane: str = DEFAULT_LANE,
+    config: PlaygroundConfig | None = None,
+) -> int:
+    return get_store(config).enqueue_many(items, priority=priority, lane=lane)
+
+
+def set_lane_weight(lane: str, weight: float, *, config: PlaygroundConfig | None = None) -> None:
+    get_store(config).set_lane_weight(lane, weight)
+
+
+def dequeue(
+    *,
+    worker_id: Optional[str] = None,
+    lease_seconds: Optional[float] = None,
+    config: PlaygroundConfig | None = None,
+) -> Optional[Dict]:
+    return get_store(config).claim(worker_id, lease_seconds=lease_seconds)
+
+
+def dequeue_batch(
+    limit: int,
+    *,
+    worker_id: Optional[str] = None,
+    lease_seconds: Optional[float] = None,
+    config: PlaygroundConfig | None = None,
+) -> List[Dict]:
+    return get_store(config).claim_batch(limit, worker_id, lease_seconds=lease_seconds)
+
+
+def wait_for_item(
+    timeout: Optional[float] = None,
+    *,
+    worker_id: Optional[str] = None,
+    lease_seconds: Optional[float] = None,
+    config: PlaygroundConfig | None = None,
+) -> Optional[Dict]:
+    return get_store(config).wait_for_item(timeout, worker_id, lease_seconds=lease_seconds)
+
+
+def iter_items(
+    *,
+    worker_id: Optional[str] = None,
+    lease_seconds: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    config: PlaygroundConfig | None = None,
+) -> AsyncIterator[Dict]:
+    return get_store(config).iter_items(worker_id, lease_seconds=lease_seconds, idle_timeout=idle_timeout)
+
+
+def heartbeat(
+    item_id: int,
+    worker_id: str,
+    *,
+    lease_seconds: Optional[float] = None,
+    config: PlaygroundConfig | None = None,
+) -> bool:
+    return get_store(config).heartbeat(item_id, worker_id, lease_seconds=lease_seconds)
+
+
+def reclaim_expired(*, config: PlaygroundConfig | None = None) -> int:
+    return get_store(config).reclaim_expired()
+
+
+def mark_done(
+    item_id: int,
+    *,
+    worker_id: Optional[str] = None,
+    result: Optional[Dict] = None,
+    config: PlaygroundConfig | None = None,
+) -> bool:
+    return get_store(config).set_status(item_id, "done", worker_id=worker_id, result=result)
+
+
+def mark_failed(
+    item_id: int,
+    *,
+    worker_id: Optional[str] = None,
+    result: Optional[Dict] = None,
+    config: PlaygroundConfig | None = None,
+) -> bool:
+    return get_store(config).set_status(item_id, "failed", worker_id=worker_id, result=result)
+
+
+def mark_many(
+    item_ids: Iterable[int],
+    status: str,
+    *,
+    worker_id: Optional[str] = None,
+    config: PlaygroundConfig | None = None,
+) -> int:
+    return get_store(config).set_status_many(item_ids, status, worker_id=worker_id)
+
+
+def retry_item(item_id: int, *, config: PlaygroundConfig | None = None) -> bool:
+    return get_store(config).set_status(item_id, "pending")
+
+
+def _archive_dir(config: PlaygroundConfig) -> Path:
+    return config.artifacts_dir / "queue_archive"
+
+
+def purge_completed(
+    *,
+    keep_last: Optional[int] = None,
+    older_than_hours: Optional[float] = None,
+    archive: bool = False,
+    fmt: str = "jsonl",
+    config: PlaygroundConfig | None = None,
+) -> int:
+    cfg = config or PlaygroundConfig.load()
+    return get_store(cfg).purge_completed(
+        keep_last=keep_last,
+        older_than_hours=older_than_hours,
+        archive_dir=_archive_dir(cfg) if archive else None,
+        fmt=fmt,
     )
 
 
-def retry_item(item_id: int, *, config: PlaygroundConfig | None = None) -> None:
-    _execute(
-        "UPDATE queue SET status='pending', updated_at=strftime('%s','now') WHERE id=?",
-        (item_id,),
-        config=config,
+def apply_retention(*, config: PlaygroundConfig | None = None) -> int:
+    """Archive and drop finished rows per the config's retention settings, then compact."""
+    cfg = config or PlaygroundConfig.load()
+    store = get_store(cfg)
+    removed = store.purge_completed(
+        keep_last=cfg.queue_keep_last,
+        older_than_hours=cfg.queue_retention_hours,
+        archive_dir=_archive_dir(cfg),
+        fmt=cfg.queue_archive_format,
     )
+    if removed:
+        store.compact()
+    return removed
 
 
-def purge_completed(*, config: PlaygroundConfig | None = None) -> None:
-    _execute("DELETE FROM queue WHERE status IN ('done','failed')", config=config)
+def compact(*, pages: Optional[int] = None, config: PlaygroundConfig | None = None) -> None:
+    get_store(config).compact(pages)
 
 
-def list_items(*, status: Optional[str] = None, config: PlaygroundConfig | None = None) -> List[Dict]:
-    cfg = config or PlaygroundConfig.load()
-    init_db(cfg)
-    with _DB_LOCK:
-        with _connect(cfg) as conn:
-            if status:
-                rows = conn.execute(
-                    "SELECT id, item_json, status, created_at, updated_at FROM queue WHERE status=? ORDER BY id",
-                    (status,),
-                ).fetchall()
-            else:
-                rows = conn.execute(
-                    "SELECT id, item_json, status, created_at, updated_at FROM queue ORDER BY id",
-                ).fetchall()
-    return [
-        {
-            "id": row[0],
-            "item": json.loads(row[1]),
-            "status": row[2],
-            "created_at": row[3],
-            "updated_at": row[4],
-        }
-        for row in rows
-    ]
+def list_items(
+    *,
+    status: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    since: Optional[float] = None,
+    after_id: Optional[int] = None,
+    config: PlaygroundConfig | None = None,
+) -> List[Dict]:
+    return get_store(config).list_items(status=status, offset=offset, limit=limit, since=since, after_id=after_id)
+
+
+def queue_counts(*, config: PlaygroundConfig | None = None) -> Dict[str, int]:
+    return get_store(config).counts()
 
 
 def set_paused(paused: bool, *, config: PlaygroundConfig | None = None) -> None:
-    cfg = config or PlaygroundConfig.load()
-    init_db(cfg)
-    value = "true" if paused else "false"
-    _execute(
-        "INSERT INTO metadata(key,value) VALUES('paused', ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-        (value,),
-        config=cfg,
+    get_store(config).set_paused(paused)
+
+
+def _get_meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM metadata WHERE key=?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute(
+        "INSERT INTO metadata(key,value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+        (key, value),
     )
 
 
 def _is_paused(conn: sqlite3.Connection) -> bool:
-    row = conn.execute("SELECT value FROM metadata WHERE key='paused'").fetchone()
-    return (row and row[0] == "true") or False
+    return _get_meta(conn, "paused") == "true"
 
 
 def is_paused(*, config: PlaygroundConfig | None = None) -> bool:
-    cfg = config or PlaygroundConfig.load()
-    init_db(cfg)
-    with _connect(cfg) as conn:
-        return _is_paused(conn)
+    return get_store(config).is_paused()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import gzip
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency in notebooks
+    pa = None
+    pq = None
+
+ARCHIVE_FORMATS = ("jsonl", "parquet")
+
+
+def _partition(row: Dict) -> str:
+    stamp = row.get("updated_at") or row.get("created_at") or time.time()
+    return datetime.fromtimestamp(float(stamp), tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def write_archive(rows: Iterable[Dict], archive_dir: Path, *, fmt: str = "jsonl") -> List[Path]:
+    """Append queue rows to date-partitioned archive files and return the files touched.
+
+    JSONL archives are gzip members appended to ``<date>.jsonl.gz`` (readable
+    with a single ``gzip.open``); Parquet archives get one file per call and
+    partition because Parquet files cannot be appended to.
+    """
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format {fmt!r}; expected one of {ARCHIVE_FORMATS}")
+    if fmt == "parquet" and pa is None:
+        raise RuntimeError("pyarrow is required to write Parquet archives")
+    partitions: Dict[str, List[Dict]] = defaultdict(list)
+    for row in rows:
+        partitions[_partition(row)].append(row)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    for day, day_rows in sorted(partitions.items()):
+        if fmt == "jsonl":
+            target = archive_dir / f"{day}.jsonl.gz"
+            with gzip.open(target, "at", encoding="utf-8") as fh:
+                for row in day_rows:
+                    fh.write(json.dumps(row) + "\n")
+        else:
+            target = archive_dir / f"{day}-{time.time_ns()}.parquet"
+            table = pa.Table.from_pylist(
+                [{**row, "item": json.dumps(row["item"]), "result": json.dumps(row.get("result"))} for row in day_rows]
+            )
+            pq.write_table(table, target, compression="zstd")
+        written.append(target)
+    return written
+
+
+def read_archive(path: Path) -> List[Dict]:
+    """Load rows back from a single archive file."""
+    if path.suffix == ".parquet":
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet archives")
+        rows = pq.read_table(path).to_pylist()
+        return [
+            {**row, "item": json.loads(row["item"]), "result": json.loads(row.get("result") or "null")} for row in rows
+        ]
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Upper bound on a single blocking wait. Even with notifications, waiters
+# re-check the queue this often so expired leases and producers on other hosts
+# (which cannot reach our local sockets) are still picked up.
+DEFAULT_POLL_INTERVAL = 5.0
+
+_HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+
+def _channel_dir(db_path: Path) -> Path:
+    # Sockets cannot live on Drive/FUSE mounts, so the rendezvous directory is
+    # kept in local temp storage and keyed by the database path.
+    digest = hashlib.sha1(str(Path(db_path).resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"comfy-queue-{digest}"
+
+
+class QueueNotifier:
+    """Wake queue waiters without polling SQLite.
+
+    Producers in the same process bump a generation counter guarded by a
+    condition variable. Producers in other processes on the same host send a
+    one-byte datagram to every waiting process's Unix socket; a daemon thread
+    in the receiving process turns it into a condition notify. Where Unix
+    sockets are unavailable, waits fall back to ``poll_interval`` slices.
+    """
+
+    def __init__(self, db_path: Path, *, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.poll_interval = poll_interval
+        self.channel_dir = _channel_dir(db_path)
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._listener_lock = threading.Lock()
+        self._listener_pid: Optional[int] = None
+        self._socket_path: Optional[Path] = None
+        self._receiver: Optional[socket.socket] = None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def _wake_local(self) -> None:
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def notify(self) -> None:
+        """Signal that new work may be claimable."""
+        self._wake_local()
+        if not _HAS_UNIX_SOCKETS or not self.channel_dir.is_dir():
+            return
+        own = self._socket_path.name if self._listener_pid == os.getpid() and self._socket_path else None
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sender.setblocking(False)
+        try:
+            for entry in os.scandir(self.channel_dir):
+                if entry.name == own or not entry.name.endswith(".sock"):
+                    continue
+                try:
+                    sender.sendto(b"1", entry.path)
+                except BlockingIOError:
+                    # The receiver already has an unread wake-up queued.
+                    pass
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The listening process is gone; drop its stale socket.
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+                except OSError:
+                    pass
+        finally:
+            sender.close()
+
+    def ensure_listener(self) -> None:
+        """Start receiving cross-process wake-ups in this process."""
+        if not _HAS_UNIX_SOCKETS or self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            try:
+                self.channel_dir.mkdir(parents=True, exist_ok=True)
+                path = self.channel_dir / f"{os.getpid()}-{id(self):x}.sock"
+                if path.exists():
+                    path.unlink()
+                receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                receiver.bind(str(path))
+            except OSError:
+                # No usable socket here; waits degrade to bounded polling.
+                self._listener_pid = os.getpid()
+                self._socket_path = None
+                return
+            self._socket_path = path
+            self._receiver = receiver
+            self._listener_pid = os.getpid()
+            threading.Thread(target=self._listen, args=(receiver,), daemon=True).start()
+
+    def _listen(self, receiver: socket.socket) -> None:
+        while True:
+            try:
+                data = receiver.recv(64)
+            except OSError:
+                return
+            if not data:
+                # ``close`` shut the socket down.
+                return
+            self._wake_local()
+
+    def wait(self, generation: int, timeout: Optional[float] = None) -> bool:
+        """Block until the generation moves past ``generation`` or ``timeout`` expires.
+
+        Returns ``True`` when woken by a notification. Each wait is capped at
+        ``poll_interval`` so callers should simply re-check the queue.
+        """
+        self.ensure_listener()
+        limit = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+        deadline = time.monotonic() + max(limit, 0.0)
+        with self._cond:
+            while self._generation == generation:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self) -> None:
+        if self._listener_pid == os.getpid():
+            if self._socket_path is not None:
+                try:
+                    self._socket_path.unlink()
+                except OSError:
+                    pass
+            if self._receiver is not None:
+                try:
+                    self._receiver.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                self._receiver.close()
+        self._socket_path = None
+        self._receiver = None
+        self._listener_pid = None
@@ -3,15 +3,30 @@
 from .api import (
     get_prompt_templates,
     save_prompt_templates,
+    get_template,
+    templates_by_category,
     list_categories,
     add_template,
     delete_template,
+    import_templates,
+    export_templates,
+    compile_template,
+    render_template,
 )
+from .store import CompiledTemplate, TemplateStore
 
 __all__ = [
     "get_prompt_templates",
     "save_prompt_templates",
+    "get_template",
+    "templates_by_category",
     "list_categories",
     "add_template",
     "delete_template",
+    "import_templates",
+    "export_templates",
+    "compile_template",
+    "render_template",
+    "CompiledTemplate",
+    "TemplateStore",
 ]
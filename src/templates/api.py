@@ -1,59 +1,66 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Union
 
 from ..config import PlaygroundConfig
-
-DEFAULT_TEMPLATES = [
-    {"name": "Photorealistic", "template": "Photorealistic photo of {prompt}", "category": "General"},
-    {"name": "Cinematic", "template": "Cinematic poster of {prompt}", "category": "General"},
-    {"name": "Studio Portrait", "template": "Studio portrait of {prompt}", "category": "Portrait"},
-    {"name": "Fantasy", "template": "Fantasy illustration of {prompt}", "category": "Art"},
-    {"name": "Minimal", "template": "{prompt}", "category": "General"},
-]
-
-
-def _templates_path(config: PlaygroundConfig) -> str:
-    config.ensure_directories()
-    path = config.config_dir / "prompt_templates.json"
-    if not path.exists():
-        with path.open("w", encoding="utf-8") as fh:
-            json.dump(DEFAULT_TEMPLATES, fh, indent=2)
-    return str(path)
+from .store import DEFAULT_TEMPLATES, CompiledTemplate, TemplateStore  # noqa: F401
 
 
 def get_prompt_templates(config: PlaygroundConfig | None = None) -> List[Dict[str, str]]:
-    cfg = config or PlaygroundConfig.load()
-    path = _templates_path(cfg)
-    with open(path, "r", encoding="utf-8") as fh:
-        return json.load(fh)
+    return TemplateStore.for_config(config).all()
 
 
 def save_prompt_templates(templates: List[Dict[str, str]], *, config: PlaygroundConfig | None = None) -> bool:
-    cfg = config or PlaygroundConfig.load()
-    path = _templates_path(cfg)
-    with open(path, "w", encoding="utf-8") as fh:
-        json.dump(templates, fh, indent=2)
+    TemplateStore.for_config(config).replace_all(templates)
     return True
 
 
+def get_template(name: str, *, config: PlaygroundConfig | None = None) -> Dict[str, str] | None:
+    return TemplateStore.for_config(config).get(name)
+
+
+def templates_by_category(category: str, *, config: PlaygroundConfig | None = None) -> List[Dict[str, str]]:
+    return TemplateStore.for_config(config).by_category(category)
+
+
 def list_categories(templates: List[Dict[str, str]] | None = None, *, config: PlaygroundConfig | None = None) -> List[str]:
-    data = templates or get_prompt_templates(config=config)
-    return sorted({item.get("category", "General") for item in data})
+    if templates:
+        return sorted({item.get("category", "General") for item in templates})
+    return TemplateStore.for_config(config).categories()
 
 
 def add_template(template: Dict[str, str], *, config: PlaygroundConfig | None = None) -> None:
-    data = get_prompt_templates(config=config)
-    data.append(template)
-    save_prompt_templates(data, config=config)
+    TemplateStore.for_config(config).add(template)
 
 
 def delete_template(name: str, *, config: PlaygroundConfig | None = None) -> bool:
-    data = get_prompt_templates(config=config)
-    updated = [item for item in data if item.get("name") != name]
-    if len(updated) == len(data):
-        return False
-    save_prompt_templates(updated, config=config)
-    return True
+    return TemplateStore.for_config(config).delete(name)
+
+
+def import_templates(
+    templates: Union[Path, Iterable[Dict[str, str]]],
+    *,
+    overwrite: bool = True,
+    config: PlaygroundConfig | None = None,
+) -> int:
+    return TemplateStore.for_config(config).import_templates(templates, overwrite=overwrite)
+
+
+def export_templates(path: Path, *, category: str | None = None, config: PlaygroundConfig | None = None) -> int:
+    return TemplateStore.for_config(config).export_templates(path, category=category)
+
+
+def compile_template(name: str, *, config: PlaygroundConfig | None = None) -> CompiledTemplate:
+    return TemplateStore.for_config(config).compile(name)
+
+
+def render_template(
+    name: str,
+    prompts: Union[str, Sequence[str]],
+    *,
+    config: PlaygroundConfig | None = None,
+    **fields: object,
+) -> Union[str, List[str]]:
+    """Expand template ``name`` against one prompt or a whole batch of prompts."""
+    return TemplateStore.for_config(config).render(name, prompts, **fields)
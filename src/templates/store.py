@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import os
+import string
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from ..config import PlaygroundConfig
+
+DEFAULT_CATEGORY = "General"
+PROMPT_FIELD = "prompt"
+TEMPLATES_FILE = "prompt_templates.json"
+
+DEFAULT_TEMPLATES = [
+    {"name": "Photorealistic", "template": "Photorealistic photo of {prompt}", "category": "General"},
+    {"name": "Cinematic", "template": "Cinematic poster of {prompt}", "category": "General"},
+    {"name": "Studio Portrait", "template": "Studio portrait of {prompt}", "category": "Portrait"},
+    {"name": "Fantasy", "template": "Fantasy illustration of {prompt}", "category": "Art"},
+    {"name": "Minimal", "template": "{prompt}", "category": "General"},
+]
+
+Template = Dict[str, str]
+
+_STORES: Dict[Path, "TemplateStore"] = {}
+_STORES_LOCK = threading.Lock()
+
+
+class CompiledTemplate:
+    """A template string parsed once and rendered many times.
+
+    ``render_many`` binds every field except ``prompt`` up front, leaving the
+    literal chunks around each ``{prompt}``; a prompt is then rendered with a
+    single ``str.join``. Templates using format specs, conversions or
+    attribute/index lookups fall back to ``str.format_map``.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self._segments: List[Union[str, Tuple[str, str, Optional[str]]]] = []
+        self.fields: List[str] = []
+        self._simple = True
+        for literal, name, spec, conversion in string.Formatter().parse(source):
+            if literal:
+                self._segments.append(literal)
+            if name is None:
+                continue
+            if not name.isidentifier() or spec or conversion:
+                self._simple = False
+            self._segments.append((name, spec or "", conversion))
+            if name not in self.fields:
+                self.fields.append(name)
+
+    def _chunks(self, fields: Dict[str, object]) -> List[str]:
+        chunks = [""]
+        for segment in self._segments:
+            if isinstance(segment, str):
+                chunks[-1] += segment
+            elif segment[0] == PROMPT_FIELD:
+                chunks.append("")
+            else:
+                try:
+                    chunks[-1] += str(fields[segment[0]])
+                except KeyError:
+                    raise KeyError(f"Template {self.source!r} needs field {segment[0]!r}") from None
+        return chunks
+
+    def render(self, prompt: str, **fields: object) -> str:
+        return self.render_many([prompt], **fields)[0]
+
+    def render_many(self, prompts: Iterable[str], **fields: object) -> List[str]:
+        if not self._simple:
+            return [self.source.format_map({**fields, PROMPT_FIELD: prompt}) for prompt in prompts]
+        chunks = self._chunks(fields)
+        if len(chunks) == 1:
+            return [chunks[0] for _ in prompts]
+        if len(chunks) == 2:
+            head, tail = chunks
+            return [head + prompt + tail for prompt in prompts]
+        return [prompt.join(chunks) for prompt in prompts]
+
+
+def _validate(template: Template) -> Template:
+    name, body = template.get("name"), template.get("template")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Template needs a non-empty 'name'")
+    if not isinstance(body, str):
+        raise ValueError(f"Template {name!r} needs a 'template' string")
+    try:
+        CompiledTemplate(body)
+    except ValueError as exc:
+        raise ValueError(f"Template {name!r} is malformed: {exc}") from None
+    return {**template, "category": template.get("category") or DEFAULT_CATEGORY}
+
+
+class TemplateStore:
+    """In-memory prompt templates indexed by name and category.
+
+    The JSON file stays the source of truth: every change is written through
+    atomically (temp file plus ``os.replace``), and edits made to the file by
+    another process are picked up on the next read via its mtime. Entries the
+    index cannot hold (no usable name, or an earlier duplicate of a name) are
+    kept as they are in ``all()`` and written back on every flush.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._by_name: Dict[str, Template] = {}
+        self._unindexed: List[Template] = []
+        self._by_category: Dict[str, List[str]] = {}
+        self._compiled: Dict[str, CompiledTemplate] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def for_config(cls, config: PlaygroundConfig | None = None) -> "TemplateStore":
+        cfg = config or PlaygroundConfig.load()
+        cfg.ensure_directories()
+        path = cfg.config_dir / TEMPLATES_FILE
+        with _STORES_LOCK:
+            store = _STORES.get(path)
+            if store is None:
+                store = _STORES[path] = cls(path)
+            return store
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _index(self, templates: Iterable[Template]) -> None:
+        self._by_name = {}
+        self._unindexed = []
+        for template in templates:
+            name = template.get("name") if isinstance(template, dict) else None
+            if not isinstance(name, str) or not name:
+                self._unindexed.append(template)
+                continue
+            shadowed = self._by_name.pop(name, None)
+            if shadowed is not None:
+                # The last entry wins lookups, as before; the earlier one is kept.
+                self._unindexed.append(shadowed)
+            self._by_name[name] = template
+        self._reindex_categories()
+        self._compiled.clear()
+
+    def _reindex_categories(self) -> None:
+        self._by_category = {}
+        for name, template in self._by_name.items():
+            self._by_category.setdefault(template.get("category", DEFAULT_CATEGORY), []).append(name)
+
+    def _sync(self) -> None:
+        signature = self._stat()
+        if signature is not None and signature == self._signature:
+            return
+        if signature is None:
+            self._index(DEFAULT_TEMPLATES)
+            self._flush()
+            return
+        with self.path.open("r", encoding="utf-8") as fh:
+            self._index(json.load(fh))
+        self._signature = signature
+
+    def _flush(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(list(self._by_name.values()) + self._unindexed, fh, indent=2)
+            os.replace(tmp, self.path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._signature = self._stat()
+
+    def all(self) -> List[Template]:
+        with self._lock:
+            self._sync()
+            indexed = [dict(template) for template in self._by_name.values()]
+            return indexed + [dict(t) if isinstance(t, dict) else t for t in self._unindexed]
+
+    def get(self, name: str) -> Optional[Template]:
+        with self._lock:
+            self._sync()
+            template = self._by_name.get(name)
+            return dict(template) if template else None
+
+    def categories(self) -> List[str]:
+        with self._lock:
+            self._sync()
+            return sorted(self._by_category)
+
+    def by_category(self, category: str) -> List[Template]:
+        with self._lock:
+            self._sync()
+            return [dict(self._by_name[name]) for name in self._by_category.get(category, [])]
+
+    def add(self, template: Template) -> None:
+        """Insert ``template``, replacing any existing template with the same name."""
+        self.import_templates([template])
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            self._sync()
+            if self._by_name.pop(name, None) is None:
+                return False
+            self._compiled.pop(name, None)
+            self._reindex_categories()
+            self._flush()
+            return True
+
+    def replace_all(self, templates: Iterable[Template]) -> None:
+        validated = [_validate(template) for template in templates]
+        with self._lock:
+            self._index(validated)
+            self._flush()
+
+    def import_templates(self, templates: Union[Path, Iterable[Template]], *, overwrite: bool = True) -> int:
+        """Merge many templates (or a JSON export file) with a single write; returns how many were stored."""
+        if isinstance(templates, (str, Path)):
+            with Path(templates).open("r", encoding="utf-8") as fh:
+                templates = json.load(fh)
+        validated = [_validate(template) for template in templates]
+        with self._lock:
+            self._sync()
+            stored = 0
+            for template in validated:
+                if not overwrite and template["name"] in self._by_name:
+                    continue
+                self._by_name[template["name"]] = template
+                self._compiled.pop(template["name"], None)
+                stored += 1
+            if stored:
+                self._reindex_categories()
+                self._flush()
+            return stored
+
+    def export_templates(self, path: Path, *, category: Optional[str] = None) -> int:
+        templates = self.by_category(category) if category else self.all()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with Path(path).open("w", encoding="utf-8") as fh:
+            json.dump(templates, fh, indent=2)
+        return len(templates)
+
+    def compile(self, name: str) -> CompiledTemplate:
+        with self._lock:
+            self._sync()
+            compiled = self._compiled.get(name)
+            if compiled is None:
+                if name not in self._by_name:
+                    raise KeyError(f"Unknown template {name!r}")
+                compiled = self._compiled[name] = CompiledTemplate(self._by_name[name]["template"])
+            return compiled
+
+    def render(self, name: str, prompts: Union[str, Sequence[str]], **fields: object) -> Union[str, List[str]]:
+        """Expand template ``name`` for one prompt, or for a whole list of prompts at once."""
+        compiled = self.compile(name)
+        if isinstance(prompts, str):
+            return compiled.render(prompts, **fields)
+        return compiled.render_many(prompts, **fields)
@@ -0,0 +1,279 @@
+"""Headless worker that runs playground queue items through ComfyUI in-process."""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import logging
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .artifacts import ArtifactCatalog
+from .config import PlaygroundConfig
+from .flows.compiler import CompileOptions, compile_flow
+from .queue.api import DEFAULT_LEASE_SECONDS, LeaseHeartbeat, default_worker_id, get_store
+
+GC_INTERVAL_SECONDS = 10.0
+CACHE_TYPES = ("classic", "lru", "ram", "none")
+EXECUTION_ORDERS = ("ux", "critical-path")
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class HeadlessServer:
+    """The slice of ``PromptServer`` that ``PromptExecutor`` touches, minus aiohttp and websockets."""
+
+    def __init__(self, on_event: Optional[EventCallback] = None) -> None:
+        self.client_id = None
+        self.last_node_id = None
+        self.last_prompt_id = None
+        self.sockets_metadata: Dict[str, Any] = {}
+        self.on_event = on_event
+
+    def send_sync(self, event: str, data: Any, sid: Optional[str] = None) -> None:
+        if self.on_event is not None and isinstance(event, str):
+            self.on_event(event, data)
+
+    def queue_updated(self) -> None:
+        pass
+
+
+@dataclass
+class ItemReport:
+    item_id: int
+    prompt_id: str
+    status: str
+    validate_seconds: float = 0.0
+    execute_seconds: float = 0.0
+    total_seconds: float = 0.0
+    cached_nodes: int = 0
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[Dict[str, Any]] = None
+
+
+def prompt_from_item(item: Dict[str, Any], options: Optional[CompileOptions] = None) -> Tuple[Dict, Dict, Optional[List[str]]]:
+    """Return ``(prompt, extra_data, outputs)`` for a queue item.
+
+    Items may be playground flows (compiled on the fly), bare API-format
+    prompts, or ``{"prompt": ..., "extra_data": ..., "outputs": [...]}``
+    envelopes as posted to ``/prompt``.
+    """
+    if isinstance(item.get("nodes"), list):
+        return compile_flow(item, options), {}, None
+    if isinstance(item.get("prompt"), dict):
+        return item["prompt"], dict(item.get("extra_data") or {}), item.get("outputs")
+    return item, {}, None
+
+
+class QueueWorker:
+    """Drain the playground queue through one long-lived ``PromptExecutor``.
+
+    The executor, its output cache and the loaded models persist across
+    items, so a sweep that shares a checkpoint only loads it once. Each item
+    is validated with ``validate_prompt`` before it runs, its lease is kept
+    alive while it executes, and outputs, errors and timings are written back
+    to the queue row.
+
+    With ``cache_disk`` set, outputs evicted from the executor's cache are
+    spilled to that (local, not Drive) directory and reused by later items
+    and later worker runs. ``parallel_workers`` > 0 runs independent
+    branches of each prompt concurrently (see ``--parallel-execution``), and
+    ``execution_order="critical-path"`` orders nodes by durations recorded
+    in ``state/node_timings.json``.
+
+    Saved images go to ``output_dir`` (``artifacts/outputs`` by default) and
+    are registered in the :class:`ArtifactCatalog` with their prompt id.
+
+    ``executor`` and ``validate`` exist for embedding and tests; by default
+    ComfyUI's own are imported (and its nodes initialised) on first use.
+    """
+
+    def __init__(
+        self,
+        config: PlaygroundConfig | None = None,
+        *,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        cache_type: str = "classic",
+        cache_lru: int = 0,
+        cache_lru_bytes: int = 0,
+        cache_ram: float = 0.0,
+        cache_disk: Optional[Path] = None,
+        cache_disk_gb: float = 10.0,
+        parallel_workers: int = 0,
+        execution_order: str = "ux",
+        compile_options: Optional[CompileOptions] = None,
+        on_event: Optional[EventCallback] = None,
+        output_dir: Optional[Path] = None,
+        executor: Any = None,
+        validate: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        if cache_type not in CACHE_TYPES:
+            raise ValueError(f"Unknown cache type {cache_type!r}; expected one of {CACHE_TYPES}")
+        if execution_order not in EXECUTION_ORDERS:
+            raise ValueError(f"Unknown execution order {execution_order!r}; expected one of {EXECUTION_ORDERS}")
+        self.config = config or PlaygroundConfig.load()
+        self.store = get_store(self.config)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.cache_type = cache_type
+        self.cache_args = {
+            "lru": cache_lru,
+            "lru_bytes": cache_lru_bytes,
+            "ram": cache_ram,
+            "disk": str(cache_disk) if cache_disk else None,
+            "disk_gb": cache_disk_gb,
+        }
+        self.parallel_workers = parallel_workers
+        self.execution_order = execution_order
+        self.compile_options = compile_options
+        self.output_dir = Path(output_dir) if output_dir else self.config.artifacts_dir / "outputs"
+        self.catalog = ArtifactCatalog.for_config(self.config)
+        self.server = HeadlessServer(on_event)
+        self.executor = executor
+        self.validate = validate
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_gc = 0.0
+        self._needs_gc = False
+
+    def _boot(self) -> None:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        if self.executor is not None and self.validate is not None:
+            return
+        import execution
+        import folder_paths
+        import nodes
+
+        folder_paths.set_output_directory(str(self.output_dir))
+
+        if self.validate is None:
+            self.validate = execution.validate_prompt
+        if self.executor is None:
+            self._loop.run_until_complete(nodes.init_extra_nodes(init_custom_nodes=True, init_api_nodes=False))
+            cache_type = {
+                "classic": execution.CacheType.CLASSIC,
+                "lru": execution.CacheType.LRU,
+                "ram": execution.CacheType.RAM_PRESSURE,
+                "none": execution.CacheType.NONE,
+            }[self.cache_type]
+            node_timings = None
+            if self.execution_order == "critical-path":
+                from comfy_execution.node_timings import NodeTimings
+
+                node_timings = NodeTimings(str(self.config.queue_db_path.parent / "node_timings.json"))
+            self.executor = execution.PromptExecutor(
+                self.server,
+                cache_type=cache_type,
+                cache_args=self.cache_args,
+                parallel_workers=self.parallel_workers,
+                node_timings=node_timings,
+            )
+
+    def process(self, row: Dict[str, Any]) -> ItemReport:
+        """Validate and execute one claimed queue row and record the outcome."""
+        self._boot()
+        started = time.perf_counter()
+        item = row["item"]
+        prompt_id = str(item.get("prompt_id") or f"playground-{row['id']}")
+        report = ItemReport(item_id=row["id"], prompt_id=prompt_id, status="failed")
+        heartbeat = LeaseHeartbeat(self.store, row["id"], self.worker_id, interval=self.lease_seconds / 3)
+        with heartbeat:
+            try:
+                prompt, extra_data, outputs = prompt_from_item(item, self.compile_options)
+                valid, error, good_outputs, node_errors = self._loop.run_until_complete(
+                    self.validate(prompt_id, prompt, outputs)
+                )
+                report.validate_seconds = time.perf_counter() - started
+                if not valid:
+                    report.error = {**(error or {}), "node_errors": node_errors}
+                else:
+                    self._execute(report, prompt, extra_data, good_outputs)
+            except Exception as exc:  # a bad item must not take the worker down
+                logging.exception("Queue item %s failed", row["id"])
+                report.error = {"type": type(exc).__name__, "message": str(exc)}
+        report.total_seconds = time.perf_counter() - started
+        if heartbeat.lost.is_set():
+            logging.warning("Lease on queue item %s was lost; not recording its result", row["id"])
+            return report
+        self.store.set_status(row["id"], report.status, worker_id=self.worker_id, result=asdict(report))
+        return report
+
+    def _execute(self, report: ItemReport, prompt: Dict, extra_data: Dict, outputs: List[str]) -> None:
+        executor = self.executor
+        self.server.last_prompt_id = report.prompt_id
+        begin = time.perf_counter()
+        self._loop.run_until_complete(executor.execute_async(prompt, report.prompt_id, extra_data, outputs))
+        report.execute_seconds = time.perf_counter() - begin
+        self._needs_gc = True
+        history = getattr(executor, "history_result", None) or {}
+        report.outputs = history.get("outputs", {})
+        for event, data in getattr(executor, "status_messages", []):
+            if event == "execution_cached":
+                report.cached_nodes = len(data.get("nodes", []))
+            elif event in ("execution_error", "execution_interrupted"):
+                report.error = {"type": event, **{k: v for k, v in data.items() if k != "current_inputs"}}
+        if executor.success and report.error is None:
+            report.status = "done"
+        self._catalog_outputs(report)
+
+    def _catalog_outputs(self, report: ItemReport) -> None:
+        paths = []
+        for node_output in report.outputs.values():
+            for files in node_output.values():
+                for entry in files if isinstance(files, list) else []:
+                    if isinstance(entry, dict) and entry.get("type") == "output" and "filename" in entry:
+                        path = self.output_dir / entry.get("subfolder", "") / entry["filename"]
+                        if path.is_file():
+                            paths.append(path)
+        if paths:
+            self.catalog.record_many(paths, prompt_id=report.prompt_id)
+
+    def _collect_garbage(self) -> None:
+        if not self._needs_gc or time.perf_counter() - self._last_gc < GC_INTERVAL_SECONDS:
+            return
+        gc.collect()
+        try:
+            import comfy.model_management
+
+            comfy.model_management.soft_empty_cache()
+        except ImportError:  # pragma: no cover - only when embedded without ComfyUI
+            pass
+        self._last_gc = time.perf_counter()
+        self._needs_gc = False
+
+    def run(
+        self,
+        *,
+        max_items: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        on_report: Optional[Callable[[ItemReport], None]] = None,
+    ) -> Counter:
+        """Process items until ``max_items`` are done or nothing is claimable for ``idle_timeout`` seconds.
+
+        Each report is handed to ``on_report`` and then dropped; the return
+        value only counts items per status. A paused queue claims nothing, so
+        time spent paused counts towards ``idle_timeout``.
+        """
+        self._boot()
+        counts: Counter = Counter()
+        processed = 0
+        while max_items is None or processed < max_items:
+            self._collect_garbage()
+            row = self.store.wait_for_item(idle_timeout, self.worker_id, lease_seconds=self.lease_seconds)
+            if row is None:
+                break
+            report = self.process(row)
+            processed += 1
+            counts[report.status] += 1
+            if on_report is not None:
+                on_report(report)
+        return counts
+
+    def close(self) -> None:
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
@@ -0,0 +1,59 @@
+import os
+import time
+
+from src.artifacts import ArtifactCatalog
+from src.config import PlaygroundConfig
+from src.maintenance import prune_artifacts
+
+
+def _write(path, size, age_hours=0.0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    stamp = time.time() - age_hours * 3600
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_catalog_sync_is_incremental(tmp_path):
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    root = cfg.artifacts_dir
+    _write(root / 'a' / 'one.png', 10)
+    _write(root / 'a' / 'b' / 'two.png', 20)
+    catalog = ArtifactCatalog.for_config(cfg, workers=2)
+    first = catalog.sync()
+    assert first['indexed'] == 2
+    assert catalog.stats() == {'files': 2, 'bytes': 30}
+    assert catalog.sync()['listed_dirs'] == 0
+
+    _write(root / 'a' / 'b' / 'three.png', 5)
+    (root / 'a' / 'one.png').unlink()
+    summary = catalog.sync()
+    assert summary['indexed'] == 1 and summary['removed'] == 1
+    assert summary['listed_dirs'] == 2
+
+    import shutil
+    shutil.rmtree(root / 'a' / 'b')
+    catalog.sync()
+    assert catalog.stats() == {'files': 0, 'bytes': 0}
+
+    out = _write(root / 'outputs' / 'x.png', 7)
+    assert catalog.record(out, prompt_id='p1')
+    assert not catalog.record(tmp_path / 'elsewhere.png')
+    assert catalog.for_prompt('p1') == ['outputs/x.png']
+
+
+def test_prune_by_age_and_quota(tmp_path):
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    root = cfg.artifacts_dir
+    _write(root / 'old.png', 100, age_hours=48)
+    for index in range(5):
+        _write(root / 'runs' / f'{index}.png', 1024, age_hours=5 - index)
+    assert prune_artifacts(older_than_hours=24, config=cfg) == 1
+    assert not (root / 'old.png').exists()
+
+    catalog = ArtifactCatalog.for_config(cfg)
+    catalog.touch([root / 'runs' / '0.png'])
+    removed = prune_artifacts(older_than_hours=None, max_gb=2048 / 1024**3, policy='lru', config=cfg)
+    assert removed == 3
+    assert sorted(p.name for p in (root / 'runs').iterdir()) == ['0.png', '4.png']
+    assert catalog.stats() == {'files': 2, 'bytes': 2048}
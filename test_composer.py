@@ -6,3 +6,32 @@ def test_compose_flow(tmp_path, monkeypatch):
     path, flow = composer.compose_flow('a cat on a skateboard', model_key='sd-1', sampler='DDIM', steps=5)
     assert 'nodes' in flow
     assert 'prompt' in flow['nodes'][0]['params'] or 'prompt' in flow['nodes'][0].get('params', {})
+
+
+def test_compose_flow_ids_do_not_collide(tmp_path):
+    from src.config import PlaygroundConfig
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    first, _ = composer.compose_flow('one', config=cfg)
+    second, _ = composer.compose_flow('two', config=cfg)
+    assert first != second
+    assert len(list((tmp_path / 'flows').glob('flow_*.json'))) == 2
+
+
+def test_sweep_bundle_and_enqueue(tmp_path):
+    from src.config import PlaygroundConfig
+    from src.flows import SweepGrid, compose_sweep, read_bundle
+    from src.queue import list_items, queue_counts
+
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    grid = SweepGrid(prompts=['cat', 'dog'], seeds=range(5), steps=[10, 20], samplers=['DDIM', 'euler'], template='Cinematic')
+    assert len(grid) == 40
+    result = compose_sweep(grid, enqueue=True, config=cfg)
+    assert result['written'] == result['enqueued'] == 40
+    flows = list(read_bundle(result['bundle']))
+    ids = [flow['meta']['id'] for flow in flows]
+    assert len(set(ids)) == 40 and ids == sorted(ids)
+    assert flows[0]['meta']['prompt'] == 'Cinematic poster of cat'
+    assert [flow['nodes'][0]['params']['seed'] for flow in flows[:5]] == [0, 1, 2, 3, 4]
+    assert queue_counts(config=cfg)['pending'] == 40
+    queued = list_items(config=cfg, limit=40)
+    assert {row['item']['meta']['id'] for row in queued} == set(ids)
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from src.config import PlaygroundConfig
+
+yaml = pytest.importorskip('yaml')
+
+
+def test_load_is_cached_until_yaml_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv('DRIVE_ROOT', str(tmp_path))
+    monkeypatch.delenv('PLAYGROUND_CONFIG', raising=False)
+    first = PlaygroundConfig.reload()
+    assert PlaygroundConfig.load() == first
+    assert (tmp_path / 'state').is_dir()
+
+    # Each caller gets its own copy; edits only land through save().
+    first.queue_keep_last = 5
+    first.env_vars['HF_TOKEN'] = 'secret'
+    assert PlaygroundConfig.load().queue_keep_last is None
+    assert PlaygroundConfig.load().env_vars == {}
+    first.save()
+    saved = PlaygroundConfig.load()
+    assert saved is not first and saved.queue_keep_last == 5
+    assert saved.env_vars == {'HF_TOKEN': 'secret'}
+    with monkeypatch.context() as m:
+        m.setattr(PlaygroundConfig, 'from_yaml', classmethod(lambda cls, path: pytest.fail('config re-read')))
+        assert PlaygroundConfig.load() == saved
+
+    data = yaml.safe_load(saved.yaml_path.read_text())
+    data['queue_keep_last'] = 9
+    saved.yaml_path.write_text(yaml.safe_dump(data))
+    stat = saved.yaml_path.stat()
+    os.utime(saved.yaml_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert PlaygroundConfig.load().queue_keep_last == 9
+
+
+def test_explicit_path_and_directory_memo(tmp_path, monkeypatch):
+    monkeypatch.setenv('DRIVE_ROOT', str(tmp_path / 'default'))
+    monkeypatch.setenv('PLAYGROUND_CONFIG', '')
+    custom = tmp_path / 'custom.yaml'
+    fallback = PlaygroundConfig.load(custom)
+    assert fallback.drive_root == tmp_path / 'default'
+    custom.write_text(yaml.safe_dump({'drive_root': str(tmp_path / 'other')}))
+    assert PlaygroundConfig.load(custom).drive_root == tmp_path / 'other'
+
+    (tmp_path / 'other' / 'models' / 'loras').rmdir()
+    PlaygroundConfig.load(custom).ensure_directories()
+    assert not (tmp_path / 'other' / 'models' / 'loras').exists()
+    PlaygroundConfig.reload(custom)
+    assert (tmp_path / 'other' / 'models' / 'loras').is_dir()
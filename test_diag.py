@@ -0,0 +1,31 @@
+import json
+import zipfile
+
+from src.config import PlaygroundConfig
+from src.diag import export_diagnostics_bundle
+from src.queue import api as queue_api
+
+
+def test_diagnostics_bundle_pages_queue_and_caps_sections(tmp_path):
+    cfg = PlaygroundConfig(drive_root=tmp_path / 'drive')
+    queue_api.enqueue_many(({'n': n, 'pad': 'x' * 50} for n in range(40)), config=cfg)
+    target = tmp_path / 'out' / 'diag.zip'
+
+    bundle = export_diagnostics_bundle(target, config=cfg, page_size=7)
+    assert bundle == target
+    with zipfile.ZipFile(bundle) as archive:
+        rows = [json.loads(line) for line in archive.read('queue.jsonl').splitlines()]
+        summary = json.loads(archive.read('summary.json'))
+        system = json.loads(archive.read('system.jsonl'))
+    assert [row['item']['n'] for row in rows] == list(range(40))
+    assert summary['queue_counts'] == {'pending': 40}
+    assert 'models' in system and 'state_files' in system
+
+    capped = export_diagnostics_bundle(tmp_path / 'small.zip', config=cfg, max_section_bytes=1024)
+    with zipfile.ZipFile(capped) as archive:
+        sections = {s['file']: s for s in json.loads(archive.read('summary.json'))['sections']}
+        assert len(archive.read('queue.jsonl')) <= 1024
+    assert sections['queue.jsonl']['truncated']
+    assert 0 < sections['queue.jsonl']['rows'] < 40
+    assert not list((tmp_path / 'out').glob('.*'))
+    queue_api.close_stores()
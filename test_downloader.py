@@ -1,6 +1,16 @@
+import asyncio
+import hashlib
 import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+
+import pytest
+
 from src import downloader
+from src.config import PlaygroundConfig
+from src.download.manager import DownloadManager
 
 def test_normalize_server_hash():
     headers = {'ETag': '"abc123"'}
@@ -12,3 +22,373 @@ def test_compute_sha256(tmp_path):
     p = tmp_path / 'f.bin'
     p.write_bytes(b'hello')
     assert downloader.compute_sha256(p) == '2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824'
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    payload = bytes(range(256)) * 4096
+    ranged_requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body_needed):
+        data = self.payload
+        header = self.headers.get('Range')
+        if header:
+            start, end = header.split('=', 1)[1].split('-')
+            end = int(end) if end else len(data) - 1
+            chunk = data[int(start):end + 1]
+            type(self).ranged_requests.append(header)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        else:
+            chunk = data
+            self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(len(chunk)))
+        self.end_headers()
+        if body_needed:
+            self.wfile.write(chunk)
+
+    def do_HEAD(self):
+        self._send(False)
+
+    def do_GET(self):
+        self._send(True)
+
+
+@pytest.fixture(autouse=True)
+def reset_ranged_requests():
+    _RangeHandler.ranged_requests = []
+
+
+class _IgnoresRangeHandler(_RangeHandler):
+    """Advertises byte ranges but always answers with the whole file."""
+
+    def _send(self, body_needed):
+        self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(len(self.payload)))
+        self.end_headers()
+        if body_needed:
+            self.wfile.write(self.payload)
+
+
+def test_stream_file_falls_back_when_ranges_are_ignored(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _IgnoresRangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/model.bin'
+    dest = tmp_path / 'model.bin'
+    meta = downloader.stream_file(url, dest, segments=4, min_segment_size=64 * 1024)
+    server.shutdown()
+    assert dest.read_bytes() == _RangeHandler.payload
+    assert meta['sha256'] == hashlib.sha256(_RangeHandler.payload).hexdigest()
+    assert not (tmp_path / 'model.bin.part.json').exists()
+
+
+
+class _CappedRangeHandler(_RangeHandler):
+    """Answers each Range request with at most 64 KiB, as RFC 7233 allows."""
+
+    cap = 64 * 1024
+
+    def _send(self, body_needed):
+        header = self.headers.get('Range')
+        if not header:
+            return super()._send(body_needed)
+        start, end = header.split('=', 1)[1].split('-')
+        start = int(start)
+        end = min(int(end) if end else len(self.payload) - 1, start + self.cap - 1)
+        type(self).ranged_requests.append(header)
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{end}/{len(self.payload)}')
+        self.send_header('Content-Length', str(end + 1 - start))
+        self.end_headers()
+        if body_needed:
+            self.wfile.write(self.payload[start:end + 1])
+
+
+def test_segmented_download_rerequests_capped_ranges(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _CappedRangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/model.bin'
+    dest = tmp_path / 'model.bin'
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.update(downloader.stream_file(url, dest, segments=4, min_segment_size=64 * 1024)),
+        daemon=True,
+    )
+    worker.start()
+    worker.join(30)
+    server.shutdown()
+    assert not worker.is_alive(), 'segmented download hung on capped ranges'
+    assert dest.read_bytes() == _RangeHandler.payload
+    assert result['sha256'] == hashlib.sha256(_RangeHandler.payload).hexdigest()
+    # 1 MiB in four segments, 64 KiB per reply.
+    assert len(_RangeHandler.ranged_requests) == 16
+
+@pytest.mark.parametrize('sidecar', ['[1, 2]', '{"size": 1048576, "segments": 7}', '{"size": 1048576, "segments": [[0, 9, 0]]}'])
+def test_segmented_download_restarts_on_malformed_sidecar(tmp_path, sidecar):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/model.bin'
+    dest = tmp_path / 'model.bin'
+    (tmp_path / 'model.bin.part').write_bytes(b'\0' * len(_RangeHandler.payload))
+    (tmp_path / 'model.bin.part.json').write_text(sidecar)
+    downloader.stream_file(url, dest, segments=4, min_segment_size=64 * 1024)
+    server.shutdown()
+    assert dest.read_bytes() == _RangeHandler.payload
+
+
+def test_manager_parallel_segmented(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    expected = hashlib.sha256(_RangeHandler.payload).hexdigest()
+    events = []
+    manager = DownloadManager(
+        config=PlaygroundConfig(drive_root=tmp_path),
+        progress_callback=events.append,
+        min_segment_size=128 * 1024,
+    )
+    for name in ('a.bin', 'b.bin', 'c.bin'):
+        manager.add_item({'url': f'{base}/{name}', 'destination': f'models/{name}', 'sha256': expected})
+    results = manager.run()
+    server.shutdown()
+    assert [Path(r['path']).name for r in results] == ['a.bin', 'b.bin', 'c.bin']
+    assert all((tmp_path / 'models' / n).read_bytes() == _RangeHandler.payload for n in ('a.bin', 'b.bin', 'c.bin'))
+    assert len(_RangeHandler.ranged_requests) == 12
+    assert events[-1]['items_completed'] == 3
+    assert events[-1]['downloaded_bytes'] == 3 * len(_RangeHandler.payload)
+
+
+
+class _SlowHeadHandler(_RangeHandler):
+    """Holds ``/slow.bin`` until ``release`` is set; counts the other GETs."""
+
+    release = threading.Event()
+    served = []
+
+    def do_GET(self):
+        if self.path == '/slow.bin':
+            type(self).release.wait(60)
+        else:
+            type(self).served.append(self.path)
+        super().do_GET()
+
+
+def test_slow_head_item_does_not_stall_later_downloads(tmp_path):
+    _SlowHeadHandler.release = threading.Event()
+    _SlowHeadHandler.served = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHeadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    manager = DownloadManager(config=PlaygroundConfig(drive_root=tmp_path), max_workers=2, segments_per_file=1)
+    names = ['slow.bin'] + [f'{n}.bin' for n in range(8)]
+    for name in names:
+        manager.add_item({'url': f'{base}/{name}', 'destination': name})
+    results = []
+    consumer = threading.Thread(target=lambda: results.extend(f.result() for f in manager.iter_results()), daemon=True)
+    consumer.start()
+    # Every other item fits through the one free worker while the head is stuck.
+    deadline = time.monotonic() + 10
+    while len(_SlowHeadHandler.served) < 8 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stalled = len(_SlowHeadHandler.served)
+    _SlowHeadHandler.release.set()
+    consumer.join(30)
+    server.shutdown()
+    assert stalled == 8
+    assert [Path(r['path']).name for r in results] == names
+
+def test_stream_file_hashes_resumed_download(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/model.bin'
+    payload = _RangeHandler.payload
+    dest = tmp_path / 'model.bin'
+    (tmp_path / 'model.bin.part').write_bytes(payload[:1000])
+    meta = downloader.stream_file(url, dest, fast_hash='blake2b')
+    assert dest.read_bytes() == payload
+    assert meta['sha256'] == hashlib.sha256(payload).hexdigest()
+    assert meta['fast_digest'] == 'blake2b:' + hashlib.blake2b(payload).hexdigest()
+
+    bad = tmp_path / 'bad.bin'
+    with pytest.raises(ValueError):
+        downloader.stream_file(url, bad, expected_sha256='0' * 64)
+    server.shutdown()
+    assert not bad.exists()
+    assert not (tmp_path / 'bad.bin.part').exists()
+
+
+def test_manager_dedupes_through_blob_store(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    expected = hashlib.sha256(_RangeHandler.payload).hexdigest()
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+
+    def run_manifest():
+        manager = DownloadManager(config=cfg, dedupe=True, segments_per_file=1, max_workers=1)
+        manager.add_item({'url': f'{base}/m.bin', 'destination': 'models/checkpoints/m.bin'})
+        manager.add_item({'url': f'{base}/m.bin', 'destination': 'models/loras/m.bin'})
+        manager.add_item({'url': f'{base}/mirror.bin', 'destination': 'models/vae/m.bin', 'sha256': expected})
+        return manager.run(), manager.blobs
+
+    first, blobs = run_manifest()
+    assert sum(r['source'] == 'network' for r in first) == 1
+    assert blobs.stats()['blobs'] == 1
+    second, _ = run_manifest()
+    server.shutdown()
+    assert all(r['source'] == 'cache' for r in second)
+    for dest in ('checkpoints', 'loras', 'vae'):
+        assert (tmp_path / 'models' / dest / 'm.bin').read_bytes() == _RangeHandler.payload
+
+
+def test_async_manager_pause_resume_cancel(tmp_path):
+    pytest.importorskip('aiohttp')
+    from src.download import AsyncDownloadManager
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    expected = hashlib.sha256(_RangeHandler.payload).hexdigest()
+
+    final = {}
+
+    def record(event):
+        if event['state'] in ('done', 'failed', 'cancelled'):
+            final[event['id']] = event
+
+    async def scenario():
+        async with AsyncDownloadManager(
+            PlaygroundConfig(drive_root=tmp_path), max_concurrency=2, max_pending=2, chunk_size=64 * 1024,
+            progress_callback=record,
+        ) as manager:
+            paused = await manager.add_item({'url': f'{base}/p.bin', 'destination': 'p.bin', 'sha256': expected})
+            manager.pause(paused)
+            ids = [await manager.add_item({'url': f'{base}/{n}.bin', 'destination': f'{n}.bin'}) for n in range(4)]
+            manager.cancel(ids[-1])
+            await asyncio.sleep(0.2)
+            manager.resume(paused)
+            await manager.join()
+            # Finished tasks are not kept around.
+            assert manager.tasks == {}
+            return paused, ids
+
+    paused, ids = asyncio.run(scenario())
+    server.shutdown()
+    assert final[paused]['state'] == 'done'
+    assert final[paused]['result']['sha256'] == expected
+    assert [final[i]['state'] for i in ids] == ['done', 'done', 'done', 'cancelled']
+    assert (tmp_path / '2.bin').read_bytes() == _RangeHandler.payload
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    etag = '"v1"'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        type(self).requests_seen.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', '1234')
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.end_headers()
+
+
+def test_resolution_cache_revalidates(tmp_path):
+    from src.download.resolve import ResolutionCache
+
+    _ETagHandler.requests_seen = []
+    _ETagHandler.etag = '"v1"'
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    cache = ResolutionCache(tmp_path / 'resolutions.sqlite3', ttl=3600)
+    urls = [f'{base}/a.bin', f'{base}/b.bin', f'{base}/a.bin']
+    first = cache.resolve_many(urls)
+    assert sorted(first) == [f'{base}/a.bin', f'{base}/b.bin']
+    assert {r['cache'] for r in first.values()} == {'miss'}
+    assert first[f'{base}/a.bin']['size'] == 1234
+    assert cache.resolve(f'{base}/a.bin')['cache'] == 'hit'
+    assert len(_ETagHandler.requests_seen) == 2
+    cache.ttl = 0
+    again = cache.resolve(f'{base}/a.bin')
+    assert again['cache'] == 'revalidated'
+    assert again['final_url'] == f'{base}/a.bin'
+    assert _ETagHandler.requests_seen[-1] == '"v1"'
+
+    # A changed URL costs the conditional HEAD only; its 200 becomes the entry.
+    _ETagHandler.etag = '"v2"'
+    seen = len(_ETagHandler.requests_seen)
+    changed = cache.resolve(f'{base}/a.bin')
+    server.shutdown()
+    assert len(_ETagHandler.requests_seen) == seen + 1
+    assert changed['etag'] == '"v2"' and changed['size'] == 1234
+
+
+def test_streaming_manifest_parsing(tmp_path):
+    import json
+    from src.download import manifest as manifest_mod
+    from src.download.manager import DownloadManifest
+
+    rows = [{'url': f'https://example.com/{i}.bin', 'destination': f'models/{i}.bin', 'headers': {'X-N': str(i)}} for i in range(500)]
+    doc = tmp_path / 'big.json'
+    doc.write_text(json.dumps({'version': 1.25, 'items': rows, 'meta': {'n': [1, 2, 3]}}, indent=1), encoding='utf-8')
+    stream = manifest_mod._JsonStream(doc.open(encoding='utf-8'), chunk_size=7)
+    assert list(stream.items()) == rows
+    items = list(DownloadManifest.from_json(doc).items)
+    assert [i.destination for i in items] == [r['destination'] for r in rows]
+
+    jsonl = tmp_path / 'mirror.jsonl'
+    jsonl.write_text('\n'.join([
+        json.dumps(rows[0]),
+        '{"url": "https://example.com/x"}',
+        '',
+        'not json',
+        json.dumps({'url': 'u', 'destination': '../escape', 'sha256': 'abc'}),
+    ]) + '\n', encoding='utf-8')
+    report = manifest_mod.check_manifest(jsonl)
+    assert report.rows == 4
+    assert [row for row, _ in report.errors] == [2, 4, 5, 5]
+    with pytest.raises(manifest_mod.ManifestError) as excinfo:
+        list(DownloadManifest.from_json(jsonl).items)
+    assert excinfo.value.errors == [(2, "missing 'destination'")]
+
+    broken = tmp_path / 'broken.json'
+    broken.write_text('[' + json.dumps(rows[0]) + ', {"url": ]', encoding='utf-8')
+    assert manifest_mod.check_manifest(broken).errors[0][0] == 2
+
+
+def test_manager_consumes_manifest_lazily(tmp_path):
+    import json
+    from src.download.manager import DownloadManifest
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    pulled = []
+
+    def lazy_items():
+        for item in DownloadManifest.from_json(path).items:
+            pulled.append(item.destination)
+            yield item
+
+    path = tmp_path / 'm.jsonl'
+    path.write_text(''.join(json.dumps({'url': f'{base}/{n}', 'destination': f'out/{n}.bin'}) + '\n' for n in range(12)))
+    manager = DownloadManager(config=PlaygroundConfig(drive_root=tmp_path), max_workers=2, segments_per_file=1)
+    manager.add_manifest(DownloadManifest(lazy_items()))
+    seen = []
+    for future in manager.iter_results():
+        seen.append(Path(future.result()['path']).name)
+        assert len(pulled) <= len(seen) + 4
+    server.shutdown()
+    assert seen == [f'{n}.bin' for n in range(12)]
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from src.flows import CompileOptions, FlowCompileError, SweepGrid, build_flow, compile_flow
+
+
+def _links(prompt):
+    for node_id, node in prompt.items():
+        for value in node['inputs'].values():
+            if isinstance(value, list):
+                yield node_id, value
+
+
+def test_compile_flow_builds_connected_api_prompt():
+    flow = build_flow('a red fox', model_key='sd15', sampler='Euler a', steps=12, seed=7, lora=['detail:0.6', 'style'], upscaler='4x')
+    prompt = compile_flow(flow)
+    types = {node['class_type'] for node in prompt.values()}
+    assert {'CheckpointLoaderSimple', 'LoraLoader', 'CLIPTextEncode', 'EmptyLatentImage', 'KSampler', 'VAEDecode',
+            'ImageUpscaleWithModel', 'SaveImage'} <= types
+    assert prompt['ckpt']['inputs']['ckpt_name'] == 'sd15.safetensors'
+    assert prompt['lora_1']['inputs']['strength_model'] == 0.6
+    assert prompt['lora_2']['inputs']['model'] == ['lora_1', 0]
+    assert prompt['sampler']['inputs']['model'] == ['lora_2', 0]
+    assert prompt['positive']['inputs']['clip'] == ['lora_2', 1]
+    assert prompt['sampler']['inputs']['sampler_name'] == 'euler_ancestral'
+    assert prompt['save']['inputs']['images'] == ['upscale', 0]
+    assert all(target in prompt for _, (target, _) in _links(prompt))
+
+
+def test_sweep_shares_upstream_nodes():
+    grid = SweepGrid(prompts=['cat'], seeds=[-1, 1, 2], model_key='sdxl', loras=['detail'])
+    prompts = [compile_flow(flow) for flow in grid.flows()]
+    loaders = {json.dumps({k: p[k] for k in ('ckpt', 'lora_1', 'positive', 'negative')}, sort_keys=True) for p in prompts}
+    assert len(loaders) == 1
+    seeds = [p['sampler']['inputs']['seed'] for p in prompts]
+    assert seeds[1:] == [1, 2] and seeds[0] >= 0
+    assert compile_flow(next(iter(grid.flows())))['sampler']['inputs']['seed'] == seeds[0]
+    prompts[0]['ckpt']['inputs']['ckpt_name'] = 'mutated'
+    assert compile_flow(next(iter(grid.flows())))['ckpt']['inputs']['ckpt_name'] == 'sdxl.safetensors'
+
+
+def test_compile_flow_requires_model():
+    with pytest.raises(FlowCompileError):
+        compile_flow(build_flow('x'))
+    options = CompileOptions(default_checkpoint='base', checkpoints={'base': 'v1-5.ckpt'})
+    assert compile_flow(build_flow('x'), options)['ckpt']['inputs']['ckpt_name'] == 'v1-5.ckpt'
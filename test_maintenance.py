@@ -0,0 +1,39 @@
+import gzip
+import json
+import os
+
+from src.config import PlaygroundConfig
+from src.maintenance import restore_manifest_backup, rotate_manifest_backups
+
+
+def _write_manifest(path, rows, stamp):
+    path.write_text(json.dumps(rows), encoding='utf-8')
+    os.utime(path, (stamp, stamp))
+
+
+def test_manifest_backups_skip_unchanged_and_dedupe(tmp_path):
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    cfg.manifests_dir.mkdir(parents=True)
+    first = cfg.manifests_dir / 'models.json'
+    second = cfg.manifests_dir / 'copy.json'
+    _write_manifest(first, [{'url': 'https://example.com/a'}], 1_000)
+    _write_manifest(second, [{'url': 'https://example.com/a'}], 1_000)
+
+    assert rotate_manifest_backups(2, config=cfg) == {'rotated': 2, 'unchanged': 0, 'pruned': 0}
+    objects = list((cfg.manifests_dir / 'backups' / 'objects').rglob('*.gz'))
+    assert len(objects) == 1  # identical content is stored once
+    assert rotate_manifest_backups(2, config=cfg) == {'rotated': 0, 'unchanged': 2, 'pruned': 0}
+
+    for version in range(3):
+        _write_manifest(first, [{'url': f'https://example.com/{version}'}], 2_000 + version)
+        rotate_manifest_backups(2, config=cfg)
+    index = json.loads((cfg.manifests_dir / 'backups' / 'index.json').read_text())
+    assert len(index['models.json']['versions']) == 2
+    # The shared original stays referenced by copy.json.
+    assert len(index['copy.json']['versions']) == 1
+    assert len(list((cfg.manifests_dir / 'backups' / 'objects').rglob('*.gz'))) == 3
+
+    restored = restore_manifest_backup('models.json', version=0, destination=tmp_path / 'old.json', config=cfg)
+    assert json.loads(restored.read_text()) == [{'url': 'https://example.com/1'}]
+    blob = next((cfg.manifests_dir / 'backups' / 'objects').rglob('*.gz')).read_bytes()
+    assert gzip.decompress(blob)
@@ -0,0 +1,182 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src.config import PlaygroundConfig
+from src.queue import api as queue_api
+from src.queue.archive import read_archive
+
+
+def _config(tmp_path):
+    return PlaygroundConfig(drive_root=tmp_path)
+
+
+def test_queue_round_trip(tmp_path):
+    cfg = _config(tmp_path)
+    first = queue_api.enqueue({"prompt": "a"}, config=cfg)
+    second = queue_api.enqueue({"prompt": "b"}, config=cfg)
+    claimed = queue_api.dequeue(config=cfg)
+    assert (claimed["id"], claimed["item"]) == (first, {"prompt": "a"})
+    queue_api.mark_done(first, config=cfg)
+    assert [row["id"] for row in queue_api.list_items(status="pending", config=cfg)] == [second]
+    assert [row["status"] for row in queue_api.list_items(config=cfg)] == ["done", "pending"]
+    queue_api.set_paused(True, config=cfg)
+    assert queue_api.is_paused(config=cfg)
+    assert queue_api.dequeue(config=cfg) is None
+    queue_api.close_stores()
+
+
+def test_queue_store_reuses_thread_connections(tmp_path):
+    cfg = _config(tmp_path)
+    store = queue_api.get_store(cfg)
+    assert queue_api.get_store(cfg) is store
+    assert store.connection() is store.connection()
+    mode = store.connection().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode.lower() == "wal"
+    plan = store.connection().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM queue WHERE status='pending' ORDER BY id LIMIT 1"
+    ).fetchall()
+    assert any("idx_queue_status_id" in str(row) for row in plan)
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(store.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not store.connection()
+    queue_api.close_stores()
+
+
+def test_get_store_creates_drive_layout_and_rolls_back_failed_commit(tmp_path):
+    cfg = _config(tmp_path)
+    store = queue_api.get_store(cfg)
+    assert cfg.artifacts_dir.is_dir() and cfg.manifests_dir.is_dir()
+
+    conn = store.connection()
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("CREATE TABLE parent (id INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TABLE child (parent_id INTEGER REFERENCES parent(id) DEFERRABLE INITIALLY DEFERRED)")
+    # The deferred constraint is only checked by COMMIT, which then fails.
+    with pytest.raises(sqlite3.IntegrityError):
+        with store.transaction() as txn:
+            txn.execute("INSERT INTO child VALUES (1)")
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM child").fetchone()[0] == 0
+    assert store.enqueue({"prompt": "a"}) == 1
+    queue_api.close_stores()
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    store = queue_api.QueueStore(tmp_path / "queue.sqlite3", max_attempts=2)
+    item_id = store.enqueue({"prompt": "a"})
+    first = store.claim("worker-a", lease_seconds=-1)
+    assert first["id"] == item_id
+    assert not store.heartbeat(item_id, "worker-b")
+
+    second = store.claim("worker-b")
+    assert second["id"] == item_id
+    assert not store.set_status(item_id, "done", worker_id="worker-a")
+    assert store.heartbeat(item_id, "worker-b")
+    assert store.set_status(item_id, "done", worker_id="worker-b")
+    assert store.list_items(status="done")[0]["attempts"] == 2
+    store.close()
+
+
+def test_concurrent_claims_never_overlap(tmp_path):
+    store = queue_api.QueueStore(tmp_path / "queue.sqlite3")
+    for idx in range(50):
+        store.enqueue({"n": idx})
+    claimed = []
+
+    def worker(name):
+        while True:
+            row = store.claim(name)
+            if row is None:
+                return
+            claimed.append(row["id"])
+
+    threads = [threading.Thread(target=worker, args=(f"w{idx}",)) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == list(range(1, 51))
+    store.close()
+
+
+def test_batch_enqueue_claim_and_mark(tmp_path):
+    store = queue_api.QueueStore(tmp_path / "queue.sqlite3")
+    assert store.enqueue_many({"n": idx} for idx in range(10)) == 10
+    batch = store.claim_batch(4, "worker")
+    assert [row["item"]["n"] for row in batch] == [0, 1, 2, 3]
+    assert store.set_status_many([row["id"] for row in batch], "done", worker_id="worker") == 4
+    assert len(store.list_items(status="done")) == 4
+    assert len(store.list_items(status="pending")) == 6
+
+    def broken():
+        yield {"n": "ok"}
+        raise ValueError("bad row")
+
+    with pytest.raises(ValueError, match="bad row"):
+        store.enqueue_many(broken())
+    assert len(store.list_items()) == 10
+    store.close()
+
+
+def test_lanes_share_claims_by_weight(tmp_path):
+    store = queue_api.QueueStore(tmp_path / "queue.sqlite3")
+    store.enqueue_many(({"n": idx} for idx in range(100)), lane="sweep")
+    store.enqueue({"n": "low"}, lane="interactive")
+    store.enqueue({"n": "high"}, lane="interactive", priority=5)
+    store.set_lane_weight("sweep", 3)
+    lanes = [row["item"]["n"] for row in store.claim_batch(8, "worker")]
+    assert lanes.index("high") < lanes.index("low") < 8
+    assert sum(isinstance(n, int) for n in lanes) == 6
+    plan = store.connection().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM queue WHERE status='pending' AND lane='sweep' "
+        "ORDER BY priority DESC, id LIMIT 1"
+    ).fetchall()
+    assert any("idx_queue_lane_pick" in str(row) for row in plan)
+    assert "TEMP B-TREE" not in str(plan)
+    store.close()
+
+
+def test_wait_for_item_wakes_on_enqueue(tmp_path):
+    store = queue_api.QueueStore(tmp_path / "queue.sqlite3", poll_interval=30)
+    assert store.wait_for_item(timeout=0.05) is None
+
+    timer = threading.Timer(0.1, lambda: store.enqueue({"prompt": "late"}))
+    timer.start()
+    started = time.monotonic()
+    item = store.wait_for_item(timeout=10)
+    timer.join()
+    assert item["item"] == {"prompt": "late"}
+    assert time.monotonic() - started < 5
+
+    async def consume():
+        store.enqueue_many([{"n": 1}, {"n": 2}])
+        return [row["item"]["n"] async for row in store.iter_items(idle_timeout=0.2)]
+
+    assert asyncio.run(consume()) == [1, 2]
+    store.close()
+
+
+def test_retention_archives_and_paginates(tmp_path):
+    store = queue_api.QueueStore(tmp_path / "queue.sqlite3")
+    store.enqueue_many({"n": idx} for idx in range(10))
+    done = store.claim_batch(8, "worker")
+    store.set_status_many([row["id"] for row in done], "done")
+
+    archive_dir = tmp_path / "archive"
+    assert store.purge_completed(keep_last=3, archive_dir=archive_dir, batch_size=2) == 5
+    archived = [row for path in sorted(archive_dir.iterdir()) for row in read_archive(path)]
+    assert [row["item"]["n"] for row in archived] == [0, 1, 2, 3, 4]
+    assert store.counts() == {"done": 3, "pending": 2}
+
+    page = store.list_items(offset=1, limit=2)
+    assert [row["item"]["n"] for row in page] == [6, 7]
+    assert store.list_items(since=time.time() + 60) == []
+    store.compact()
+    assert store.connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    store.close()
@@ -12,3 +12,57 @@ def test_get_and_save_templates(tmp_path):
     templates.save_prompt_templates(new)
     t2 = templates.get_prompt_templates()
     assert t2[0]['name'] == 'A'
+
+
+def test_template_store_index_and_render(tmp_path):
+    from src.config import PlaygroundConfig
+    from src.templates import TemplateStore
+
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    store = TemplateStore.for_config(cfg)
+    assert TemplateStore.for_config(cfg) is store
+    assert [t['name'] for t in store.by_category('Portrait')] == ['Studio Portrait']
+    count = store.import_templates([
+        {'name': 'Duo', 'template': '{prompt}, {style} -- {prompt}', 'category': 'Art'},
+        {'name': 'Braces', 'template': '{{raw}} {prompt!r}'},
+    ])
+    assert count == 2
+    assert store.render('Duo', ['a', 'b'], style='ink') == ['a, ink -- a', 'b, ink -- b']
+    assert store.render('Braces', 'x') == "{raw} 'x'"
+    assert store.render('Minimal', ['p'] * 3) == ['p', 'p', 'p']
+    assert store.get('Braces')['category'] == 'General'
+    assert store.import_templates([{'name': 'Duo', 'template': 'x'}], overwrite=False) == 0
+
+    exported = tmp_path / 'export.json'
+    assert store.export_templates(exported, category='Art') == 2
+    assert store.delete('Fantasy') and not store.delete('Fantasy')
+    assert TemplateStore(store.path).get('Duo')['template'] == '{prompt}, {style} -- {prompt}'
+    assert 'Fantasy' not in [t['name'] for t in TemplateStore(store.path).all()]
+    assert store.import_templates(exported) == 2
+    assert store.get('Fantasy') is not None
+    assert not list(store.path.parent.glob('.prompt_templates.json.*'))
+
+
+def test_template_store_keeps_nameless_and_duplicate_entries(tmp_path):
+    import json
+
+    from src.config import PlaygroundConfig
+    from src.templates import TemplateStore, get_prompt_templates
+
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    path = cfg.config_dir / 'prompt_templates.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entries = [
+        {'template': 'no name {prompt}'},
+        {'name': 'Dup', 'template': 'first {prompt}'},
+        {'name': 'Dup', 'template': 'second {prompt}'},
+    ]
+    path.write_text(json.dumps(entries))
+    store = TemplateStore(path)
+    assert store.get('Dup')['template'] == 'second {prompt}'
+    assert sorted(t['template'] for t in get_prompt_templates(cfg)) == sorted(t['template'] for t in entries)
+
+    store.add({'name': 'New', 'template': '{prompt}'})
+    on_disk = json.loads(path.read_text())
+    assert all(entry in on_disk for entry in entries)
+    assert len(on_disk) == 4
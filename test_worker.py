@@ -0,0 +1,64 @@
+import time
+
+from src.config import PlaygroundConfig
+from src.flows import build_flow
+from src.queue import enqueue_many, list_items
+from src.worker import QueueWorker
+
+
+class _FakeExecutor:
+    def __init__(self):
+        self.prompts = []
+        self.success = True
+
+    async def execute_async(self, prompt, prompt_id, extra_data, outputs):
+        self.prompts.append((prompt_id, prompt, outputs))
+        self.success = prompt['sampler']['inputs']['steps'] != 13
+        self.status_messages = [('execution_cached', {'nodes': ['ckpt'] if len(self.prompts) > 1 else []})]
+        if not self.success:
+            self.status_messages.append(('execution_error', {'node_id': 'sampler', 'exception_message': 'boom'}))
+        self.history_result = {'outputs': {'save': {'images': [{'filename': f'{prompt_id}.png'}]}}, 'meta': {}}
+
+
+async def _validate(prompt_id, prompt, outputs):
+    if prompt['sampler']['inputs']['steps'] == 0:
+        return False, {'type': 'invalid', 'message': 'no steps'}, [], {'sampler': {'errors': []}}
+    return True, None, ['save'], {}
+
+
+def test_worker_drains_queue(tmp_path):
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    flows = [build_flow('cat', model_key='sd15', steps=steps) for steps in (20, 0, 13, 30)]
+    enqueue_many(flows + [{'nodes': []}], config=cfg)
+    executor = _FakeExecutor()
+    worker = QueueWorker(cfg, executor=executor, validate=_validate)
+    reports = []
+    counts = worker.run(idle_timeout=0, on_report=reports.append)
+    worker.close()
+
+    assert [r.status for r in reports] == ['done', 'failed', 'failed', 'done', 'failed']
+    assert counts == {'done': 2, 'failed': 3}
+    assert len(executor.prompts) == 3
+    assert executor.prompts[0][2] == ['save']
+    assert reports[3].cached_nodes == 1
+    rows = {row['id']: row for row in list_items(config=cfg, limit=10)}
+    assert rows[1]['status'] == 'done'
+    assert rows[1]['result']['outputs']['save']['images'][0]['filename'] == 'playground-1.png'
+    assert rows[2]['result']['error']['message'] == 'no steps'
+    assert rows[3]['result']['error']['exception_message'] == 'boom'
+    assert rows[5]['result']['error']['type'] == 'FlowCompileError'
+    assert all(row['result']['total_seconds'] >= 0 for row in rows.values())
+
+
+def test_worker_stops_after_idle_timeout_while_paused(tmp_path):
+    cfg = PlaygroundConfig(drive_root=tmp_path)
+    enqueue_many([build_flow('cat', model_key='sd15')], config=cfg)
+    worker = QueueWorker(cfg, executor=_FakeExecutor(), validate=_validate)
+    worker.store.set_paused(True)
+    started = time.monotonic()
+    counts = worker.run(idle_timeout=0.2)
+    worker.close()
+
+    assert counts == {}
+    assert time.monotonic() - started < 5
+    assert list_items(config=cfg, limit=10)[0]['status'] == 'pending'
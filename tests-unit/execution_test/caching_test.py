@@ -0,0 +1,161 @@
+import asyncio
+
+import torch
+
+import folder_paths
+import nodes
+from comfy_execution.caching import CacheKeySetInputSignature, LRUCache, entry_size
+from comfy_execution.graph import DynamicPrompt
+from conftest import IsChangedCache, Node
+
+
+class _NotIdempotentNode(Node):
+    NOT_IDEMPOTENT = True
+
+
+NODE_CLASSES = {"TestNode": Node, "TestNotIdempotent": _NotIdempotentNode}
+
+
+def chain(length, value=1, class_type="TestNode"):
+    prompt = {"0": {"class_type": class_type, "inputs": {"value": value}}}
+    for i in range(1, length):
+        prompt[str(i)] = {"class_type": "TestNode", "inputs": {"value": i, "source": [str(i - 1), 0]}}
+    return prompt
+
+
+def keys_for(prompt, is_changed_cache=None):
+    key_set = CacheKeySetInputSignature(DynamicPrompt(prompt), list(prompt), is_changed_cache or IsChangedCache())
+    asyncio.run(key_set.add_keys(list(prompt)))
+    return key_set.keys
+
+
+def test_signatures_are_fixed_size_and_stable_across_prompts():
+    first = keys_for(chain(5))
+    second = keys_for(chain(5))
+    assert first == second
+    assert all(isinstance(key, bytes) and len(key) == 32 for key in first.values())
+    assert len(set(first.values())) == 5
+
+
+def test_upstream_change_invalidates_descendants_only():
+    base = chain(5)
+    changed = chain(5)
+    changed["2"]["inputs"]["value"] = 99
+    before, after = keys_for(base), keys_for(changed)
+    assert [before[str(i)] == after[str(i)] for i in range(5)] == [True, True, False, False, False]
+
+
+def test_link_socket_and_input_types_are_part_of_the_key():
+    base = chain(3)
+    other_socket = chain(3)
+    other_socket["2"]["inputs"]["source"] = ["1", 1]
+    float_value = chain(3, value=1.0)
+    assert keys_for(base)["2"] != keys_for(other_socket)["2"]
+    assert keys_for(base)["0"] != keys_for(float_value)["0"]
+
+
+def test_uncacheable_inputs_and_not_idempotent_nodes():
+    nan_changed = keys_for(chain(2), IsChangedCache({"0": float("NaN")}))
+    assert nan_changed != keys_for(chain(2), IsChangedCache({"0": float("NaN")}))
+
+    unhashable = chain(2, value=object())
+    assert keys_for(unhashable)["1"] != keys_for(unhashable)["1"]
+
+    renamed = {key if key != "0" else "other": value for key, value in chain(1, class_type="TestNotIdempotent").items()}
+    assert keys_for(chain(1, class_type="TestNotIdempotent"))["0"] != keys_for(renamed)["other"]
+
+
+def test_deep_graph_hashes_each_node_once():
+    prompt = chain(5000)
+    is_changed_cache = IsChangedCache()
+    keys = keys_for(prompt, is_changed_cache)
+    assert len(keys) == 5000
+    assert is_changed_cache.calls == 5000
+
+
+def test_key_sets_sharing_a_run_reuse_digests():
+    prompt = chain(50)
+    dynprompt = DynamicPrompt(prompt)
+    is_changed_cache = IsChangedCache()
+    first = CacheKeySetInputSignature(dynprompt, list(prompt), is_changed_cache)
+    asyncio.run(first.add_keys(list(prompt)))
+    second = CacheKeySetInputSignature(dynprompt, ["49"], is_changed_cache)
+    asyncio.run(second.add_keys(["49"]))
+    assert second.keys["49"] == first.keys["49"]
+    assert is_changed_cache.calls == 50
+
+
+def test_code_version_and_model_files_are_part_of_the_key(tmp_path, monkeypatch):
+    class _V1(Node):
+        CACHE_VERSION = 1
+
+    class _V2(Node):
+        CACHE_VERSION = 2
+
+    monkeypatch.setitem(nodes.NODE_CLASS_MAPPINGS, "TestNode", _V1)
+    v1 = keys_for(chain(2))
+    monkeypatch.setitem(nodes.NODE_CLASS_MAPPINGS, "TestNode", _V2)
+    assert keys_for(chain(2)) != v1
+
+    monkeypatch.setitem(folder_paths.folder_names_and_paths, "checkpoints", ([str(tmp_path)], folder_paths.supported_pt_extensions))
+    model = tmp_path / "model.safetensors"
+    model.write_bytes(b"a")
+    before = keys_for(chain(2, value="model.safetensors"))
+    model.write_bytes(b"replaced")
+    after = keys_for(chain(2, value="model.safetensors"))
+    assert before["0"] != after["0"] and before["1"] != after["1"]
+
+
+class _Sized:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def get_ram_usage(self):
+        return self.nbytes
+
+
+def test_entry_size_counts_each_storage_once():
+    tensor = torch.zeros(1024, dtype=torch.float32)
+    model = _Sized(100)
+    entry = ({"ui": None}, [[tensor, tensor[:10]], [{"samples": tensor}], [model, model, 3, "text"]])
+    size = entry_size(entry)
+    assert size.cpu == 4096
+    assert size.gpu == 0
+    assert size.other == 100
+    assert size.total == 4196
+
+
+def run_prompt(cache, values):
+    prompt = {str(i): {"class_type": "TestNode", "inputs": {"value": value}} for i, value in enumerate(values)}
+    asyncio.run(cache.set_prompt(DynamicPrompt(prompt), list(prompt), IsChangedCache()))
+    cache.clean_unused()
+    return list(prompt)
+
+
+def test_lru_byte_budget_evicts_oldest_entries_first():
+    cache = LRUCache(CacheKeySetInputSignature, max_size=None, max_bytes=250)
+    for value in ("a", "b", "c"):
+        (node_id,) = run_prompt(cache, [value])
+        cache.set(node_id, ([_Sized(100)],))
+    # "a" was evicted when "c" pushed the total over budget; "b" and "c" remain.
+    assert cache.total_bytes == 200
+    assert len(cache.cache) == 2
+
+    (node_id,) = run_prompt(cache, ["b"])
+    assert cache.get(node_id) is not None
+    (node_id,) = run_prompt(cache, ["d"])
+    cache.set(node_id, ([_Sized(100)],))
+    run_prompt(cache, ["b"])
+    assert cache.get("0") is not None  # recently used "b" survived, "c" did not
+    assert cache.total_bytes == 200
+
+
+def test_lru_byte_budget_keeps_entries_of_the_running_prompt():
+    cache = LRUCache(CacheKeySetInputSignature, max_size=None, max_bytes=50)
+    node_ids = run_prompt(cache, ["x", "y"])
+    for node_id in node_ids:
+        cache.set(node_id, ([_Sized(100)],))
+    assert len(cache.cache) == 2
+    run_prompt(cache, ["z"])
+    assert len(cache.cache) == 0
+    assert cache.total_bytes == 0
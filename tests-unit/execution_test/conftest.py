@@ -0,0 +1,41 @@
+import pytest
+
+
+class Node:
+    FUNCTION = "run"
+    RETURN_TYPES = ("IMAGE",)
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {"required": {}}
+
+    def run(self, **kwargs):
+        return (None,)
+
+
+class AsyncNode(Node):
+    async def run(self, **kwargs):
+        return (None,)
+
+
+class IsChangedCache:
+    def __init__(self, values=None):
+        self.values = values or {}
+        self.calls = 0
+
+    async def get(self, node_id):
+        self.calls += 1
+        return self.values.get(node_id, False)
+
+
+@pytest.fixture(autouse=True)
+def node_classes(request, monkeypatch):
+    """Register the test module's NODE_CLASSES (class_type -> class) for each test."""
+    classes = getattr(request.module, "NODE_CLASSES", None)
+    if not classes:
+        return
+    # Imported here so modules without node classes stay free of torch.
+    import nodes
+
+    for class_type, class_def in classes.items():
+        monkeypatch.setitem(nodes.NODE_CLASS_MAPPINGS, class_type, class_def)
@@ -0,0 +1,54 @@
+import pytest
+
+from comfy_execution.caching import NullCache
+from comfy_execution.graph import DynamicPrompt, ExecutionList
+from comfy_execution.node_timings import NodeTimings
+from conftest import AsyncNode, Node
+from scripts.schedule_benchmark import benchmark_nodes, benchmark_prompt, simulate
+
+NODE_CLASSES = {"Fast": Node, "Slow": Node, "Output": Node, "Remote": AsyncNode}
+
+
+def make_list(prompt, durations):
+    timings = NodeTimings()
+    for class_type, seconds in durations.items():
+        timings.record(class_type, seconds)
+    execution_list = ExecutionList(DynamicPrompt(prompt), NullCache(), timings=timings)
+    for node_id in prompt:
+        if prompt[node_id]["class_type"] == "Output":
+            execution_list.add_node(node_id)
+    return execution_list
+
+
+def test_longest_remaining_path_goes_first():
+    prompt = {
+        "short": {"class_type": "Fast", "inputs": {}},
+        "long": {"class_type": "Fast", "inputs": {}},
+        "work": {"class_type": "Slow", "inputs": {"x": ["long", 0]}},
+        "out1": {"class_type": "Output", "inputs": {"x": ["short", 0]}},
+        "out2": {"class_type": "Output", "inputs": {"x": ["work", 0]}},
+    }
+    execution_list = make_list(prompt, {"Fast": 1.0, "Slow": 10.0, "Output": 0.1})
+    assert execution_list.remaining_path_length("long") == pytest.approx(11.1)
+    assert execution_list.pick_ready_nodes() == ["long", "short"]
+
+
+def test_nodes_feeding_slow_async_nodes_go_first():
+    prompt = {
+        "prep": {"class_type": "Fast", "inputs": {}},
+        "api": {"class_type": "Remote", "inputs": {"x": ["prep", 0]}},
+        "model": {"class_type": "Slow", "inputs": {}},
+        "out1": {"class_type": "Output", "inputs": {"x": ["api", 0]}},
+        "out2": {"class_type": "Output", "inputs": {"x": ["model", 0]}},
+    }
+    execution_list = make_list(prompt, {"Fast": 0.1, "Remote": 5.0, "Slow": 10.0, "Output": 0.1})
+    assert execution_list.pick_ready_nodes() == ["prep", "model"]
+
+
+def test_benchmark_graph_finishes_sooner_with_critical_path():
+    prompt = benchmark_prompt()
+    with benchmark_nodes():
+        ux, _ = simulate(prompt, "ux")
+        critical, started = simulate(prompt, "critical-path")
+    assert critical < ux
+    assert sorted(started) == sorted(prompt)
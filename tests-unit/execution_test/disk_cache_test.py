@@ -0,0 +1,105 @@
+import asyncio
+import os
+from typing import NamedTuple
+
+import torch
+
+from comfy_execution import caching
+from comfy_execution.caching import CacheKeySetInputSignature, LRUCache, RAMPressureCache
+from comfy_execution.disk_cache import DiskCache
+from comfy_execution.graph import DynamicPrompt
+from conftest import IsChangedCache, Node
+
+
+class Entry(NamedTuple):
+    ui: dict
+    outputs: list
+
+
+NODE_CLASSES = {"TestNode": Node}
+
+
+def prompt_for(value):
+    return {"1": {"class_type": "TestNode", "inputs": {"value": value}}}
+
+
+def set_prompt(cache, prompt):
+    asyncio.run(cache.set_prompt(DynamicPrompt(prompt), list(prompt), IsChangedCache()))
+    cache.clean_unused()
+
+
+def test_round_trip_preserves_tensors_and_structure(tmp_path):
+    disk = DiskCache(str(tmp_path), 1024 ** 2, entry_type=Entry)
+    conditioning = [[torch.arange(6, dtype=torch.float16).reshape(2, 3), {"pooled_output": torch.ones(3)}]]
+    entry = Entry(ui={"text": ["hello"]}, outputs=[[conditioning], [{"samples": torch.zeros(1, 4, 8, 8)}], [(1, 2.5, None)]])
+    disk.put(b"k" * 32, entry)
+    disk.flush()
+
+    loaded = DiskCache(str(tmp_path), 1024 ** 2, entry_type=Entry).get(b"k" * 32)
+    assert isinstance(loaded, Entry)
+    assert loaded.ui == {"text": ["hello"]}
+    assert torch.equal(loaded.outputs[0][0][0][0], conditioning[0][0])
+    assert loaded.outputs[0][0][0][0].dtype == torch.float16
+    assert torch.equal(loaded.outputs[0][0][0][1]["pooled_output"], torch.ones(3))
+    assert loaded.outputs[1][0]["samples"].shape == (1, 4, 8, 8)
+    assert loaded.outputs[2] == [(1, 2.5, None)]
+
+
+def test_unserializable_entries_are_skipped(tmp_path):
+    disk = DiskCache(str(tmp_path), 1024 ** 2, entry_type=Entry)
+    disk.put(b"m" * 32, Entry(ui=None, outputs=[[object()]]))
+    disk.flush()
+    assert disk.get(b"m" * 32) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    # Each entry is a 512 byte tensor plus a small header: three fit, four don't.
+    tensor = torch.zeros(512, dtype=torch.uint8)
+    disk = DiskCache(str(tmp_path), 2500, entry_type=Entry)
+    for key in (b"a", b"b", b"c"):
+        disk.put(key * 32, Entry(ui=None, outputs=[[tensor]]))
+        disk.flush()
+    disk.get(b"a" * 32)
+    disk.put(b"d" * 32, Entry(ui=None, outputs=[[tensor]]))
+    disk.flush()
+    assert disk.total_bytes <= 2500
+    assert b"a" * 32 in disk
+    assert b"b" * 32 not in disk
+
+
+def test_evicted_outputs_are_served_from_disk(tmp_path):
+    disk = DiskCache(str(tmp_path), 1024 ** 2, entry_type=Entry)
+    cache = LRUCache(CacheKeySetInputSignature, max_size=1, spill=disk)
+    set_prompt(cache, prompt_for(1))
+    cache.set("1", Entry(ui=None, outputs=[[torch.full((2,), 7.0)]]))
+    set_prompt(cache, prompt_for(2))
+    cache.set("1", Entry(ui=None, outputs=[[torch.zeros(2)]]))
+    set_prompt(cache, prompt_for(3))
+    disk.flush()
+    assert len(cache.cache) == 1
+
+    restarted = LRUCache(CacheKeySetInputSignature, max_size=1, spill=DiskCache(str(tmp_path), 1024 ** 2, entry_type=Entry))
+    set_prompt(restarted, prompt_for(1))
+    hit = restarted.get("1")
+    assert hit is not None and torch.equal(hit.outputs[0][0], torch.full((2,), 7.0))
+
+
+def test_ram_pressure_eviction_waits_for_the_spill(tmp_path, monkeypatch):
+    disk = DiskCache(str(tmp_path), 1024 ** 2, entry_type=Entry)
+    cache = RAMPressureCache(CacheKeySetInputSignature, spill=disk)
+    prompt = {str(i): {"class_type": "TestNode", "inputs": {"value": i}} for i in range(3)}
+    set_prompt(cache, prompt)
+    for node_id in prompt:
+        cache.set(node_id, Entry(ui=None, outputs=[[torch.zeros(4)]]))
+
+    # RAM counts as low while a spilled value is still held in memory.
+    class _Memory:
+        @property
+        def available(self):
+            return 0 if disk.pending or len(cache.cache) == 3 else 1024 ** 4
+
+    monkeypatch.setattr(caching.psutil, "virtual_memory", _Memory, raising=False)
+    cache.poll(ram_headroom=1.0)
+    assert len(cache.cache) == 2
+    assert disk.pending == {}
@@ -0,0 +1,23 @@
+import pytest
+
+from comfy_execution.node_timings import NodeTimings
+
+
+def test_timings_average_and_persist(tmp_path):
+    path = tmp_path / "timings.json"
+    timings = NodeTimings(str(path))
+    assert timings.estimate("Anything") == 0.0
+    timings.record("Slow", 10.0)
+    timings.record("Slow", 20.0)
+    timings.record("Fast", 1.0)
+    assert 10.0 < timings.estimate("Slow") < 20.0
+    # Unseen classes are assumed to be average.
+    assert timings.estimate("New") == pytest.approx((timings.estimate("Slow") + 1.0) / 2)
+    timings.save()
+    assert NodeTimings(str(path)).durations == timings.durations
+
+
+def test_corrupt_timings_file_is_ignored(tmp_path):
+    path = tmp_path / "timings.json"
+    path.write_text("{not json")
+    assert NodeTimings(str(path)).durations == {}
@@ -0,0 +1,250 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import execution
+import nodes
+from comfy_execution.caching import NullCache
+from comfy_execution.graph import DynamicPrompt, ExecutionList
+from comfy_execution.graph_utils import ExecutionBlocker, GraphBuilder
+from comfy_execution.node_timings import NodeTimings
+from comfy_execution.parallel import NodeLanes
+from conftest import AsyncNode, Node
+
+
+class _ModelNode(Node):
+    RETURN_TYPES = ("MODEL",)
+
+
+class _PinnedNode(_ModelNode):
+    EXECUTION_LANE = "main"
+
+
+NODE_CLASSES = {"TestNode": Node}
+
+
+@pytest.fixture
+def lanes():
+    lanes = NodeLanes(2)
+    yield lanes
+    lanes.shutdown()
+
+
+def test_lane_classification(lanes):
+    assert lanes.lane_for(Node, "run") == "cpu"
+    assert lanes.lane_for(_ModelNode, "run") == "gpu"
+    assert lanes.lane_for(AsyncNode, "run") == "async"
+    assert lanes.lane_for(_PinnedNode, "run") == "main"
+    assert lanes.runner("async") is None
+    assert lanes.runner("main") is None
+
+
+def test_runner_moves_calls_off_the_loop_thread(lanes):
+    async def run():
+        run_sync = lanes.runner("cpu")
+        return await asyncio.gather(*(run_sync(lambda: threading.current_thread().name) for _ in range(4)))
+
+    names = asyncio.run(run())
+    assert all(name.startswith("comfy-node") for name in names)
+
+
+def test_graph_builder_prefix_is_per_thread():
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def expand(node_id):
+        GraphBuilder.set_default_prefix(node_id, 0, 0)
+        barrier.wait()
+        results[node_id] = [GraphBuilder.alloc_prefix() for _ in range(2)]
+
+    threads = [threading.Thread(target=expand, args=(node_id,)) for node_id in ("1", "2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {"1": ["1.0.0.", "1.0.1."], "2": ["2.0.0.", "2.0.1."]}
+
+
+def test_execution_list_hands_out_independent_branches():
+    # 1 -> 3 <- 2: the two sources can run together, 3 waits for both.
+    prompt = {
+        "1": {"class_type": "TestNode", "inputs": {"value": 1}},
+        "2": {"class_type": "TestNode", "inputs": {"value": 2}},
+        "3": {"class_type": "TestNode", "inputs": {"value": 3, "source": ["1", 0]}},
+    }
+    prompt["3"]["inputs"]["other"] = ["2", 0]
+    execution_list = ExecutionList(DynamicPrompt(prompt), NullCache())
+    execution_list.add_node("3")
+
+    ready = execution_list.pick_ready_nodes()
+    assert sorted(ready) == ["1", "2"]
+    for node_id in ready:
+        execution_list.start_node_execution(node_id)
+    assert execution_list.pick_ready_nodes() == []
+
+    execution_list.finish_node_execution("1", True)
+    assert execution_list.pick_ready_nodes() == []
+    # A node that comes back pending is handed out again.
+    execution_list.finish_node_execution("2", False)
+    assert execution_list.pick_ready_nodes() == ["2"]
+    execution_list.start_node_execution("2")
+    execution_list.finish_node_execution("2", True)
+    assert execution_list.pick_ready_nodes() == ["3"]
+
+
+class _Server:
+    def __init__(self):
+        self.client_id = None
+        self.last_node_id = None
+        self.sockets_metadata = {}
+
+    def send_sync(self, event, data, sid=None):
+        pass
+
+
+class _Value:
+    FUNCTION = "run"
+    RETURN_TYPES = ("INT",)
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {"required": {"value": ("INT",)}}
+
+    def run(self, value):
+        return (value,)
+
+
+class _Add(_Value):
+    threads = []
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {"required": {"a": ("INT",), "b": ("INT",)}}
+
+    def run(self, a, b):
+        _Add.threads.append(threading.current_thread().name)
+        return (a + b,)
+
+
+class _AsyncDouble(_Value):
+    async def run(self, value):
+        await asyncio.sleep(0.01)
+        return (value * 2,)
+
+
+class _LazySwitch(_Value):
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {"required": {"switch": ("BOOLEAN",), "on_true": ("INT", {"lazy": True}), "on_false": ("INT", {"lazy": True})}}
+
+    def check_lazy_status(self, switch, on_true=None, on_false=None):
+        return ["on_true"] if switch else ["on_false"]
+
+    def run(self, switch, on_true=None, on_false=None):
+        return (on_true if switch else on_false,)
+
+
+class _Block(_Value):
+    def run(self, value):
+        return (ExecutionBlocker(None),)
+
+
+class _Fail(_Value):
+    def run(self, value):
+        raise ValueError("boom")
+
+
+class _SlowModel(_Value):
+    RETURN_TYPES = ("MODEL",)
+
+    def run(self, value):
+        time.sleep(0.2)
+        return (value,)
+
+
+class _Output(_Value):
+    OUTPUT_NODE = True
+    RETURN_TYPES = ()
+
+    def run(self, value):
+        return {"ui": {"value": [value]}}
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    for class_type, class_def in {"Value": _Value, "Add": _Add, "AsyncDouble": _AsyncDouble, "LazySwitch": _LazySwitch,
+                                  "Block": _Block, "Fail": _Fail, "SlowModel": _SlowModel, "Output": _Output}.items():
+        monkeypatch.setitem(nodes.NODE_CLASS_MAPPINGS, class_type, class_def)
+    _Add.threads = []
+    executor = execution.PromptExecutor(_Server(), cache_args={"ram": 0}, parallel_workers=2)
+    yield executor
+    executor.lanes.shutdown()
+
+
+def node(class_type, **inputs):
+    return {"class_type": class_type, "inputs": inputs}
+
+
+def test_parallel_executor_runs_branches_lazy_inputs_and_async_nodes(executor):
+    prompt = {
+        "1": node("Value", value=3),
+        "2": node("Value", value=4),
+        "3": node("Add", a=["1", 0], b=["2", 0]),
+        "4": node("AsyncDouble", value=["3", 0]),
+        "5": node("Fail", value=["1", 0]),  # only reachable through the lazy input that isn't needed
+        "6": node("LazySwitch", switch=True, on_true=["4", 0], on_false=["5", 0]),
+        "7": node("Output", value=["6", 0]),
+        "8": node("Block", value=["2", 0]),
+        "9": node("Output", value=["8", 0]),
+        "10": node("Output", value=["2", 0]),
+    }
+    executor.execute(prompt, "prompt", {}, ["7", "9", "10"])
+
+    assert executor.success
+    assert executor.history_result["outputs"] == {"7": {"value": [14]}, "10": {"value": [4]}}
+    assert [event for event, _ in executor.status_messages][-1] == "execution_success"
+    assert _Add.threads and all(name.startswith("comfy-node") for name in _Add.threads)
+
+
+def test_parallel_executor_reports_a_failing_branch_once(executor):
+    prompt = {
+        "1": node("Value", value=3),
+        "2": node("Fail", value=["1", 0]),
+        "3": node("Output", value=["2", 0]),
+        "4": node("Fail", value=["1", 0]),
+        "5": node("Output", value=["4", 0]),
+        "6": node("Add", a=["1", 0], b=["1", 0]),
+        "7": node("Output", value=["6", 0]),
+    }
+    executor.execute(prompt, "prompt", {}, ["3", "5", "7"])
+
+    assert not executor.success
+    events = [event for event, _ in executor.status_messages]
+    assert events.count("execution_error") == 1
+    assert "execution_success" not in events
+    error = dict(executor.status_messages)["execution_error"]
+    assert error["node_id"] in ("2", "4")
+    assert error["exception_message"].strip() == "boom"
+
+
+def test_executor_constructs_with_default_cache_args():
+    executor = execution.PromptExecutor(_Server())
+    assert executor.lanes is None and executor.caches.spill is None
+
+
+def test_recorded_timings_exclude_time_queued_on_the_gpu_lane(executor):
+    executor.node_timings = NodeTimings()
+    # Both loaders are ready at once and share the one device lane, so the
+    # second waits ~0.2s before it runs; that wait must not be recorded.
+    prompt = {
+        "1": node("SlowModel", value=1),
+        "2": node("SlowModel", value=2),
+        "3": node("Output", value=["1", 0]),
+        "4": node("Output", value=["2", 0]),
+    }
+    executor.execute(prompt, "prompt", {}, ["3", "4"])
+
+    assert executor.success
+    assert 0.15 < executor.node_timings.estimate("SlowModel") < 0.25